@@ -17,6 +17,7 @@ from .discord import router as discord_router
 from .line import router as line_router
 from .slack import router as slack_router
 from .workflows import router as workflows_router
+from .usage import router as usage_router
 
 __all__ = [
     "automation_router",
@@ -38,4 +39,5 @@ __all__ = [
     "line_router",
     "slack_router",
     "workflows_router",
+    "usage_router",
 ]
@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import json
+import logging
+
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from ...core.agent import ChatRequest, ChatResponse, HyperAIAgent
 from ...services.conversation_service import conversation_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
 agent = HyperAIAgent()
@@ -20,8 +27,10 @@ class ConversationCreate(BaseModel):
 
 
 class ConversationMessage(BaseModel):
+    id: int
     role: str
-    content: str
+    content: Optional[str] = None
+    token_usage: Optional[int] = None
     created_at: str
 
 
@@ -33,13 +42,21 @@ class ConversationResponse(BaseModel):
     model_name: str
     created_at: str
     updated_at: str
+    message_count: int = 0
+    last_message_at: Optional[str] = None
 
 
-@router.get("/{conversation_id}", response_model=ConversationResponse)
-async def get_conversation(conversation_id: int):
-    conv = await conversation_service.get_conversation(conversation_id)
-    if not conv:
-        raise HTTPException(status_code=404, detail="Conversation not found")
+class MessageSearchHit(BaseModel):
+    message_id: int
+    conversation_id: int
+    conversation_title: Optional[str]
+    role: str
+    snippet: str
+    score: float
+    created_at: str
+
+
+def _to_response(conv) -> ConversationResponse:
     return ConversationResponse(
         id=conv.id,
         project_id=conv.project_id,
@@ -48,16 +65,94 @@ async def get_conversation(conversation_id: int):
         model_name=conv.model_name,
         created_at=conv.created_at.isoformat(),
         updated_at=conv.updated_at.isoformat(),
+        message_count=conv.message_count,
+        last_message_at=conv.last_message_at.isoformat() if conv.last_message_at else None,
+    )
+
+
+@router.get("", response_model=List[ConversationResponse])
+async def list_conversations(project_id: int, limit: int = Query(50, ge=1, le=500)):
+    """Conversations of a project, most recently active first."""
+
+    conversations = await conversation_service.list_conversations(project_id, limit=limit)
+    return [_to_response(conv) for conv in conversations]
+
+
+@router.get("/cache/stats")
+async def identity_cache_stats() -> Dict[str, Dict[str, float]]:
+    return conversation_service.cache_stats()
+
+
+@router.get("/search", response_model=List[MessageSearchHit])
+async def search_messages(
+    project_id: int,
+    q: str = Query(..., min_length=1),
+    conversation_id: Optional[int] = Query(None, description="Restrict the search to one conversation"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Full-text search over a project's messages, best match first.
+
+    Matched terms are wrapped in ``<mark>`` in the snippets.
+    """
+
+    hits = await conversation_service.search_messages(
+        project_id, q, limit=limit, offset=offset, conversation_id=conversation_id
     )
+    if hits is None:
+        raise HTTPException(status_code=503, detail="Full-text search is unavailable")
+    return [
+        MessageSearchHit(
+            message_id=hit.id,
+            conversation_id=hit.conversation_id,
+            conversation_title=hit.title,
+            role=hit.role,
+            snippet=hit.snippet,
+            score=-float(hit.rank),
+            created_at=hit.created_at.isoformat(),
+        )
+        for hit in hits
+    ]
+
+
+@router.get("/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation(conversation_id: int):
+    conv = await conversation_service.get_conversation(conversation_id)
+    if not conv:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return _to_response(conv)
 
 
 @router.get("/{conversation_id}/messages", response_model=List[ConversationMessage])
-async def get_messages(conversation_id: int, limit: Optional[int] = Query(None)):
-    msgs = await conversation_service.get_recent_messages(conversation_id, limit=limit or 100)
+async def get_messages(
+    conversation_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    before: Optional[int] = Query(None, description="Return messages older than this message id"),
+    after: Optional[int] = Query(None, description="Return messages newer than this message id"),
+    include_content: bool = Query(True, description="False returns metadata only, for list views"),
+):
+    """A page of messages, oldest first.
+
+    Without cursors the newest messages are returned. Pass the first id of a
+    page as ``before`` to load older history, or the last id as ``after`` to
+    poll for newer messages.
+    """
+
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
+    msgs = await conversation_service.list_messages(
+        conversation_id,
+        limit=limit or 100,
+        before_id=before,
+        after_id=after,
+        include_content=include_content,
+    )
     return [
         ConversationMessage(
+            id=msg.id,
             role=msg.role,
-            content=msg.content,
+            content=msg.content if include_content else None,
+            token_usage=msg.token_usage,
             created_at=msg.created_at.isoformat(),
         )
         for msg in msgs
@@ -70,3 +165,29 @@ async def chat(request: ChatRequest):
         return await agent.process_chat(request)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Chat with the reply relayed as Server-Sent Events while it is generated.
+
+    Events: ``start`` (conversation id and model), ``token`` (``text`` delta),
+    then ``done`` (the same payload as ``POST /conversations/chat``) once the
+    reply is stored, or ``error``.
+    """
+
+    async def events():
+        try:
+            async for event in agent.stream_chat(request):
+                name = event.pop("event")
+                yield f"event: {name}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+        except Exception as exc:
+            logger.error("Streaming chat failed: %s", exc)
+            yield f"event: error\ndata: {json.dumps({'detail': str(exc)})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+from dataclasses import asdict
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, UploadFile, File
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional
 
-from ...services.memory_service import MemoryMatch, memory_service
-from ...services.ocr_service import ocr_service
+from ...core.models import ProviderType
+from ...services.memory_service import MemoryFilter, MemoryInput, MemoryMatch, memory_service
+from ...services.ingestion_service import SUPPORTED_TYPES, ingestion_service
+from ...services.retention_service import retention_service
 
 router = APIRouter(prefix="/memories", tags=["memories"])
 
+MAX_BATCH_MEMORIES = 10000
+
 
 class MemoryCreate(BaseModel):
     project_id: int
@@ -18,6 +24,24 @@ class MemoryCreate(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
 
 
+class MemoryBatchItem(BaseModel):
+    content: str
+    summary: Optional[str] = None
+    tags: Optional[List[str]] = Field(default_factory=list)
+    metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
+
+
+class MemoryBatchCreate(BaseModel):
+    project_id: int
+    memories: List[MemoryBatchItem]
+
+
+class MemoryBatchResponse(BaseModel):
+    # One id per submitted memory, in order; near-duplicates share the id
+    # of the memory they were merged into.
+    ids: List[int]
+
+
 class MemoryResponse(BaseModel):
     id: int
     project_id: int
@@ -32,6 +56,29 @@ class MemorySearchResponse(BaseModel):
     score: float
 
 
+class MemoryDedupResponse(BaseModel):
+    scanned: int
+    fingerprinted: int
+    removed: int
+
+
+class RetentionPolicyPayload(BaseModel):
+    max_memories: Optional[int] = Field(None, ge=0)
+    archive_after_days: Optional[float] = Field(None, ge=0.0)
+    decay_half_life_days: Optional[float] = Field(None, ge=0.0)
+    rollup_after_days: Optional[float] = Field(None, ge=0.0)
+    rollup_group_size: Optional[int] = Field(None, ge=2)
+    rollup_provider: Optional[ProviderType] = None
+    rollup_model: Optional[str] = None
+
+
+class MemoryCompactionResponse(BaseModel):
+    rolled_up: int
+    rollups_created: int
+    archived_age: int
+    archived_count: int
+
+
 @router.post("/", response_model=MemoryResponse)
 async def add_memory(payload: MemoryCreate):
     try:
@@ -54,19 +101,61 @@ async def add_memory(payload: MemoryCreate):
         raise HTTPException(status_code=500, detail=str(exc))
 
 
+@router.post("/batch", response_model=MemoryBatchResponse)
+async def add_memories(payload: MemoryBatchCreate):
+    if len(payload.memories) > MAX_BATCH_MEMORIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_MEMORIES} memories per batch")
+    try:
+        ids = await memory_service.add_memories(
+            payload.project_id,
+            [
+                MemoryInput(
+                    content=item.content,
+                    summary=item.summary,
+                    tags=item.tags or (),
+                    metadata=item.metadata,
+                )
+                for item in payload.memories
+            ],
+        )
+        return MemoryBatchResponse(ids=ids)
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/cache/stats")
+async def memory_cache_stats() -> Dict[str, Dict[str, float]]:
+    return memory_service.cache_stats()
+
+
 @router.get("/search/{project_id}", response_model=List[MemorySearchResponse])
 async def search_memories(
     project_id: int,
     q: str = Query(..., alias="query"),
     top_k: Optional[int] = Query(5),
     min_score: Optional[float] = Query(0.35),
+    tags: Optional[List[str]] = Query(default=None),
+    tags_all: Optional[List[str]] = Query(default=None),
+    memory_type: Optional[str] = Query(None, alias="type"),
+    source: Optional[str] = Query(None),
+    created_after: Optional[datetime] = Query(None),
+    created_before: Optional[datetime] = Query(None),
 ):
     try:
+        filters = MemoryFilter(
+            tags_any=tuple(tags or ()),
+            tags_all=tuple(tags_all or ()),
+            memory_type=memory_type,
+            source=source,
+            created_after=created_after,
+            created_before=created_before,
+        )
         matches = await memory_service.search_memories(
             project_id=project_id,
             query=q,
             top_k=top_k or 5,
             min_score=min_score or 0.35,
+            filters=None if filters.is_empty else filters,
         )
         return [
             MemorySearchResponse(
@@ -108,47 +197,60 @@ async def list_memories(project_id: int, limit: Optional[int] = Query(None)):
         raise HTTPException(status_code=500, detail=str(exc))
 
 
-@router.post("/ingest-file", response_model=List[MemoryResponse])
-async def ingest_file(
-    project_id: int = Query(...),
-    file: UploadFile = File(...),
-    tags: Optional[List[str]] = Query(default=None),
-):
+@router.post("/{project_id}/dedup", response_model=MemoryDedupResponse)
+async def deduplicate_memories(project_id: int):
+    try:
+        return MemoryDedupResponse(**await memory_service.deduplicate(project_id))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/{project_id}/retention", response_model=RetentionPolicyPayload)
+async def get_retention_policy(project_id: int):
     try:
-        content = await file.read()
+        return RetentionPolicyPayload(**asdict(await memory_service.get_retention_policy(project_id)))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
 
-        allowed_types = [
-            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            "application/pdf",
-            "text/plain",
-        ]
 
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="Unsupported document format")
+@router.put("/{project_id}/retention", response_model=RetentionPolicyPayload)
+async def set_retention_policy(project_id: int, payload: RetentionPolicyPayload):
+    """Replace the project's overrides; omitted fields use the server settings."""
 
-        import tempfile
+    try:
+        policy = await memory_service.set_retention_policy(project_id, payload.dict(exclude_none=True))
+        return RetentionPolicyPayload(**asdict(policy))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
 
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{file.filename}") as tmp_file:
-            tmp_file.write(content)
-            file_path = tmp_file.name
 
-        if file.content_type == "application/pdf":
-            ocr_result = await ocr_service.extract_text_from_pdf(file_path)
-            text = ocr_result.get("text", "")
-        else:
-            ocr_result = await ocr_service.extract_text_from_document(file_path, True)
-            text = ocr_result.get("text", "")
+@router.post("/{project_id}/compact", response_model=MemoryCompactionResponse)
+async def compact_memories(project_id: int):
+    try:
+        return MemoryCompactionResponse(**await retention_service.compact(project_id))
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
 
-        if not text.strip():
-            raise HTTPException(status_code=400, detail="No text content could be extracted from the document")
 
-        records = await memory_service.add_document_memories(
-            project_id=project_id,
-            text=text,
-            source=file.filename,
-            tags=tags,
-        )
+@router.post("/ingest-file", response_model=List[MemoryResponse])
+async def ingest_file(
+    project_id: int = Query(...),
+    file: UploadFile = File(...),
+    tags: Optional[List[str]] = Query(default=None),
+):
+    if file.content_type not in SUPPORTED_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported document format")
+
+    try:
+        file_path = await ingestion_service.spool(file)
+        job = ingestion_service.create_job(project_id, file.filename or file_path.name)
+        await ingestion_service.run(job, file_path, file.content_type, tags)
+        if job.status == "failed":
+            # Nothing stored means the document itself yielded no text.
+            status_code = 400 if job.chunks == 0 else 500
+            raise HTTPException(status_code=status_code, detail=job.error)
 
+        records = await memory_service.conversation_service.get_memories(dict.fromkeys(job.memory_ids))
         return [
             MemoryResponse(
                 id=record.id,
@@ -164,3 +266,29 @@ async def ingest_file(
         raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.post("/ingest-file/async")
+async def ingest_file_async(
+    project_id: int = Query(...),
+    file: UploadFile = File(...),
+    tags: Optional[List[str]] = Query(default=None),
+):
+    if file.content_type not in SUPPORTED_TYPES:
+        raise HTTPException(status_code=400, detail="Unsupported document format")
+
+    try:
+        file_path = await ingestion_service.spool(file)
+        job = ingestion_service.create_job(project_id, file.filename or file_path.name)
+        ingestion_service.start(job, file_path, file.content_type, tags)
+        return job.to_dict()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@router.get("/ingest-jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    job = ingestion_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job.to_dict()
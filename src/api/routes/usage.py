@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+from ...core.models import ProviderType
+from ...services.usage_service import usage_service
+
+router = APIRouter(prefix="/usage", tags=["usage"])
+
+
+class PricingUpdate(BaseModel):
+    provider: ProviderType
+    model_name: str = Field(..., min_length=1, description='Model name, or "*" for every model of the provider')
+    prompt_per_million: float = Field(..., ge=0.0)
+    completion_per_million: float = Field(..., ge=0.0)
+
+
+class PricingResponse(PricingUpdate):
+    updated_at: str
+
+
+class CostBucket(BaseModel):
+    bucket_start: str
+    project_id: Optional[int] = None
+    provider: Optional[ProviderType] = None
+    model_name: Optional[str] = None
+    calls: int
+    tokens_prompt: int
+    tokens_completion: int
+    total_cost: float
+    unpriced_calls: int
+
+
+class CostReport(BaseModel):
+    granularity: str
+    group_by: str
+    buckets: List[CostBucket]
+    total_calls: int
+    total_cost: float
+    unpriced_calls: int
+
+
+def _pricing_response(pricing) -> PricingResponse:
+    return PricingResponse(
+        provider=pricing.provider,
+        model_name=pricing.model_name,
+        prompt_per_million=pricing.prompt_per_million,
+        completion_per_million=pricing.completion_per_million,
+        updated_at=pricing.updated_at.isoformat(),
+    )
+
+
+@router.get("/pricing", response_model=List[PricingResponse])
+async def list_pricing():
+    return [_pricing_response(pricing) for pricing in await usage_service.list_pricing()]
+
+
+@router.put("/pricing", response_model=PricingResponse)
+async def set_pricing(payload: PricingUpdate):
+    """Create or replace a price; calls recorded from now on are costed with it."""
+
+    pricing = await usage_service.set_pricing(
+        provider=payload.provider,
+        model_name=payload.model_name,
+        prompt_per_million=payload.prompt_per_million,
+        completion_per_million=payload.completion_per_million,
+    )
+    return _pricing_response(pricing)
+
+
+@router.delete("/pricing/{provider}/{model_name}")
+async def delete_pricing(provider: ProviderType, model_name: str):
+    if not await usage_service.delete_pricing(provider, model_name):
+        raise HTTPException(status_code=404, detail="Price not found")
+    return {"status": "deleted"}
+
+
+@router.get("/costs", response_model=CostReport)
+async def cost_report(
+    granularity: Literal["hour", "day"] = "day",
+    group_by: Literal["none", "project", "provider", "model"] = "model",
+    project_id: Optional[int] = None,
+    start: Optional[datetime] = Query(None, description="First bucket start (inclusive)"),
+    end: Optional[datetime] = Query(None, description="Last bucket start (exclusive)"),
+):
+    """Usage and cost per UTC hour or day, read from the rollups."""
+
+    rows = await usage_service.cost_report(
+        granularity=granularity,
+        start=start,
+        end=end,
+        project_id=project_id,
+        group_by=group_by,
+    )
+    buckets = [
+        CostBucket(
+            bucket_start=row.bucket_start.isoformat(),
+            project_id=getattr(row, "project_id", None),
+            provider=getattr(row, "provider", None),
+            model_name=getattr(row, "model_name", None),
+            calls=row.calls,
+            tokens_prompt=row.tokens_prompt,
+            tokens_completion=row.tokens_completion,
+            total_cost=row.total_cost,
+            unpriced_calls=row.unpriced_calls,
+        )
+        for row in rows
+    ]
+    return CostReport(
+        granularity=granularity,
+        group_by=group_by,
+        buckets=buckets,
+        total_calls=sum(bucket.calls for bucket in buckets),
+        total_cost=sum(bucket.total_cost for bucket in buckets),
+        unpriced_calls=sum(bucket.unpriced_calls for bucket in buckets),
+    )
@@ -7,8 +7,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from ..core.config import get_settings
-from ..core.database import init_db
+from ..core.init_db import init_db
 from ..services.automation_service import automation_service
+from ..services.memory_service import memory_service
+from ..services.write_behind_service import write_behind_service
 from .routes import (
     automation_router,
     chat_router,
@@ -28,6 +30,7 @@ from .routes import (
     roles_router,
     slack_router,
     tools_router,
+    usage_router,
     workflows_router,
 )
 
@@ -38,10 +41,14 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await memory_service.migrate_legacy_embeddings()
+    write_behind_service.start()
     await automation_service.start()
     logger.info("Application startup complete")
     yield
     await automation_service.stop()
+    # Drain after the scheduler stopped, so late tool logs are written too.
+    await write_behind_service.stop()
     logger.info("Application shutdown complete")
 
 
@@ -73,9 +80,15 @@ app.include_router(providers_router)
 app.include_router(roles_router)
 app.include_router(slack_router)
 app.include_router(tools_router)
+app.include_router(usage_router)
 app.include_router(workflows_router)
 
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Hyper AI Agent API"}
+
+
+@app.get("/stats/write-behind")
+async def write_behind_stats():
+    return write_behind_service.stats()
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 from pydantic import BaseModel, Field, validator
 
 from ..core.config import get_settings
 from ..core.models import ProviderType
 from ..providers.registry import get_provider
-from ..services.conversation_service import ConversationService, conversation_service
+from ..services.conversation_service import ChatTurn, ConversationService, conversation_service
 from ..services.memory_service import MemoryService, memory_service
 from ..services.provider_manager import ProviderManager, provider_manager
 from ..services.summarization_service import SummarizationService, summarization_service
@@ -84,43 +84,114 @@ class HyperAIAgent:
     async def process_chat(self, request: ChatRequest) -> ChatResponse:
         """Process a chat request using failover-aware provider routing."""
 
-        temperature = request.temperature if request.temperature is not None else self.config.temperature
-        max_tokens = request.max_tokens if request.max_tokens is not None else self.config.max_tokens
+        turn, dispatch_messages = await self._prepare_turn(request)
+        provider = get_provider(request.provider, turn.model_name)
+        used_key: Dict[str, Optional[int]] = {"id": None}
 
-        project = await self.conversation_service.ensure_project(
-            name=request.project_name,
-            description=request.project_description,
+        async def _invoke(api_key: str, key_id: int):
+            used_key["id"] = key_id
+            return await provider.generate(
+                api_key=api_key,
+                messages=dispatch_messages,
+                temperature=self._temperature(request),
+                max_tokens=self._max_tokens(request),
+                tools=request.tools,
+            )
+
+        result = await self.provider_manager.rotate_until_success(request.provider, _invoke)
+        return await self._finish_turn(
+            request,
+            turn,
+            response_text=result.get("text", ""),
+            usage=result.get("usage", {}),
+            tool_calls_raw=result.get("tool_calls", []) or [],
+            used_key_id=used_key.get("id"),
         )
 
-        conversation = None
-        if request.conversation_id:
-            conversation = await self.conversation_service.get_conversation(request.conversation_id)
-
-        if not conversation:
-            model_name = request.model_name or self._default_model_for(request.provider)
-            conversation = await self.conversation_service.create_conversation(
-                project_id=project.id,
-                provider=request.provider,
-                model_name=model_name,
-                title=request.project_name,
-            )
-        elif request.model_name and conversation.model_name != request.model_name:
-            updated = await self.conversation_service.update_conversation_model(
-                conversation_id=conversation.id,
-                model_name=request.model_name,
+    async def stream_chat(self, request: ChatRequest) -> AsyncIterator[Dict[str, Any]]:
+        """Process a chat request, yielding the reply as the provider generates it.
+
+        Yields a ``start`` event once the turn is set up, ``token`` events with
+        text deltas, and a final ``done`` event with the :class:`ChatResponse`
+        after the reply and usage are stored. Keys fail over until the stream
+        delivers its first event; a failure after that ends the stream with
+        the error and stores no reply.
+        """
+
+        turn, dispatch_messages = await self._prepare_turn(request)
+        yield {
+            "event": "start",
+            "conversation_id": turn.conversation_id,
+            "provider": request.provider,
+            "model_name": turn.model_name,
+        }
+
+        provider = get_provider(request.provider, turn.model_name)
+        used_key: Dict[str, Optional[int]] = {"id": None}
+
+        async def _open(api_key: str, key_id: int):
+            used_key["id"] = key_id
+            events = provider.stream(
+                api_key=api_key,
+                messages=dispatch_messages,
+                temperature=self._temperature(request),
+                max_tokens=self._max_tokens(request),
+                tools=request.tools,
             )
-            if updated:
-                conversation = updated
+            try:
+                return await anext(events), events
+            except BaseException:
+                await events.aclose()
+                raise
+
+        first, events = await self.provider_manager.rotate_until_success(request.provider, _open)
+        parts: List[str] = []
+        final: Dict[str, Any] = {}
+        try:
+            event: Optional[Dict[str, Any]] = first
+            while event is not None:
+                if event.get("text"):
+                    parts.append(event["text"])
+                    yield {"event": "token", "text": event["text"]}
+                if "usage" in event or "tool_calls" in event:
+                    final = event
+                event = await anext(events, None)
+        finally:
+            await events.aclose()
+
+        response = await self._finish_turn(
+            request,
+            turn,
+            response_text="".join(parts),
+            usage=final.get("usage") or {},
+            tool_calls_raw=final.get("tool_calls") or [],
+            used_key_id=used_key.get("id"),
+        )
+        yield {"event": "done", **response.dict()}
+
+    def _temperature(self, request: ChatRequest) -> float:
+        return request.temperature if request.temperature is not None else self.config.temperature
 
-        model_in_use = request.model_name or conversation.model_name
+    def _max_tokens(self, request: ChatRequest) -> int:
+        return request.max_tokens if request.max_tokens is not None else self.config.max_tokens
 
-        context_messages = await self.conversation_service.list_conversation_context(
-            conversation_id=conversation.id,
-            limit=self.config.max_context_messages,
+    async def _prepare_turn(self, request: ChatRequest) -> tuple[ChatTurn, List[Dict[str, str]]]:
+        """Set up the turn and build the messages sent to the provider."""
+
+        # Reads, project/conversation setup and the user message: one transaction.
+        turn = await self.conversation_service.begin_turn(
+            project_name=request.project_name,
+            project_description=request.project_description,
+            conversation_id=request.conversation_id,
+            provider=request.provider,
+            model_name=request.model_name,
+            default_model=lambda: self._default_model_for(request.provider),
+            user_message=request.message,
+            context_limit=self.config.max_context_messages,
         )
 
         memory_matches = await self.memory_service.search_memories(
-            project_id=project.id,
+            project_id=turn.project_id,
             query=request.message,
             top_k=5,
         )
@@ -131,39 +202,26 @@ class HyperAIAgent:
         ]
         if memory_context:
             dispatch_messages.append({"role": "system", "content": memory_context})
-        dispatch_messages.extend(context_messages)
+        dispatch_messages.extend(turn.context)
         dispatch_messages.append({"role": "user", "content": request.message})
+        return turn, dispatch_messages
 
-        # Persist the user message before provider invocation
-        await self.conversation_service.add_message(
-            conversation_id=conversation.id,
-            role="user",
-            content=request.message,
-        )
-
-        provider = get_provider(request.provider, model_in_use)
-        used_key: Dict[str, Optional[int]] = {"id": None}
-
-        async def _invoke(api_key: str, key_id: int):
-            used_key["id"] = key_id
-            return await provider.generate(
-                api_key=api_key,
-                messages=dispatch_messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                tools=request.tools,
-            )
-
-        result = await self.provider_manager.rotate_until_success(request.provider, _invoke)
-
-        response_text = result.get("text", "")
-        usage = result.get("usage", {})
-        tool_calls_raw = result.get("tool_calls", []) or []
+    async def _finish_turn(
+        self,
+        request: ChatRequest,
+        turn: ChatTurn,
+        response_text: str,
+        usage: Dict[str, Any],
+        tool_calls_raw: List[Dict[str, Any]],
+        used_key_id: Optional[int],
+    ) -> ChatResponse:
+        """Store the reply and its usage, summarize if due, and build the response."""
+
+        model_in_use = turn.model_name
         tool_calls = [ToolCall(**call) for call in tool_calls_raw if call]
 
-        await self.conversation_service.add_message(
-            conversation_id=conversation.id,
-            role="assistant",
+        await self.conversation_service.add_reply(
+            turn,
             content=response_text,
             token_usage=usage.get("completion_tokens") or usage.get("output_tokens"),
         )
@@ -171,8 +229,9 @@ class HyperAIAgent:
         tokens_prompt = usage.get("prompt_tokens") or usage.get("input_tokens") or 0
         tokens_completion = usage.get("completion_tokens") or usage.get("output_tokens") or 0
 
+        # Queued on the write-behind queue, like the key bookkeeping of the call.
         await self.conversation_service.record_usage(
-            project_id=project.id,
+            project_id=turn.project_id,
             provider=request.provider,
             model_name=model_in_use,
             tokens_prompt=int(tokens_prompt),
@@ -181,21 +240,19 @@ class HyperAIAgent:
         )
 
         await self._maybe_generate_summary(
-            project=project,
-            conversation_id=conversation.id,
+            turn=turn,
             provider=request.provider,
-            model_name=model_in_use,
             tags=request.tags,
         )
 
         return ChatResponse(
-            conversation_id=conversation.id,
+            conversation_id=turn.conversation_id,
             provider=request.provider,
             model_name=model_in_use,
             response_text=response_text,
             tool_calls=tool_calls,
             usage=usage,
-            used_key_id=used_key.get("id"),
+            used_key_id=used_key_id,
         )
 
     def _default_model_for(self, provider: ProviderType) -> str:
@@ -215,36 +272,40 @@ class HyperAIAgent:
 
     async def _maybe_generate_summary(
         self,
-        project,
-        conversation_id: int,
+        turn: ChatTurn,
         provider: ProviderType,
-        model_name: str,
         tags: Optional[List[str]],
     ) -> None:
-        message_count = await self.conversation_service.count_messages(conversation_id)
+        # The maintained counter makes the trigger O(1); no count(*) per turn.
+        message_count = turn.message_count
+        conversation_id = turn.conversation_id
         if message_count < self.settings.summary_trigger_messages:
             return
         if message_count % self.settings.summary_trigger_messages != 0:
             return
 
-        context_messages = await self.conversation_service.list_conversation_context(
+        # Only the messages the previous summary has not covered yet.
+        messages = await self.conversation_service.get_messages_since(
             conversation_id=conversation_id,
+            after_id=turn.last_summarized_message_id,
             limit=self.settings.max_context_messages,
         )
+        if not messages:
+            return
         summary_text = await self.summarization_service.generate_summary(
             provider=provider,
-            model_name=model_name,
-            project_name=project.name,
-            messages=context_messages,
+            model_name=turn.model_name,
+            project_name=turn.project_name,
+            messages=[{"role": msg.role, "content": msg.content} for msg in messages],
         )
         if not summary_text:
             return
 
-        await self.conversation_service.save_summary(conversation_id, summary_text)
+        await self.conversation_service.save_summary(conversation_id, summary_text, last_message_id=messages[-1].id)
 
         summary_tags = list(tags or []) + ["summary", f"conversation:{conversation_id}"]
         await self.memory_service.add_memory(
-            project_id=project.id,
+            project_id=turn.project_id,
             content=summary_text,
             summary=summary_text,
             tags=summary_tags,
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import Field, SecretStr, validator
 from pydantic_settings import BaseSettings
@@ -107,6 +107,31 @@ class Settings(BaseSettings):
     database_path: Path = Field(default_factory=lambda: Path(".data") / "agent.db")
     plugins_dir: Path = Field(default_factory=lambda: Path(".data") / "plugins")
 
+    # SQLite connection profile, applied to every new connection. WAL lets
+    # readers run alongside a writer and, with synchronous=NORMAL, commits
+    # skip the per-transaction fsync (durability is kept across application
+    # crashes, the last commits may be lost on power failure).
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist", "memory"] = "wal"
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    sqlite_cache_size_kib: int = Field(65536, ge=0)
+    sqlite_mmap_size_mb: int = Field(256, ge=0)
+    sqlite_temp_store_memory: bool = True
+    sqlite_busy_timeout_ms: int = Field(5000, ge=0)
+    # Minutes between WAL checkpoints + PRAGMA optimize; 0 disables the job.
+    sqlite_maintenance_interval_minutes: float = Field(60.0, ge=0.0)
+
+    # Write-behind queue for usage records, tool logs and key bookkeeping:
+    # flushed in one transaction every write_behind_flush_ms or as soon as
+    # write_behind_max_batch rows wait. Disabled, those writes are synchronous.
+    write_behind_enabled: bool = True
+    write_behind_flush_ms: int = Field(200, gt=0)
+    write_behind_max_batch: int = Field(500, gt=0)
+    # Rows kept while the database rejects flushes; the oldest are dropped beyond it.
+    write_behind_max_queue: int = Field(100000, gt=0)
+    # Minutes between folding new usage records into the hourly/daily cost
+    # rollups (reports also catch up on read); 0 disables the job.
+    usage_rollup_interval_minutes: float = Field(5.0, ge=0.0)
+
     # Encryption secret for BYOK storage (base64 urlsafe string for Fernet)
     # In production or self-hosted deployments, override via KEYSTORE_SECRET env var.
     # The default value is only intended for local development and packaged desktop builds.
@@ -132,6 +157,69 @@ class Settings(BaseSettings):
     # Conversation tuning
     max_context_messages: int = 20
     summary_trigger_messages: int = 12
+    # Per-process cache of projects by name and conversations by id used by
+    # chat turns; changes made by other workers show up after the TTL.
+    identity_cache_size: int = Field(1024, ge=0)
+    identity_cache_ttl_seconds: float = Field(30.0, gt=0.0)
+
+    # Memory retrieval: projects with at least this many vectors switch from
+    # exact search to an IVF approximate index. nlist=0 picks ~4*sqrt(N) lists;
+    # raising nprobe trades latency for recall.
+    memory_ann_min_vectors: int = Field(50000, ge=1)
+    memory_ann_nlist: int = Field(0, ge=0)
+    memory_ann_nprobe: int = Field(16, ge=1)
+    memory_ann_rebuild_ratio: float = Field(0.2, gt=0.0)
+    # "mmap" keeps each project's vectors in an append-only file under
+    # data_dir/vectors that is memory-mapped for search, instead of the heap;
+    # "stream" keeps no index and scans the database in chunks per search.
+    memory_vector_store: Literal["memory", "mmap", "stream"] = "mmap"
+    memory_scan_chunk_size: int = Field(2048, ge=1)
+    # How often a loaded index checks whether other workers added or removed
+    # memories of its project (a count/max(id) probe); 0 never checks.
+    memory_index_probe_seconds: float = Field(2.0, ge=0.0)
+    # Fuse BM25 keyword hits with vector hits (reciprocal-rank fusion).
+    memory_hybrid_search: bool = True
+    # Bounded LRU/TTL caches for search results and query embeddings; results
+    # are keyed on the project's index generation, so writes invalidate them.
+    memory_cache_size: int = Field(1024, ge=0)
+    memory_cache_ttl_seconds: float = Field(300.0, gt=0.0)
+    # Near-duplicate memories (SimHash within memory_dedup_max_distance bits)
+    # are skipped, or merged into the existing memory by adding their tags.
+    # Opt-in: short facts that differ in one word (a name, a number) can land
+    # within a few bits of each other, and both modes drop the new text.
+    memory_dedup: Literal["off", "skip", "merge"] = "off"
+    memory_dedup_max_distance: int = Field(3, ge=0, le=15)
+    # Document chunks embedded and inserted per transaction during ingestion.
+    ingest_batch_size: int = Field(64, ge=1)
+    # Chunk budget in estimated tokens; overlap is only added where a chunk
+    # has to be cut inside a paragraph.
+    memory_chunk_tokens: int = Field(256, ge=16)
+    memory_chunk_overlap_tokens: int = Field(32, ge=0)
+    # Retention defaults, overridable per project (MemoryRetentionPolicy); 0
+    # disables a rule. Scores decay by half every memory_decay_half_life_days;
+    # memories past the age or count limit are moved to the archive table, and
+    # conversation summaries older than memory_rollup_after_days are folded,
+    # memory_rollup_group_size at a time, into higher-level summaries.
+    memory_retention_max_count: int = Field(0, ge=0)
+    memory_retention_archive_after_days: float = Field(0.0, ge=0.0)
+    memory_decay_half_life_days: float = Field(0.0, ge=0.0)
+    memory_rollup_after_days: float = Field(0.0, ge=0.0)
+    memory_rollup_group_size: int = Field(20, ge=2)
+    # Hours between scheduled compaction runs; 0 disables the job.
+    memory_compaction_interval_hours: float = Field(24.0, ge=0.0)
+    # Storage format for new embedding blobs; int8 is ~4x smaller than float32.
+    embedding_quantization: Literal["float32", "int8"] = "float32"
+    # "fast" hashes tokens with CRC32 instead of MD5/SHA1; stored vectors must
+    # be re-embedded after switching.
+    embedding_hash_scheme: Literal["legacy", "fast"] = "legacy"
+    # Embedding backend: the built-in hashing embedder, or a local CPU
+    # sentence-transformer (optional dependency) whose concurrent calls are
+    # coalesced into batches of up to embedding_batch_size texts.
+    embedding_backend: Literal["hashing", "sentence_transformers"] = "hashing"
+    embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_onnx: bool = True
+    embedding_batch_size: int = Field(32, ge=1)
+    embedding_batch_wait_ms: float = Field(5.0, ge=0.0)
 
     # Unsafe execution (advanced / self-hosted only)
     enable_unsafe_exec: bool = False
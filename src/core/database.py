@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import AsyncIterator, List
 
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
-from .config import get_settings
+from .config import Settings, get_settings
 
 
 class Base(DeclarativeBase):
@@ -17,12 +18,41 @@ _engine: AsyncEngine | None = None
 _SessionFactory: async_sessionmaker[AsyncSession] | None = None
 
 
+def sqlite_pragmas(settings: Settings) -> List[str]:
+    """PRAGMA statements of the configured connection profile."""
+
+    pragmas = [
+        f"PRAGMA journal_mode = {settings.sqlite_journal_mode.upper()}",
+        f"PRAGMA synchronous = {settings.sqlite_synchronous.upper()}",
+        f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size_mb) * 1024 * 1024}",
+    ]
+    if settings.sqlite_cache_size_kib:
+        # Negative values are KiB rather than pages.
+        pragmas.append(f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kib)}")
+    if settings.sqlite_temp_store_memory:
+        pragmas.append("PRAGMA temp_store = MEMORY")
+    return pragmas
+
+
+def _apply_pragmas(engine: AsyncEngine, pragmas: List[str]) -> None:
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:  # pragma: no cover - driver callback
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
 def get_engine() -> AsyncEngine:
     global _engine
     if _engine is None:
         settings = get_settings()
         database_url = f"sqlite+aiosqlite:///{settings.database_path}"
         _engine = create_async_engine(database_url, echo=False, future=True)
+        _apply_pragmas(_engine, sqlite_pragmas(settings))
     return _engine
 
 
@@ -44,3 +74,33 @@ async def session_scope() -> AsyncIterator[AsyncSession]:
         raise
     finally:
         await session.close()
+
+
+async def get_data_version() -> int:
+    """Return the data format version stored in SQLite's ``user_version``."""
+
+    async with get_engine().connect() as conn:
+        result = await conn.execute(text("PRAGMA user_version"))
+        return int(result.scalar_one())
+
+
+async def set_data_version(version: int) -> None:
+    async with get_engine().begin() as conn:
+        await conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+
+
+async def run_maintenance() -> dict:
+    """Checkpoint the WAL back into the database file and refresh planner statistics.
+
+    ``TRUNCATE`` also shrinks the WAL file; a checkpoint blocked by active
+    readers reports ``busy`` and is retried on the next run.
+    """
+
+    async with get_engine().connect() as conn:
+        result = {}
+        if get_settings().sqlite_journal_mode == "wal":
+            busy, log_frames, checkpointed = (await conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))).one()
+            result = {"busy": bool(busy), "log_frames": log_frames, "checkpointed": checkpointed}
+        await conn.execute(text("PRAGMA optimize"))
+        await conn.commit()
+        return result
@@ -4,19 +4,24 @@ import asyncio
 
 from sqlalchemy import text
 
+from . import models  # noqa: F401  - register tables on Base.metadata
 from .database import Base, get_engine
+from .migrations import upgrade
 
 
 async def init_db() -> None:
+    """Create or upgrade the schema by running the Alembic migrations to head."""
+
     engine = get_engine()
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade)
 
 
 async def drop_db() -> None:
     engine = get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
+        await conn.execute(text("DROP TABLE IF EXISTS alembic_version"))
 
 
 if __name__ == "__main__":
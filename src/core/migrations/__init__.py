@@ -0,0 +1,30 @@
+"""Alembic migrations of the SQLite schema.
+
+The application upgrades on the connection ``init_db`` opens, so it needs no
+``alembic.ini``; the one at the repository root points the Alembic CLI here
+for writing new revisions (``alembic revision --autogenerate -m "..."``).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.engine import Connection
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent
+
+
+def alembic_config(connection: Connection | None = None) -> Config:
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def upgrade(connection: Connection, revision: str = "head") -> None:
+    """Bring the schema on ``connection`` up to ``revision``."""
+
+    command.upgrade(alembic_config(connection), revision)
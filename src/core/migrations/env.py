@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy.engine import Connection
+
+from src.core import models  # noqa: F401  - register tables on Base.metadata
+from src.core.config import get_settings
+from src.core.database import Base, get_engine
+
+target_metadata = Base.metadata
+
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name, disable_existing_loggers=False)
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # The FTS5 virtual table and its shadow tables are managed by raw DDL.
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        # SQLite cannot alter columns in place; batch mode copies the table.
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_async_migrations() -> None:
+    async with get_engine().begin() as connection:
+        await connection.run_sync(do_run_migrations)
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=f"sqlite:///{get_settings().database_path}",
+        target_metadata=target_metadata,
+        include_name=include_name,
+        render_as_batch=True,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif context.config.attributes.get("connection") is not None:
+    do_run_migrations(context.config.attributes["connection"])
+else:
+    asyncio.run(run_async_migrations())
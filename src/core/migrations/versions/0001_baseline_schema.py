@@ -0,0 +1,348 @@
+"""baseline schema
+
+Every table of the application as of this revision, including the
+memory embedding bookkeeping columns (``embedding_model``,
+``embedding_dim``, ``fingerprint``), the ``memory_archive`` and
+``memory_retention_policies`` tables, and the ``memories_fts`` FTS5 index
+with its sync triggers (backfilled when first created). Databases created
+earlier by ``Base.metadata.create_all`` keep their tables and data: missing
+tables are created and missing nullable columns are added.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16 23:05:02.217264
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Full-text index over memory content, kept in sync with ``memories`` by
+# triggers so every write path (ORM, bulk inserts, raw SQL) maintains it.
+MEMORY_FTS_TABLE = "memories_fts"
+MEMORY_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MEMORY_FTS_TABLE} USING fts5(
+        content, summary,
+        content='memories', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ai AFTER INSERT ON memories BEGIN
+        INSERT INTO {MEMORY_FTS_TABLE}(rowid, content, summary)
+        VALUES (new.id, new.content, new.summary);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_fts_ad AFTER DELETE ON memories BEGIN
+        INSERT INTO {MEMORY_FTS_TABLE}({MEMORY_FTS_TABLE}, rowid, content, summary)
+        VALUES ('delete', old.id, old.content, old.summary);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS memories_fts_au AFTER UPDATE OF content, summary ON memories BEGIN
+        INSERT INTO {MEMORY_FTS_TABLE}({MEMORY_FTS_TABLE}, rowid, content, summary)
+        VALUES ('delete', old.id, old.content, old.summary);
+        INSERT INTO {MEMORY_FTS_TABLE}(rowid, content, summary)
+        VALUES (new.id, new.content, new.summary);
+    END
+    """,
+]
+
+
+def _create_table(name: str, *items: sa.schema.SchemaItem) -> None:
+    """Create ``name``, or add its missing nullable columns if it already exists."""
+
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(name):
+        op.create_table(name, *items)
+        return
+    existing = {column["name"] for column in inspector.get_columns(name)}
+    for item in items:
+        if isinstance(item, sa.Column) and item.nullable and item.name not in existing:
+            op.add_column(name, sa.Column(item.name, item.type, nullable=True))
+
+
+def _create_memory_fts() -> None:
+    """Create the memory FTS5 index and backfill it on first creation."""
+
+    bind = op.get_bind()
+    existed = sa.inspect(bind).has_table(MEMORY_FTS_TABLE)
+    try:
+        for statement in MEMORY_FTS_DDL:
+            bind.execute(sa.text(statement))
+    except OperationalError as exc:  # pragma: no cover - SQLite built without FTS5
+        logger.warning("Full-text memory search unavailable: %s", exc)
+        return
+    if not existed:
+        bind.execute(sa.text(f"INSERT INTO {MEMORY_FTS_TABLE}({MEMORY_FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def upgrade() -> None:
+    _create_table('projects',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    _create_table('provider_keys',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('provider', sa.Enum('OPENAI', 'ANTHROPIC', 'GEMINI', 'OLLAMA', 'GROK', 'OPENROUTER', 'NVIDIA_NIM', name='providertype'), nullable=False),
+    sa.Column('label', sa.String(length=120), nullable=False),
+    sa.Column('encrypted_key', sa.LargeBinary(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('failure_count', sa.Integer(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('provider', 'label', name='uq_provider_label')
+    )
+    _create_table('tags',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('label', sa.String(length=80), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('label')
+    )
+    _create_table('tool_definitions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('type', sa.Enum('FILE_SYSTEM', 'WEB_SCRAPER', 'CALENDAR', 'EMAIL', 'CODE_EXECUTION', 'DATABASE', 'CUSTOM', name='tooltype'), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('config', sa.JSON(), nullable=True),
+    sa.Column('is_builtin', sa.Boolean(), nullable=False),
+    sa.Column('script_source', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', name='uq_tool_name')
+    )
+    _create_table('calendar_events',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('conversations',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=True),
+    sa.Column('provider', sa.Enum('OPENAI', 'ANTHROPIC', 'GEMINI', 'OLLAMA', 'GROK', 'OPENROUTER', 'NVIDIA_NIM', name='providertype'), nullable=False),
+    sa.Column('model_name', sa.String(length=120), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('email_logs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('to_address', sa.String(length=320), nullable=False),
+    sa.Column('subject', sa.String(length=200), nullable=False),
+    sa.Column('body', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('memories',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('embedding', sa.LargeBinary(), nullable=True),
+    sa.Column('embedding_model', sa.String(length=120), nullable=True),
+    sa.Column('embedding_dim', sa.Integer(), nullable=True),
+    sa.Column('fingerprint', sa.BigInteger(), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('memory_archive',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('memory_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('embedding', sa.LargeBinary(), nullable=True),
+    sa.Column('embedding_model', sa.String(length=120), nullable=True),
+    sa.Column('embedding_dim', sa.Integer(), nullable=True),
+    sa.Column('fingerprint', sa.BigInteger(), nullable=True),
+    sa.Column('metadata_json', sa.Text(), nullable=True),
+    sa.Column('tags', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.Column('reason', sa.String(length=16), nullable=False),
+    sa.Column('rolled_up_into', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('memory_retention_policies',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('max_memories', sa.Integer(), nullable=True),
+    sa.Column('archive_after_days', sa.Float(), nullable=True),
+    sa.Column('decay_half_life_days', sa.Float(), nullable=True),
+    sa.Column('rollup_after_days', sa.Float(), nullable=True),
+    sa.Column('rollup_group_size', sa.Integer(), nullable=True),
+    sa.Column('rollup_provider', sa.Enum('OPENAI', 'ANTHROPIC', 'GEMINI', 'OLLAMA', 'GROK', 'OPENROUTER', 'NVIDIA_NIM', name='providertype'), nullable=True),
+    sa.Column('rollup_model', sa.String(length=120), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', name='uq_retention_project')
+    )
+    _create_table('prompt_templates',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('variables', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'name', name='uq_project_template')
+    )
+    _create_table('tool_execution_logs',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('tool_name', sa.String(length=120), nullable=False),
+    sa.Column('arguments_json', sa.Text(), nullable=True),
+    sa.Column('output_json', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=32), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('usage_records',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('provider', sa.Enum('OPENAI', 'ANTHROPIC', 'GEMINI', 'OLLAMA', 'GROK', 'OPENROUTER', 'NVIDIA_NIM', name='providertype'), nullable=False),
+    sa.Column('model_name', sa.String(length=120), nullable=False),
+    sa.Column('tokens_prompt', sa.Integer(), nullable=False),
+    sa.Column('tokens_completion', sa.Integer(), nullable=False),
+    sa.Column('total_cost', sa.Float(), nullable=True),
+    sa.Column('metadata', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('workflow_definitions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('graph', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('automation_rules',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('trigger_type', sa.Enum('CRON', 'FILE_WATCH', 'WEBHOOK', name='automationtriggertype'), nullable=False),
+    sa.Column('trigger_config', sa.JSON(), nullable=False),
+    sa.Column('action_type', sa.Enum('TOOL', 'WORKFLOW', name='automationactiontype'), nullable=False),
+    sa.Column('action_config', sa.JSON(), nullable=False),
+    sa.Column('workflow_id', sa.Integer(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.ForeignKeyConstraint(['workflow_id'], ['workflow_definitions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('conversation_exports',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('format', sa.String(length=32), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('conversation_messages',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('role', sa.String(length=16), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('token_usage', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    _create_table('conversation_tags',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversations.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('conversation_id', 'tag_id', name='uq_conversation_tag')
+    )
+    _create_table('memory_tags',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('memory_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['memory_id'], ['memories.id'], ),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('memory_id', 'tag_id', name='uq_memory_tag')
+    )
+    _create_memory_fts()
+
+
+def downgrade() -> None:
+    for statement in (
+        "DROP TRIGGER IF EXISTS memories_fts_au",
+        "DROP TRIGGER IF EXISTS memories_fts_ad",
+        "DROP TRIGGER IF EXISTS memories_fts_ai",
+        f"DROP TABLE IF EXISTS {MEMORY_FTS_TABLE}",
+    ):
+        op.execute(statement)
+    op.drop_table('memory_tags')
+    op.drop_table('conversation_tags')
+    op.drop_table('conversation_messages')
+    op.drop_table('conversation_exports')
+    op.drop_table('automation_rules')
+    op.drop_table('workflow_definitions')
+    op.drop_table('usage_records')
+    op.drop_table('tool_execution_logs')
+    op.drop_table('prompt_templates')
+    op.drop_table('memory_retention_policies')
+    op.drop_table('memory_archive')
+    op.drop_table('memories')
+    op.drop_table('email_logs')
+    op.drop_table('conversations')
+    op.drop_table('calendar_events')
+    op.drop_table('tool_definitions')
+    op.drop_table('tags')
+    op.drop_table('provider_keys')
+    op.drop_table('projects')
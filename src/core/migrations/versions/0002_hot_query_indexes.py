@@ -0,0 +1,43 @@
+"""hot query indexes
+
+Composite indexes for the per-parent listings that otherwise scan the whole
+table: recent messages of a conversation, memories of a project by age, tool
+logs and usage of a project, the active keys of a provider, and calendar
+events of a project by start time.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 23:05:41.081601
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_conversation_messages_conversation_created', 'conversation_messages', ['conversation_id', 'created_at']),
+    ('ix_memories_project_created', 'memories', ['project_id', 'created_at']),
+    ('ix_tool_execution_logs_project_created', 'tool_execution_logs', ['project_id', 'created_at']),
+    ('ix_usage_records_project_created', 'usage_records', ['project_id', 'created_at']),
+    ('ix_provider_keys_provider_active', 'provider_keys', ['provider', 'is_active']),
+    ('ix_calendar_events_project_start', 'calendar_events', ['project_id', 'start_time']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    # Give the planner statistics for the new indexes right away.
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
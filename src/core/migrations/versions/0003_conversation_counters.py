@@ -0,0 +1,57 @@
+"""conversation counters
+
+Denormalized ``message_count``, ``last_message_at`` and
+``last_summarized_message_id`` on conversations, backfilled from the
+messages, plus an index for listing a project's conversations by activity.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 23:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('conversations', sa.Column('message_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('conversations', sa.Column('last_message_at', sa.DateTime(), nullable=True))
+    op.add_column('conversations', sa.Column('last_summarized_message_id', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE conversations SET
+            message_count = (
+                SELECT count(*) FROM conversation_messages m WHERE m.conversation_id = conversations.id
+            ),
+            last_message_at = (
+                SELECT max(m.created_at) FROM conversation_messages m WHERE m.conversation_id = conversations.id
+            )
+        """
+    )
+    # Existing summaries covered the conversation up to its last message.
+    op.execute(
+        """
+        UPDATE conversations SET last_summarized_message_id = (
+            SELECT max(m.id) FROM conversation_messages m WHERE m.conversation_id = conversations.id
+        )
+        WHERE summary IS NOT NULL
+        """
+    )
+    op.create_index('ix_conversations_project_last_message', 'conversations', ['project_id', 'last_message_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_conversations_project_last_message', table_name='conversations')
+    with op.batch_alter_table('conversations') as batch_op:
+        batch_op.drop_column('last_summarized_message_id')
+        batch_op.drop_column('last_message_at')
+        batch_op.drop_column('message_count')
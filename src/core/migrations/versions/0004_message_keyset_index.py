@@ -0,0 +1,39 @@
+"""message keyset index
+
+Index on ``conversation_messages(conversation_id, id)`` backing keyset
+pagination of a conversation's history in both directions. It replaces the
+``(conversation_id, created_at)`` index from 0002: history is now ordered
+by id, so nothing reads the old one and it only slowed inserts.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 23:52:37.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_conversation_messages_conversation_id', 'conversation_messages', ['conversation_id', 'id']
+    )
+    op.drop_index('ix_conversation_messages_conversation_created', table_name='conversation_messages', if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index(
+        'ix_conversation_messages_conversation_created',
+        'conversation_messages',
+        ['conversation_id', 'created_at'],
+        if_not_exists=True,
+    )
+    op.drop_index('ix_conversation_messages_conversation_id', table_name='conversation_messages')
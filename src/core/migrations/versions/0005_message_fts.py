@@ -0,0 +1,74 @@
+"""message full-text index
+
+FTS5 index over conversation message content, kept in sync with
+``conversation_messages`` by triggers and backfilled on creation.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:04:51.226710
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MESSAGE_FTS_TABLE = "conversation_messages_fts"
+MESSAGE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {MESSAGE_FTS_TABLE} USING fts5(
+        content,
+        content='conversation_messages', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS conversation_messages_fts_ai AFTER INSERT ON conversation_messages BEGIN
+        INSERT INTO {MESSAGE_FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS conversation_messages_fts_ad AFTER DELETE ON conversation_messages BEGIN
+        INSERT INTO {MESSAGE_FTS_TABLE}({MESSAGE_FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS conversation_messages_fts_au AFTER UPDATE OF content ON conversation_messages BEGIN
+        INSERT INTO {MESSAGE_FTS_TABLE}({MESSAGE_FTS_TABLE}, rowid, content) VALUES ('delete', old.id, old.content);
+        INSERT INTO {MESSAGE_FTS_TABLE}(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    existed = sa.inspect(bind).has_table(MESSAGE_FTS_TABLE)
+    try:
+        for statement in MESSAGE_FTS_DDL:
+            bind.execute(sa.text(statement))
+    except OperationalError as exc:  # pragma: no cover - SQLite built without FTS5
+        logger.warning("Full-text message search unavailable: %s", exc)
+        return
+    if not existed:
+        bind.execute(sa.text(f"INSERT INTO {MESSAGE_FTS_TABLE}({MESSAGE_FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def downgrade() -> None:
+    for statement in (
+        "DROP TRIGGER IF EXISTS conversation_messages_fts_au",
+        "DROP TRIGGER IF EXISTS conversation_messages_fts_ad",
+        "DROP TRIGGER IF EXISTS conversation_messages_fts_ai",
+        f"DROP TABLE IF EXISTS {MESSAGE_FTS_TABLE}",
+    ):
+        op.execute(statement)
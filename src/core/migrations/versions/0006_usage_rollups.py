@@ -0,0 +1,85 @@
+"""usage pricing and rollups
+
+Model pricing, hourly/daily usage rollups per (project, provider, model) and
+the watermark of usage records folded into them. Existing usage records are
+rolled up here, so reports cover them from the start.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:21:36.487120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PROVIDER = sa.Enum('OPENAI', 'ANTHROPIC', 'GEMINI', 'OLLAMA', 'GROK', 'OPENROUTER', 'NVIDIA_NIM', name='providertype')
+# Bucket starts in the format SQLAlchemy stores DateTime values in.
+BUCKETS = {'hour': '%Y-%m-%d %H:00:00.000000', 'day': '%Y-%m-%d 00:00:00.000000'}
+
+
+def upgrade() -> None:
+    op.create_table('model_pricing',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('provider', PROVIDER, nullable=False),
+    sa.Column('model_name', sa.String(length=120), nullable=False),
+    sa.Column('prompt_per_million', sa.Float(), nullable=False),
+    sa.Column('completion_per_million', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('provider', 'model_name', name='uq_model_pricing')
+    )
+    op.create_table('usage_rollups',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=8), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('provider', PROVIDER, nullable=False),
+    sa.Column('model_name', sa.String(length=120), nullable=False),
+    sa.Column('calls', sa.Integer(), nullable=False),
+    sa.Column('tokens_prompt', sa.Integer(), nullable=False),
+    sa.Column('tokens_completion', sa.Integer(), nullable=False),
+    sa.Column('total_cost', sa.Float(), nullable=False),
+    sa.Column('unpriced_calls', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('project_id', 'granularity', 'bucket_start', 'provider', 'model_name', name='uq_usage_rollup')
+    )
+    op.create_table('usage_rollup_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('last_usage_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    for granularity, bucket in BUCKETS.items():
+        op.execute(
+            f"""
+            INSERT INTO usage_rollups (
+                project_id, granularity, bucket_start, provider, model_name,
+                calls, tokens_prompt, tokens_completion, total_cost, unpriced_calls
+            )
+            SELECT project_id, '{granularity}', strftime('{bucket}', created_at), provider, model_name,
+                   count(*), coalesce(sum(tokens_prompt), 0), coalesce(sum(tokens_completion), 0),
+                   total(total_cost), count(*) - count(total_cost)
+            FROM usage_records
+            GROUP BY project_id, strftime('{bucket}', created_at), provider, model_name
+            """
+        )
+    op.execute(
+        "INSERT INTO usage_rollup_state (id, last_usage_id, updated_at) "
+        "SELECT 1, coalesce(max(id), 0), CURRENT_TIMESTAMP FROM usage_records"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('usage_rollup_state')
+    op.drop_table('usage_rollups')
+    op.drop_table('model_pricing')
@@ -0,0 +1,77 @@
+"""trigram full-text tokenizer
+
+Rebuild the memory and message FTS5 indexes with the ``trigram``
+tokenizer. ``unicode61`` splits on whitespace and punctuation only, so a
+run of Chinese or Japanese text became one token and searches for a word
+inside it found nothing; trigram indexes every three-character substring
+and needs no word segmentation. Diacritics are folded where SQLite
+supports it for trigram (3.45+); builds older than 3.34 lack the
+tokenizer and keep ``unicode61``. The sync triggers refer to the tables by
+name and are left in place.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:39:12.804113
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAMS = ["trigram remove_diacritics 1", "trigram"]
+UNICODE61 = "unicode61 remove_diacritics 2"
+# FTS table -> (content table, indexed columns)
+FTS_TABLES = {
+    'memories_fts': ('memories', 'content, summary'),
+    'conversation_messages_fts': ('conversation_messages', 'content'),
+}
+
+
+def _rebuild(name: str, tokenizers: Sequence[str]) -> None:
+    """Recreate FTS table ``name`` with the first tokenizer SQLite accepts and reindex it."""
+
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table(name):
+        # SQLite built without FTS5; the earlier migrations skipped the table.
+        return
+    content_table, columns = FTS_TABLES[name]
+    bind.execute(sa.text(f"DROP TABLE {name}"))
+    for tokenizer in tokenizers:
+        try:
+            bind.execute(
+                sa.text(
+                    f"""
+                    CREATE VIRTUAL TABLE {name} USING fts5(
+                        {columns},
+                        content='{content_table}', content_rowid='id',
+                        tokenize='{tokenizer}'
+                    )
+                    """
+                )
+            )
+        except OperationalError as exc:
+            logger.warning("FTS5 tokenizer %r unavailable for %s: %s", tokenizer, name, exc.orig)
+            continue
+        bind.execute(sa.text(f"INSERT INTO {name}({name}) VALUES ('rebuild')"))
+        return
+
+
+def upgrade() -> None:
+    for name in FTS_TABLES:
+        _rebuild(name, [*TRIGRAMS, UNICODE61])
+
+
+def downgrade() -> None:
+    for name in FTS_TABLES:
+        _rebuild(name, [UNICODE61])
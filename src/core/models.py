@@ -5,10 +5,12 @@ from datetime import datetime
 from typing import Optional
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     LargeBinary,
     String,
@@ -77,6 +79,7 @@ class ProviderKey(Base):
     __tablename__ = "provider_keys"
     __table_args__ = (
         UniqueConstraint("provider", "label", name="uq_provider_label"),
+        Index("ix_provider_keys_provider_active", "provider", "is_active"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -91,6 +94,9 @@ class ProviderKey(Base):
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_project_last_message", "project_id", "last_message_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
@@ -98,6 +104,10 @@ class Conversation(Base):
     provider: Mapped[ProviderType] = mapped_column(Enum(ProviderType), nullable=False)
     model_name: Mapped[str] = mapped_column(String(120), nullable=False)
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # Maintained by ConversationService in the transaction of every message insert.
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_summarized_message_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -109,6 +119,9 @@ class Conversation(Base):
 
 class ConversationMessage(Base):
     __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_id", "conversation_id", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     conversation_id: Mapped[int] = mapped_column(ForeignKey("conversations.id"), nullable=False)
@@ -132,12 +145,19 @@ class Tag(Base):
 
 class MemoryRecord(Base):
     __tablename__ = "memories"
+    __table_args__ = (
+        Index("ix_memories_project_created", "project_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
     summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     embedding: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    embedding_model: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
+    embedding_dim: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Signed 64-bit SimHash of the content; 0 for content without words.
+    fingerprint: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
     metadata_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
@@ -159,6 +179,51 @@ class MemoryTag(Base):
     tag: Mapped[Tag] = relationship("Tag", back_populates="memories")
 
 
+class MemoryRetentionPolicy(Base):
+    """Per-project overrides of the ``memory_retention_*`` settings; NULL uses the setting."""
+
+    __tablename__ = "memory_retention_policies"
+    __table_args__ = (
+        UniqueConstraint("project_id", name="uq_retention_project"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    max_memories: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    archive_after_days: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    decay_half_life_days: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rollup_after_days: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rollup_group_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    rollup_provider: Mapped[Optional[ProviderType]] = mapped_column(Enum(ProviderType), nullable=True)
+    rollup_model: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ArchivedMemory(Base):
+    """A memory moved out of ``memories`` (and so out of every search index)."""
+
+    __tablename__ = "memory_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # The id the memory had in ``memories`` (SQLite may reuse it later).
+    memory_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    summary: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    embedding: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    embedding_model: Mapped[Optional[str]] = mapped_column(String(120), nullable=True)
+    embedding_dim: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    fingerprint: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    metadata_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    tags: Mapped[Optional[list]] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # age | count | rollup
+    reason: Mapped[str] = mapped_column(String(16), nullable=False)
+    # The summary memory this one was rolled up into, for reason "rollup".
+    rolled_up_into: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
 class ConversationTag(Base):
     __tablename__ = "conversation_tags"
     __table_args__ = (
@@ -254,6 +319,9 @@ class PromptTemplate(Base):
 
 class UsageRecord(Base):
     __tablename__ = "usage_records"
+    __table_args__ = (
+        Index("ix_usage_records_project_created", "project_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
@@ -268,8 +336,61 @@ class UsageRecord(Base):
     project: Mapped[Project] = relationship("Project", back_populates="usage_records")
 
 
+class ModelPricing(Base):
+    """Price per million tokens of a model; ``model_name`` "*" prices the whole provider."""
+
+    __tablename__ = "model_pricing"
+    __table_args__ = (
+        UniqueConstraint("provider", "model_name", name="uq_model_pricing"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    provider: Mapped[ProviderType] = mapped_column(Enum(ProviderType), nullable=False)
+    model_name: Mapped[str] = mapped_column(String(120), nullable=False)
+    prompt_per_million: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    completion_per_million: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class UsageRollup(Base):
+    """Usage of one (project, provider, model) in an hour or day bucket (UTC)."""
+
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "project_id", "granularity", "bucket_start", "provider", "model_name", name="uq_usage_rollup"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
+    granularity: Mapped[str] = mapped_column(String(8), nullable=False)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    provider: Mapped[ProviderType] = mapped_column(Enum(ProviderType), nullable=False)
+    model_name: Mapped[str] = mapped_column(String(120), nullable=False)
+    calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tokens_prompt: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    tokens_completion: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_cost: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    # Calls without a price; their cost is missing from total_cost.
+    unpriced_calls: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class UsageRollupState(Base):
+    """Single row holding the last usage record id folded into the rollups."""
+
+    __tablename__ = "usage_rollup_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    last_usage_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
 class CalendarEvent(Base):
     __tablename__ = "calendar_events"
+    __table_args__ = (
+        Index("ix_calendar_events_project_start", "project_id", "start_time"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
@@ -300,6 +421,9 @@ class EmailLog(Base):
 
 class ToolExecutionLog(Base):
     __tablename__ = "tool_execution_logs"
+    __table_args__ = (
+        Index("ix_tool_execution_logs_project_created", "project_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(ForeignKey("projects.id"), nullable=False)
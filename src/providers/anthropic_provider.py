@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
@@ -34,6 +34,14 @@ class AnthropicProvider(ChatProvider):
                 converted.append(HumanMessage(content=content))
         return converted
 
+    def _chat_model(self, api_key: str, temperature: float, max_tokens: int) -> ChatAnthropic:
+        return ChatAnthropic(
+            model=self.model_name or self.default_model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            anthropic_api_key=api_key,
+        )
+
     async def generate(
         self,
         api_key: str,
@@ -42,12 +50,7 @@ class AnthropicProvider(ChatProvider):
         max_tokens: int,
         tools: Optional[list[dict]] = None,
     ) -> Dict[str, Any]:
-        chat = ChatAnthropic(
-            model=self.model_name or self.default_model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            anthropic_api_key=api_key,
-        )
+        chat = self._chat_model(api_key, temperature, max_tokens)
         lc_messages = self._convert_messages(messages)
         result = await chat.ainvoke(lc_messages, run_name="hyper-ai-agent")
         usage = result.response_metadata.get("token_usage", {})
@@ -58,6 +61,18 @@ class AnthropicProvider(ChatProvider):
             "tool_calls": [self.format_tool_call(call) for call in tool_calls],
         }
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+        async for event in self._stream_chat(chat, self._convert_messages(messages)):
+            yield event
+
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:
         if not tool_call:
             return {}
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from ..core.models import ProviderType
 
@@ -25,6 +25,56 @@ class ChatProvider(ABC):
     ) -> Dict[str, Any]:
         """Return structured response with text, usage, tool_calls."""
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield ``{"text": delta}`` events as the reply is generated.
+
+        The last event also carries ``usage`` and ``tool_calls``. Providers
+        without streaming support answer with the whole reply in one event.
+        """
+
+        result = await self.generate(
+            api_key=api_key,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            tools=tools,
+        )
+        yield {
+            "text": result.get("text", ""),
+            "usage": result.get("usage", {}),
+            "tool_calls": result.get("tool_calls", []),
+        }
+
+    async def _stream_chat(self, chat: Any, lc_messages: list) -> AsyncIterator[Dict[str, Any]]:
+        """Relay a LangChain chat model's ``astream`` as :meth:`stream` events."""
+
+        reply = None
+        async for chunk in chat.astream(lc_messages, run_name="hyper-ai-agent"):
+            reply = chunk if reply is None else reply + chunk
+            text = _chunk_text(chunk.content)
+            if text:
+                yield {"text": text}
+        usage = (getattr(reply, "usage_metadata", None) or {}) if reply is not None else {}
+        tool_calls = reply.additional_kwargs.get("tool_calls", []) if reply is not None else []
+        yield {
+            "text": "",
+            "usage": {
+                "prompt_tokens": usage.get("input_tokens"),
+                "completion_tokens": usage.get("output_tokens"),
+                "total_tokens": usage.get("total_tokens"),
+            }
+            if usage
+            else {},
+            "tool_calls": [self.format_tool_call(call) for call in tool_calls],
+        }
+
     @property
     @abstractmethod
     def default_model(self) -> str:
@@ -33,3 +83,15 @@ class ChatProvider(ABC):
     @abstractmethod
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:
         """Normalize provider-specific tool invocation format."""
+
+
+def _chunk_text(content: Any) -> str:
+    """Text of a message chunk; some providers stream lists of content blocks."""
+
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in content or []
+        if not isinstance(block, dict) or block.get("type", "text") == "text"
+    )
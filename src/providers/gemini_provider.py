@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -33,6 +33,14 @@ class GeminiProvider(ChatProvider):
                 converted.append(HumanMessage(content=content))
         return converted
 
+    def _chat_model(self, api_key: str, temperature: float, max_tokens: int) -> ChatGoogleGenerativeAI:
+        return ChatGoogleGenerativeAI(
+            model=self.model_name or self.default_model,
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            google_api_key=api_key,
+        )
+
     async def generate(
         self,
         api_key: str,
@@ -41,12 +49,7 @@ class GeminiProvider(ChatProvider):
         max_tokens: int,
         tools: Optional[list[dict]] = None,
     ) -> Dict[str, Any]:
-        chat = ChatGoogleGenerativeAI(
-            model=self.model_name or self.default_model,
-            temperature=temperature,
-            max_output_tokens=max_tokens,
-            google_api_key=api_key,
-        )
+        chat = self._chat_model(api_key, temperature, max_tokens)
         result = await chat.ainvoke(self._convert_messages(messages), run_name="hyper-ai-agent")
         usage = result.response_metadata.get("usage_metadata", {})
         tool_calls = result.additional_kwargs.get("tool_calls", [])
@@ -60,6 +63,18 @@ class GeminiProvider(ChatProvider):
             "tool_calls": [self.format_tool_call(call) for call in tool_calls],
         }
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+        async for event in self._stream_chat(chat, self._convert_messages(messages)):
+            yield event
+
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:  # pragma: no cover - traversal only
         if not tool_call:
             return {}
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
@@ -35,6 +35,16 @@ class GrokProvider(ChatProvider):
                 converted.append(HumanMessage(content=content))
         return converted
 
+    def _chat_model(self, api_key: str, temperature: float, max_tokens: int) -> ChatOpenAI:
+        # Grok uses OpenAI-compatible API
+        return ChatOpenAI(
+            model=self.model_name or self.default_model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            openai_api_key=api_key,
+            openai_api_base="https://api.x.ai/v1",
+        )
+
     async def generate(
         self,
         api_key: str,
@@ -43,14 +53,7 @@ class GrokProvider(ChatProvider):
         max_tokens: int,
         tools: Optional[list[dict]] = None,
     ) -> Dict[str, Any]:
-        # Grok uses OpenAI-compatible API
-        chat = ChatOpenAI(
-            model=self.model_name or self.default_model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            openai_api_key=api_key,
-            openai_api_base="https://api.x.ai/v1",
-        )
+        chat = self._chat_model(api_key, temperature, max_tokens)
 
         lc_messages = self._convert_messages(messages)
         result = await chat.ainvoke(lc_messages, run_name="hyper-ai-agent")
@@ -64,6 +67,18 @@ class GrokProvider(ChatProvider):
             "tool_calls": [self.format_tool_call(call) for call in tool_calls],
         }
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+        async for event in self._stream_chat(chat, self._convert_messages(messages)):
+            yield event
+
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:
         if not tool_call:
             return {}
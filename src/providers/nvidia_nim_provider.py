@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
@@ -35,18 +35,11 @@ class NvidiaNimProvider(ChatProvider):
                 converted.append(HumanMessage(content=content))
         return converted
 
-    async def generate(
-        self,
-        api_key: str,
-        messages: Iterable[Dict[str, str]],
-        temperature: float,
-        max_tokens: int,
-        tools: Optional[list[dict]] = None,
-    ) -> Dict[str, Any]:
+    def _chat_model(self, api_key: str, temperature: float, max_tokens: int) -> ChatOpenAI:
         from ..core.config import get_settings
         
         # NVIDIA NIM uses OpenAI-compatible API
-        chat = ChatOpenAI(
+        return ChatOpenAI(
             model=self.model_name or self.default_model,
             temperature=temperature,
             max_tokens=max_tokens,
@@ -54,6 +47,16 @@ class NvidiaNimProvider(ChatProvider):
             openai_api_base=get_settings().nvidia_nim_base_url,
         )
 
+    async def generate(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> Dict[str, Any]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+
         lc_messages = self._convert_messages(messages)
         result = await chat.ainvoke(lc_messages, run_name="hyper-ai-agent")
 
@@ -66,6 +69,18 @@ class NvidiaNimProvider(ChatProvider):
             "tool_calls": [self.format_tool_call(call) for call in tool_calls],
         }
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+        async for event in self._stream_chat(chat, self._convert_messages(messages)):
+            yield event
+
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:
         if not tool_call:
             return {}
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_ollama import ChatOllama
@@ -34,6 +34,14 @@ class OllamaProvider(ChatProvider):
                 converted.append(HumanMessage(content=content))
         return converted
 
+    def _chat_model(self, api_key: str, temperature: float, max_tokens: int) -> ChatOllama:
+        return ChatOllama(
+            model=self.model_name or self.default_model,
+            temperature=temperature,
+            num_predict=max_tokens,
+            base_url=self.settings.ollama_base_url,
+        )
+
     async def generate(
         self,
         api_key: str,
@@ -42,12 +50,7 @@ class OllamaProvider(ChatProvider):
         max_tokens: int,
         tools: Optional[list[dict]] = None,
     ) -> Dict[str, Any]:
-        chat = ChatOllama(
-            model=self.model_name or self.default_model,
-            temperature=temperature,
-            num_predict=max_tokens,
-            base_url=self.settings.ollama_base_url,
-        )
+        chat = self._chat_model(api_key, temperature, max_tokens)
         result = await chat.ainvoke(self._convert_messages(messages), run_name="hyper-ai-agent")
         return {
             "text": result.content,
@@ -55,5 +58,17 @@ class OllamaProvider(ChatProvider):
             "tool_calls": [],
         }
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+        async for event in self._stream_chat(chat, self._convert_messages(messages)):
+            yield event
+
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:  # pragma: no cover - unused for Ollama
         return {}
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
@@ -34,6 +34,16 @@ class OpenAIProvider(ChatProvider):
                 converted.append(HumanMessage(content=content))
         return converted
 
+    def _chat_model(self, api_key: str, temperature: float, max_tokens: int) -> ChatOpenAI:
+        return ChatOpenAI(
+            model=self.model_name or self.default_model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            openai_api_key=api_key,
+            # Token usage arrives as the last chunk of a stream.
+            stream_usage=True,
+        )
+
     async def generate(
         self,
         api_key: str,
@@ -42,12 +52,7 @@ class OpenAIProvider(ChatProvider):
         max_tokens: int,
         tools: Optional[list[dict]] = None,
     ) -> Dict[str, Any]:
-        chat = ChatOpenAI(
-            model=self.model_name or self.default_model,
-            temperature=temperature,
-            max_tokens=max_tokens,
-            openai_api_key=api_key,
-        )
+        chat = self._chat_model(api_key, temperature, max_tokens)
 
         lc_messages = self._convert_messages(messages)
         result = await chat.ainvoke(lc_messages, run_name="hyper-ai-agent")
@@ -61,6 +66,18 @@ class OpenAIProvider(ChatProvider):
             "tool_calls": [self.format_tool_call(call) for call in tool_calls],
         }
 
+    async def stream(
+        self,
+        api_key: str,
+        messages: Iterable[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        tools: Optional[list[dict]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        chat = self._chat_model(api_key, temperature, max_tokens)
+        async for event in self._stream_chat(chat, self._convert_messages(messages)):
+            yield event
+
     def format_tool_call(self, tool_call: Any) -> Dict[str, Any]:
         if not tool_call:
             return {}
@@ -10,9 +10,11 @@ from watchdog.events import FileSystemEvent, FileSystemEventHandler
 from watchdog.observers import Observer
 
 from ..core.config import get_settings
-from ..core.database import session_scope
+from ..core.database import run_maintenance, session_scope
 from ..core.models import AutomationActionType, AutomationRule, AutomationTriggerType
+from .retention_service import RetentionService, retention_service
 from .tool_service import ToolService, tool_service
+from .usage_service import UsageService, usage_service
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +22,16 @@ logger = logging.getLogger(__name__)
 class AutomationService:
     """Manage cron, file watch, and webhook triggers and execute actions."""
 
-    def __init__(self, tool_svc: ToolService | None = None) -> None:
+    def __init__(
+        self,
+        tool_svc: ToolService | None = None,
+        retention: RetentionService | None = None,
+        usage: UsageService | None = None,
+    ) -> None:
         self.settings = get_settings()
         self.tool_service = tool_svc or tool_service
+        self.retention_service = retention or retention_service
+        self.usage_service = usage or usage_service
         self.scheduler = AsyncIOScheduler(timezone="UTC")
         self.file_observers: Dict[int, Observer] = {}
         self._running = False
@@ -31,6 +40,7 @@ class AutomationService:
         if self._running:
             return
         await self._load_rules()
+        self._schedule_maintenance()
         self.scheduler.start()
         self._running = True
         logger.info("Automation service started")
@@ -84,6 +94,65 @@ class AutomationService:
             for rule in rules:
                 await self._schedule_rule(rule)
 
+    def _schedule_compaction(self) -> None:
+        hours = self.settings.memory_compaction_interval_hours
+        if not hours:
+            return
+        self.scheduler.add_job(
+            self.retention_service.compact_all,
+            trigger="interval",
+            hours=hours,
+            id="memory-compaction",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+
+    def _schedule_maintenance(self) -> None:
+        self._schedule_compaction()
+        self._schedule_usage_rollups()
+        minutes = self.settings.sqlite_maintenance_interval_minutes
+        if not minutes:
+            return
+        self.scheduler.add_job(
+            self._run_sqlite_maintenance,
+            trigger="interval",
+            minutes=minutes,
+            id="sqlite-maintenance",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+
+    def _schedule_usage_rollups(self) -> None:
+        minutes = self.settings.usage_rollup_interval_minutes
+        if not minutes:
+            return
+        self.scheduler.add_job(
+            self._refresh_usage_rollups,
+            trigger="interval",
+            minutes=minutes,
+            id="usage-rollups",
+            replace_existing=True,
+            coalesce=True,
+            max_instances=1,
+        )
+
+    async def _refresh_usage_rollups(self) -> None:
+        try:
+            await self.usage_service.refresh_rollups()
+        except Exception as exc:  # pragma: no cover - runtime errors
+            logger.error("Usage rollup refresh failed: %s", exc)
+
+    async def _run_sqlite_maintenance(self) -> None:
+        try:
+            result = await run_maintenance()
+        except Exception as exc:  # pragma: no cover - runtime errors
+            logger.error("SQLite maintenance failed: %s", exc)
+            return
+        if result.get("busy"):
+            logger.info("WAL checkpoint incomplete (readers active): %s", result)
+
     async def _schedule_rule(self, rule: AutomationRule) -> None:
         try:
             if rule.trigger_type == AutomationTriggerType.CRON:
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Tuple
+
+from ..core.config import get_settings
+
+# One estimated token per CJK character, per punctuation mark and per four
+# characters of a word: close to BPE tokenizers on mixed English/Japanese
+# text without loading one.
+_TOKEN_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]|\w+|[^\w\s]")
+# A sentence runs to 。！？ (plus closing brackets), or to .!? followed by
+# whitespace, and keeps its trailing whitespace.
+_SENTENCE_RE = re.compile(r".+?(?:[。！？]+[」』）)]*|[.!?]+[\"'’”)\]]*(?=\s)|$)\s*", re.S)
+_HEADING_RE = re.compile(r"^(?:#{1,6}\s+\S|第[0-9０-９一二三四五六七八九十百]+[章節条部]|[0-9]+(?:\.[0-9]+)*\.?\s+[A-Z])")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+HEADING_MAX_CHARS = 120
+
+# Text longer than this without a blank line is cut at its last sentence
+# boundary, so a document without paragraphs is still read incrementally.
+PARAGRAPH_FLUSH_CHARS = 1 << 16
+
+
+def estimate_tokens(text: str) -> int:
+    tokens = 0
+    for match in _TOKEN_RE.finditer(text):
+        length = match.end() - match.start()
+        tokens += (length + 3) // 4 if length > 1 else 1
+    return tokens
+
+
+@dataclass
+class Block:
+    kind: str  # heading | text | code
+    text: str
+
+
+def iter_blocks(segments: Iterable[str]) -> Iterator[Block]:
+    """Split text arriving in segments into headings, paragraphs and fenced code."""
+
+    lines: List[str] = []
+    size = 0
+    fence = None
+    partial = ""
+
+    def flush(kind: str) -> Iterator[Block]:
+        nonlocal size
+        text = "".join(lines).strip("\n")
+        lines.clear()
+        size = 0
+        if text.strip():
+            yield Block(kind, text)
+
+    for segment in segments:
+        data = partial + segment.replace("\r\n", "\n").replace("\r", "\n")
+        *complete, partial = data.split("\n")
+        for line in complete:
+            line += "\n"
+            if fence is not None:
+                lines.append(line)
+                size += len(line)
+                if line.lstrip().startswith(fence):
+                    fence = None
+                    yield from flush("code")
+                elif size > PARAGRAPH_FLUSH_CHARS:
+                    yield from flush("code")
+                continue
+            fence_match = _FENCE_RE.match(line)
+            if fence_match:
+                yield from flush("text")
+                fence = fence_match.group(1)
+                lines.append(line)
+                size = len(line)
+            elif not line.strip():
+                yield from flush("text")
+            elif len(line) <= HEADING_MAX_CHARS and _HEADING_RE.match(line):
+                yield from flush("text")
+                yield Block("heading", line.strip())
+            else:
+                lines.append(line)
+                size += len(line)
+                if size > PARAGRAPH_FLUSH_CHARS:
+                    yield from _flush_sentences(lines)
+                    size = sum(len(line) for line in lines)
+        if fence is None and len(partial) > PARAGRAPH_FLUSH_CHARS:
+            # A very long line (e.g. unwrapped Japanese text) is read like a paragraph.
+            lines.append(partial)
+            partial = ""
+            yield from _flush_sentences(lines)
+            size = sum(len(line) for line in lines)
+    if partial:
+        lines.append(partial)
+    yield from flush("code" if fence is not None else "text")
+
+
+def _flush_sentences(lines: List[str]) -> Iterator[Block]:
+    """Emit buffered text up to its last sentence end, keeping the rest buffered."""
+
+    text = "".join(lines)
+    sentences = _SENTENCE_RE.findall(text)
+    head = "".join(sentences[:-1]) if len(sentences) > 1 else text
+    lines[:] = [text[len(head) :]] if len(head) < len(text) else []
+    if head.strip():
+        yield Block("text", head.strip("\n"))
+
+
+class TextChunker:
+    """Pack structural blocks into chunks of at most ``max_tokens`` estimated tokens.
+
+    Paragraphs and code blocks are kept whole when they fit, and a heading
+    starts a new chunk. Oversized paragraphs are split between sentences
+    (Japanese 。 included) and oversized code between lines. Overlap is
+    adaptive: only a chunk cut inside a paragraph repeats up to
+    ``overlap_tokens`` of trailing sentences; cuts at paragraph, heading or
+    code boundaries need no overlap.
+    """
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 32) -> None:
+        self.max_tokens = max(max_tokens, 1)
+        self.overlap_tokens = min(max(overlap_tokens, 0), self.max_tokens // 2)
+        # Below this size a chunk is merged into, rather than cut before, a heading.
+        self.min_tokens = self.max_tokens // 4
+
+    def chunks(self, segments: Iterable[str]) -> Iterator[str]:
+        parts: List[str] = []
+        tokens = 0
+
+        def emit() -> Iterator[str]:
+            nonlocal tokens
+            text = "".join(parts).strip()
+            parts.clear()
+            tokens = 0
+            if text:
+                yield text
+
+        for block in iter_blocks(segments):
+            if block.kind == "heading" and tokens >= self.min_tokens:
+                yield from emit()
+            block_tokens = estimate_tokens(block.text)
+            separator = "\n\n" if parts else ""
+            if tokens + block_tokens <= self.max_tokens:
+                parts.append(separator + block.text)
+                tokens += block_tokens
+                continue
+            if block_tokens <= self.max_tokens:
+                yield from emit()
+                parts.append(block.text)
+                tokens = block_tokens
+                continue
+
+            # The block alone exceeds the budget: fill chunks piece by piece.
+            overlap = block.kind == "text" and self.overlap_tokens > 0
+            carried: List[Tuple[str, int]] = []  # this block's pieces in the open chunk
+            for piece, piece_tokens in self._pieces(block):
+                if parts and tokens + piece_tokens > self.max_tokens:
+                    yield from emit()
+                    if overlap:
+                        carried = self._tail(carried, self.max_tokens - piece_tokens)
+                        parts.extend(text for text, _ in carried)
+                        tokens = sum(count for _, count in carried)
+                    else:
+                        carried = []
+                    separator = ""
+                parts.append(separator + piece)
+                separator = ""
+                tokens += piece_tokens
+                carried.append((piece, piece_tokens))
+        yield from emit()
+
+    def _pieces(self, block: Block) -> Iterator[Tuple[str, int]]:
+        units = block.text.splitlines(keepends=True) if block.kind == "code" else _SENTENCE_RE.findall(block.text)
+        for unit in units:
+            unit_tokens = estimate_tokens(unit)
+            if unit_tokens <= self.max_tokens:
+                yield unit, unit_tokens
+                continue
+            # A single sentence or line over budget: cut it into even windows.
+            step = max(len(unit) * self.max_tokens // unit_tokens, 1)
+            for start in range(0, len(unit), step):
+                window = unit[start : start + step]
+                yield window, estimate_tokens(window)
+
+    def _tail(self, pieces: List[Tuple[str, int]], room: int) -> List[Tuple[str, int]]:
+        tail: List[Tuple[str, int]] = []
+        budget = min(self.overlap_tokens, room)
+        for piece, piece_tokens in reversed(pieces):
+            if piece_tokens > budget:
+                break
+            tail.append((piece, piece_tokens))
+            budget -= piece_tokens
+        tail.reverse()
+        return tail
+
+
+def iter_chunks(segments: Iterable[str]) -> Iterator[str]:
+    """Chunk text arriving in segments with the configured token budgets."""
+
+    settings = get_settings()
+    return TextChunker(settings.memory_chunk_tokens, settings.memory_chunk_overlap_tokens).chunks(segments)
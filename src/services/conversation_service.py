@@ -1,44 +1,330 @@
 from __future__ import annotations
 
 from collections import deque
-from datetime import datetime
-from typing import Iterable, Optional
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, Iterable, Optional, Sequence
 import json
+import logging
+import re
 
-from sqlalchemy import Select, func, select
+from sqlalchemy import Select, column, delete, func, insert, literal, literal_column, or_, select, table, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.cache import TTLCache
+from ..core.config import get_settings
 from ..core.database import session_scope
 from ..core.models import (
+    ArchivedMemory,
     Conversation,
     ConversationMessage,
     MemoryRecord,
+    MemoryRetentionPolicy,
     MemoryTag,
     Project,
     ProviderType,
     Tag,
     UsageRecord,
 )
+from .usage_service import UsageService, usage_service
+from .write_behind_service import WriteBehindService, write_behind_service
+
+logger = logging.getLogger(__name__)
 
 MAX_CONTEXT_MESSAGES = 50
+# Ids per IN (...) clause, well under SQLite's bound-parameter limit.
+MEMORY_ID_BATCH = 500
+
+# FTS5 table maintained by triggers (see the baseline migration in ``core.migrations``).
+MEMORY_FTS = table("memories_fts", column("rowid"))
+MESSAGE_FTS = table("conversation_messages_fts", column("rowid"))
+# The FTS tables use the trigram tokenizer (migration 0007): a quoted term
+# matches wherever it occurs as a substring, so CJK text needs no word
+# segmentation. Shorter terms match nothing and are applied with LIKE.
+FTS_MIN_TERM_CHARS = 3
+# Marks around matched terms in message search snippets, and the snippet
+# length in trigram tokens (about one character each).
+SNIPPET_OPEN, SNIPPET_CLOSE = "<mark>", "</mark>"
+SNIPPET_TOKENS = 64
+
+RETENTION_POLICY_FIELDS = (
+    "max_memories",
+    "archive_after_days",
+    "decay_half_life_days",
+    "rollup_after_days",
+    "rollup_group_size",
+    "rollup_provider",
+    "rollup_model",
+)
+
+
+@dataclass(frozen=True)
+class MemoryFilter:
+    """Predicates restricting which memories a search may return.
+
+    ``tags_any`` matches memories carrying at least one of the tags,
+    ``tags_all`` those carrying every tag. ``memory_type`` and ``source`` match
+    the ``type``/``source`` keys of the memory metadata.
+    """
+
+    tags_any: Sequence[str] = ()
+    tags_all: Sequence[str] = ()
+    memory_type: Optional[str] = None
+    source: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def __post_init__(self) -> None:
+        # Tuples keep the filter hashable, so it can be part of a cache key.
+        object.__setattr__(self, "tags_any", tuple(self.tags_any))
+        object.__setattr__(self, "tags_all", tuple(self.tags_all))
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.tags_any
+            or self.tags_all
+            or self.memory_type
+            or self.source
+            or self.created_after
+            or self.created_before
+        )
+
+    def clauses(self) -> list:
+        """SQL predicates on ``MemoryRecord`` equivalent to this filter."""
+
+        clauses: list = []
+        if self.tags_any:
+            clauses.append(
+                MemoryRecord.id.in_(
+                    select(MemoryTag.memory_id).join(Tag).where(Tag.label.in_(list(self.tags_any)))
+                )
+            )
+        if self.tags_all:
+            labels = list(dict.fromkeys(self.tags_all))
+            clauses.append(
+                MemoryRecord.id.in_(
+                    select(MemoryTag.memory_id)
+                    .join(Tag)
+                    .where(Tag.label.in_(labels))
+                    .group_by(MemoryTag.memory_id)
+                    .having(func.count(func.distinct(Tag.label)) == len(labels))
+                )
+            )
+        if self.memory_type:
+            clauses.append(func.json_extract(MemoryRecord.metadata_json, "$.type") == self.memory_type)
+        if self.source:
+            clauses.append(func.json_extract(MemoryRecord.metadata_json, "$.source") == self.source)
+        if self.created_after:
+            clauses.append(MemoryRecord.created_at >= _as_naive_utc(self.created_after))
+        if self.created_before:
+            clauses.append(MemoryRecord.created_at < _as_naive_utc(self.created_before))
+        return clauses
+
+
+@dataclass
+class MemoryDraft:
+    """A memory ready for :meth:`ConversationService.store_memories`.
+
+    ``tags`` must already be stripped of whitespace and empty labels.
+    """
+
+    content: str
+    summary: Optional[str] = None
+    embedding: Optional[bytes] = None
+    embedding_model: Optional[str] = None
+    embedding_dim: Optional[int] = None
+    fingerprint: Optional[int] = None
+    tags: Sequence[str] = ()
+    metadata: Optional[dict] = None
+
+
+@dataclass
+class ChatTurn:
+    """State of one chat turn, read up front by :meth:`ConversationService.begin_turn`.
+
+    ``context`` holds the messages before the user message of this turn;
+    ``message_count`` counts the messages stored so far, the user message included.
+    """
+
+    project_id: int
+    project_name: str
+    conversation_id: int
+    model_name: str
+    context: list[dict]
+    message_count: int
+    last_summarized_message_id: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class ProjectRef:
+    """The identity of a project, as cached for chat turns."""
+
+    id: int
+    name: str
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class ConversationRef:
+    """The identity of a conversation, as cached for chat turns."""
+
+    id: int
+    project_id: int
+    model_name: str
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Convert aware datetimes to the naive UTC values stored in the database."""
+
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _exclude_types(memory_types: Sequence[str]) -> list:
+    if not memory_types:
+        return []
+    memory_type = func.json_extract(MemoryRecord.metadata_json, "$.type")
+    return [or_(memory_type.is_(None), memory_type.not_in(list(memory_types)))]
+
+
+def _fts_phrases(terms: Iterable[str]) -> tuple[list[str], list[str]]:
+    """Split ``terms`` into quoted FTS5 phrases and terms too short to match through the index."""
+
+    phrases: list[str] = []
+    short: list[str] = []
+    for term in terms:
+        if len(term) >= FTS_MIN_TERM_CHARS:
+            phrases.append('"' + term.replace('"', '""') + '"')
+        elif term:
+            short.append(term)
+    return phrases, short
 
 
 class ConversationService:
     """Manage projects, conversations, messages, and long-term memories."""
 
+    def __init__(
+        self,
+        write_behind: WriteBehindService | None = None,
+        usage: UsageService | None = None,
+    ) -> None:
+        self.write_behind = write_behind or write_behind_service
+        self.usage_service = usage or usage_service
+        # Projects by name and conversations by id, so chat turns skip both
+        # lookups. Local writes update the entries after commit; writes by
+        # other workers show up once an entry expires.
+        settings = get_settings()
+        self._projects: TTLCache[ProjectRef] = TTLCache(
+            settings.identity_cache_size, settings.identity_cache_ttl_seconds
+        )
+        self._conversations: TTLCache[ConversationRef] = TTLCache(
+            settings.identity_cache_size, settings.identity_cache_ttl_seconds
+        )
+
+    def cache_stats(self) -> dict:
+        return {
+            "projects": self._projects.stats(),
+            "conversations": self._conversations.stats(),
+        }
+
     async def ensure_project(self, name: str, description: Optional[str] = None) -> Project:
         async with session_scope() as session:
-            stmt = select(Project).where(Project.name == name)
-            project = await session.scalar(stmt)
-            if project:
-                if description and project.description != description:
-                    project.description = description
-                return project
+            project = await self._ensure_project(session, name, description)
+        self._projects.set(project.name, ProjectRef(project.id, project.name, project.description))
+        return project
 
-            project = Project(name=name, description=description)
-            session.add(project)
-            await session.flush()
+    async def _ensure_project(self, session: AsyncSession, name: str, description: Optional[str]) -> Project:
+        stmt = select(Project).where(Project.name == name)
+        project = await session.scalar(stmt)
+        if project:
+            if description and project.description != description:
+                project.description = description
             return project
 
+        project = Project(name=name, description=description)
+        session.add(project)
+        await session.flush()
+        return project
+
+    async def begin_turn(
+        self,
+        project_name: str,
+        project_description: Optional[str],
+        conversation_id: Optional[int],
+        provider: ProviderType,
+        model_name: Optional[str],
+        default_model: Callable[[], str],
+        user_message: str,
+        context_limit: int,
+    ) -> ChatTurn:
+        """Load and prepare everything a chat turn needs in one transaction.
+
+        Ensures the project and conversation (creating the conversation with
+        ``model_name`` or ``default_model()`` when ``conversation_id`` is unknown),
+        reads the recent context and persists the user message, so the message
+        survives a failing provider call. Cached projects and conversations are
+        not read again unless the turn changes their description or model.
+        """
+
+        project = self._projects.get(project_name)
+        if project is not None and project_description and project.description != project_description:
+            project = None
+        conversation = self._conversations.get(conversation_id) if conversation_id else None
+        if conversation is not None and model_name and conversation.model_name != model_name:
+            conversation = None
+
+        async with session_scope() as session:
+            if project is None:
+                row = await self._ensure_project(session, project_name, project_description)
+                project = ProjectRef(row.id, row.name, row.description)
+            if conversation is None:
+                row = await session.get(Conversation, conversation_id) if conversation_id else None
+                if row is None:
+                    row = Conversation(
+                        project_id=project.id,
+                        provider=provider,
+                        model_name=model_name or default_model(),
+                        title=project_name,
+                    )
+                    session.add(row)
+                    await session.flush()
+                elif model_name and row.model_name != model_name:
+                    row.model_name = model_name
+                conversation = ConversationRef(row.id, row.project_id, row.model_name)
+
+            context = [
+                {"role": msg.role, "content": msg.content}
+                for msg in await self._recent_messages(session, conversation.id, context_limit)
+            ]
+            _, message_count, last_summarized_message_id = await self._append_message(
+                session, conversation.id, "user", user_message
+            )
+        # Cached only once committed, so a rolled back turn leaves no ids behind.
+        self._projects.set(project.name, project)
+        self._conversations.set(conversation.id, conversation)
+        return ChatTurn(
+            project_id=project.id,
+            project_name=project.name,
+            conversation_id=conversation.id,
+            model_name=conversation.model_name,
+            context=context,
+            message_count=message_count,
+            last_summarized_message_id=last_summarized_message_id,
+        )
+
+    async def add_reply(self, turn: ChatTurn, content: str, token_usage: Optional[int] = None) -> ConversationMessage:
+        """Store the assistant message that completes ``turn``."""
+
+        async with session_scope() as session:
+            message, turn.message_count, _ = await self._append_message(
+                session, turn.conversation_id, "assistant", content, token_usage
+            )
+            return message
+
     async def create_conversation(
         self,
         project_id: int,
@@ -69,7 +355,8 @@ class ConversationService:
             convo.model_name = model_name
             await session.flush()
             await session.refresh(convo)
-            return convo
+        self._conversations.set(convo.id, ConversationRef(convo.id, convo.project_id, convo.model_name))
+        return convo
 
     async def add_message(
         self,
@@ -79,48 +366,210 @@ class ConversationService:
         token_usage: Optional[int] = None,
     ) -> ConversationMessage:
         async with session_scope() as session:
-            message = ConversationMessage(
-                conversation_id=conversation_id,
-                role=role,
-                content=content,
-                token_usage=token_usage,
-            )
-            session.add(message)
-            await session.flush()
+            message, _, _ = await self._append_message(session, conversation_id, role, content, token_usage)
             return message
 
+    async def _append_message(
+        self,
+        session: AsyncSession,
+        conversation_id: int,
+        role: str,
+        content: str,
+        token_usage: Optional[int] = None,
+    ) -> tuple[ConversationMessage, int, Optional[int]]:
+        """Insert a message and bump the conversation counters.
+
+        Returns the message, the new message count and the conversation's
+        ``last_summarized_message_id``.
+        """
+
+        message = ConversationMessage(
+            conversation_id=conversation_id,
+            role=role,
+            content=content,
+            token_usage=token_usage,
+        )
+        session.add(message)
+        await session.flush()
+        # Incremented in SQL, so concurrent turns of one conversation cannot lose counts.
+        stmt = (
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(message_count=Conversation.message_count + 1, last_message_at=message.created_at)
+            .returning(Conversation.message_count, Conversation.last_summarized_message_id)
+            .execution_options(synchronize_session=False)
+        )
+        message_count, last_summarized_message_id = (await session.execute(stmt)).one()
+        return message, message_count, last_summarized_message_id
+
     async def get_recent_messages(
         self,
         conversation_id: int,
         limit: int,
     ) -> list[ConversationMessage]:
         async with session_scope() as session:
-            stmt: Select = (
-                select(ConversationMessage)
-                .where(ConversationMessage.conversation_id == conversation_id)
-                .order_by(ConversationMessage.created_at.desc())
-                .limit(limit)
-            )
-            result = await session.scalars(stmt)
+            return await self._recent_messages(session, conversation_id, limit)
+
+    async def _recent_messages(
+        self, session: AsyncSession, conversation_id: int, limit: int
+    ) -> list[ConversationMessage]:
+        # Ids grow with insertion order, and (conversation_id, id) is indexed.
+        stmt: Select = (
+            select(ConversationMessage)
+            .where(ConversationMessage.conversation_id == conversation_id)
+            .order_by(ConversationMessage.id.desc())
+            .limit(limit)
+        )
+        result = await session.scalars(stmt)
+        items = list(result)
+        items.reverse()
+        return items
+
+    async def list_messages(
+        self,
+        conversation_id: int,
+        limit: int,
+        before_id: Optional[int] = None,
+        after_id: Optional[int] = None,
+        include_content: bool = True,
+    ) -> list:
+        """One page of a conversation's messages, oldest first, by keyset on ``id``.
+
+        Without cursors the page holds the newest ``limit`` messages;
+        ``before_id`` pages towards older messages and ``after_id`` towards
+        newer ones, so every page is one index range scan however deep it is.
+        Without ``include_content`` rows carry only ``id``, ``role``,
+        ``token_usage`` and ``created_at``.
+        """
+
+        columns = (
+            [ConversationMessage]
+            if include_content
+            else [
+                ConversationMessage.id,
+                ConversationMessage.role,
+                ConversationMessage.token_usage,
+                ConversationMessage.created_at,
+            ]
+        )
+        stmt: Select = select(*columns).where(ConversationMessage.conversation_id == conversation_id)
+        if before_id is not None:
+            stmt = stmt.where(ConversationMessage.id < before_id)
+        if after_id is not None:
+            stmt = stmt.where(ConversationMessage.id > after_id)
+        # Scan from the cursor outwards, then return the page oldest first.
+        newest_first = after_id is None
+        order = ConversationMessage.id.desc() if newest_first else ConversationMessage.id.asc()
+        async with session_scope() as session:
+            result = await session.execute(stmt.order_by(order).limit(limit))
+            items = list(result.scalars()) if include_content else list(result)
+        if newest_first:
+            items.reverse()
+        return items
+
+    async def get_messages_since(
+        self,
+        conversation_id: int,
+        after_id: Optional[int],
+        limit: int,
+    ) -> list[ConversationMessage]:
+        """The newest ``limit`` messages with an id above ``after_id``, oldest first."""
+
+        async with session_scope() as session:
+            stmt: Select = select(ConversationMessage).where(ConversationMessage.conversation_id == conversation_id)
+            if after_id is not None:
+                stmt = stmt.where(ConversationMessage.id > after_id)
+            result = await session.scalars(stmt.order_by(ConversationMessage.id.desc()).limit(limit))
             items = list(result)
             items.reverse()
             return items
 
-    async def save_summary(self, conversation_id: int, summary: str) -> None:
+    async def save_summary(self, conversation_id: int, summary: str, last_message_id: Optional[int] = None) -> None:
+        """Store ``summary``; ``last_message_id`` marks the newest message it covers."""
+
         async with session_scope() as session:
             convo = await session.get(Conversation, conversation_id)
             if not convo:
                 return
             convo.summary = summary
+            if last_message_id is not None:
+                convo.last_summarized_message_id = last_message_id
 
     async def count_messages(self, conversation_id: int) -> int:
         async with session_scope() as session:
-            stmt = (
-                select(func.count(ConversationMessage.id))
-                .where(ConversationMessage.conversation_id == conversation_id)
+            stmt = select(Conversation.message_count).where(Conversation.id == conversation_id)
+            return (await session.scalar(stmt)) or 0
+
+    async def list_conversations(self, project_id: int, limit: int = 50) -> list[Conversation]:
+        """Conversations of a project, most recently active first."""
+
+        async with session_scope() as session:
+            stmt: Select = (
+                select(Conversation)
+                .where(Conversation.project_id == project_id)
+                .order_by(Conversation.last_message_at.desc(), Conversation.id.desc())
+                .limit(limit)
             )
-            result = await session.execute(stmt)
-            return result.scalar_one()
+            result = await session.scalars(stmt)
+            return list(result)
+
+    async def search_messages(
+        self,
+        project_id: int,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        conversation_id: Optional[int] = None,
+    ) -> Optional[list]:
+        """Full-text search over the messages of a project, best match first.
+
+        Every word of ``query`` must occur in a message, as a substring.
+        Rows carry ``id``, ``conversation_id``, ``title``, ``role``,
+        ``created_at``, a highlighted ``snippet`` and a BM25 ``rank`` (lower
+        is better). Words under three characters are matched with LIKE; a
+        query made only of those scans the project's messages, newest first,
+        with an unhighlighted snippet. Returns ``None`` when SQLite has no FTS5.
+        """
+
+        terms = list(dict.fromkeys(re.findall(r"\w+", query.lower())))
+        if not terms:
+            return []
+        phrases, short = _fts_phrases(terms)
+        columns = (
+            ConversationMessage.id,
+            ConversationMessage.conversation_id,
+            Conversation.title,
+            ConversationMessage.role,
+            ConversationMessage.created_at,
+        )
+        if phrases:
+            fts = literal_column("conversation_messages_fts")
+            rank = func.bm25(fts).label("rank")
+            snippet = func.snippet(fts, 0, SNIPPET_OPEN, SNIPPET_CLOSE, "…", SNIPPET_TOKENS).label("snippet")
+            stmt: Select = (
+                select(*columns, snippet, rank)
+                .select_from(MESSAGE_FTS)
+                .join(ConversationMessage, ConversationMessage.id == MESSAGE_FTS.c.rowid)
+                .where(fts.op("MATCH")(" AND ".join(phrases)))
+            )
+        else:
+            rank = literal(0.0).label("rank")
+            snippet = func.substr(ConversationMessage.content, 1, SNIPPET_TOKENS).label("snippet")
+            stmt = select(*columns, snippet, rank).select_from(ConversationMessage)
+        stmt = stmt.join(Conversation, Conversation.id == ConversationMessage.conversation_id).where(
+            Conversation.project_id == project_id,
+            *(ConversationMessage.content.contains(term, autoescape=True) for term in short),
+        )
+        if conversation_id is not None:
+            stmt = stmt.where(ConversationMessage.conversation_id == conversation_id)
+        stmt = stmt.order_by(rank, ConversationMessage.id.desc()).limit(limit).offset(offset)
+        try:
+            async with session_scope() as session:
+                result = await session.execute(stmt)
+                return list(result)
+        except OperationalError as exc:
+            logger.warning("Message search unavailable: %s", exc)
+            return None
 
     async def store_memory(
         self,
@@ -130,6 +579,9 @@ class ConversationService:
         embedding: Optional[bytes],
         tags: Optional[Iterable[str]] = None,
         metadata: Optional[dict] = None,
+        embedding_model: Optional[str] = None,
+        embedding_dim: Optional[int] = None,
+        fingerprint: Optional[int] = None,
     ) -> MemoryRecord:
         async with session_scope() as session:
             memory = MemoryRecord(
@@ -137,35 +589,267 @@ class ConversationService:
                 content=content,
                 summary=summary,
                 embedding=embedding,
+                embedding_model=embedding_model if embedding is not None else None,
+                embedding_dim=embedding_dim if embedding is not None else None,
+                fingerprint=fingerprint,
                 metadata_json=json.dumps(metadata) if metadata else None,
             )
             session.add(memory)
             await session.flush()
 
             if tags:
-                for label in tags:
-                    normalized = label.strip()
-                    if not normalized:
-                        continue
-                    tag_stmt = select(Tag).where(Tag.label == normalized)
-                    tag = await session.scalar(tag_stmt)
-                    if not tag:
-                        tag = Tag(label=normalized)
-                        session.add(tag)
-                        await session.flush()
-                    link = MemoryTag(memory_id=memory.id, tag_id=tag.id)
-                    session.add(link)
+                await self._link_tags(session, memory.id, tags)
             return memory
 
+    async def store_memories(self, project_id: int, drafts: Sequence[MemoryDraft]) -> list[tuple[int, datetime]]:
+        """Insert many memories with one bulk INSERT and one tag upsert.
+
+        Returns ``(id, created_at)`` per draft, in order.
+        """
+
+        if not drafts:
+            return []
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                "project_id": project_id,
+                "content": draft.content,
+                "summary": draft.summary,
+                "embedding": draft.embedding,
+                "embedding_model": draft.embedding_model if draft.embedding is not None else None,
+                "embedding_dim": draft.embedding_dim if draft.embedding is not None else None,
+                "fingerprint": draft.fingerprint,
+                "metadata_json": json.dumps(draft.metadata) if draft.metadata else None,
+                "created_at": created_at,
+            }
+            for draft in drafts
+        ]
+        async with session_scope() as session:
+            result = await session.execute(
+                insert(MemoryRecord).returning(MemoryRecord.id, sort_by_parameter_order=True), rows
+            )
+            ids = list(result.scalars())
+
+            labels = list(dict.fromkeys(label for draft in drafts for label in draft.tags))
+            if labels:
+                await session.execute(
+                    sqlite_insert(Tag).on_conflict_do_nothing(index_elements=[Tag.label]),
+                    [{"label": label, "created_at": created_at} for label in labels],
+                )
+                tag_ids = dict((await session.execute(select(Tag.label, Tag.id).where(Tag.label.in_(labels)))).all())
+                links = [
+                    {"memory_id": memory_id, "tag_id": tag_ids[label]}
+                    for memory_id, draft in zip(ids, drafts)
+                    for label in dict.fromkeys(draft.tags)
+                ]
+                if links:
+                    await session.execute(insert(MemoryTag), links)
+        return [(memory_id, created_at) for memory_id in ids]
+
+    async def add_memory_tags(self, memory_id: int, tags: Iterable[str]) -> list[str]:
+        """Attach ``tags`` to an existing memory; returns the labels newly linked."""
+
+        async with session_scope() as session:
+            return await self._link_tags(session, memory_id, tags)
+
+    async def merge_memories(self, merges: dict[int, int]) -> None:
+        """Fold each duplicate memory into its kept memory and delete the duplicate.
+
+        ``merges`` maps duplicate id -> kept id; the duplicate's tags are added
+        to the kept memory.
+        """
+
+        if not merges:
+            return
+        async with session_scope() as session:
+            duplicate_ids = list(merges)
+            for start in range(0, len(duplicate_ids), MEMORY_ID_BATCH):
+                batch = duplicate_ids[start : start + MEMORY_ID_BATCH]
+                stmt = (
+                    select(MemoryTag.memory_id, Tag.label)
+                    .join(Tag, Tag.id == MemoryTag.tag_id)
+                    .where(MemoryTag.memory_id.in_(batch))
+                )
+                labels: dict[int, list[str]] = {}
+                for row in await session.execute(stmt):
+                    labels.setdefault(merges[row.memory_id], []).append(row.label)
+                for keeper_id, keeper_labels in labels.items():
+                    await self._link_tags(session, keeper_id, keeper_labels)
+                await session.execute(delete(MemoryTag).where(MemoryTag.memory_id.in_(batch)))
+                await session.execute(delete(MemoryRecord).where(MemoryRecord.id.in_(batch)))
+
+    async def archive_memories(
+        self,
+        memory_ids: Sequence[int],
+        reason: str,
+        rolled_up_into: Optional[int] = None,
+    ) -> int:
+        """Move memories (with their tag labels) to ``memory_archive``; returns how many moved."""
+
+        moved = 0
+        async with session_scope() as session:
+            for start in range(0, len(memory_ids), MEMORY_ID_BATCH):
+                batch = list(memory_ids[start : start + MEMORY_ID_BATCH])
+                labels: dict[int, list[str]] = {}
+                stmt = (
+                    select(MemoryTag.memory_id, Tag.label)
+                    .join(Tag, Tag.id == MemoryTag.tag_id)
+                    .where(MemoryTag.memory_id.in_(batch))
+                )
+                for row in await session.execute(stmt):
+                    labels.setdefault(row.memory_id, []).append(row.label)
+                records = list(await session.scalars(select(MemoryRecord).where(MemoryRecord.id.in_(batch))))
+                if not records:
+                    continue
+                await session.execute(
+                    insert(ArchivedMemory),
+                    [
+                        {
+                            "memory_id": record.id,
+                            "project_id": record.project_id,
+                            "content": record.content,
+                            "summary": record.summary,
+                            "embedding": record.embedding,
+                            "embedding_model": record.embedding_model,
+                            "embedding_dim": record.embedding_dim,
+                            "fingerprint": record.fingerprint,
+                            "metadata_json": record.metadata_json,
+                            "tags": labels.get(record.id),
+                            "created_at": record.created_at,
+                            "reason": reason,
+                            "rolled_up_into": rolled_up_into,
+                        }
+                        for record in records
+                    ],
+                )
+                await session.execute(delete(MemoryTag).where(MemoryTag.memory_id.in_(batch)))
+                await session.execute(delete(MemoryRecord).where(MemoryRecord.id.in_(batch)))
+                moved += len(records)
+        return moved
+
+    async def get_retention_policy(self, project_id: int) -> Optional[MemoryRetentionPolicy]:
+        async with session_scope() as session:
+            stmt = select(MemoryRetentionPolicy).where(MemoryRetentionPolicy.project_id == project_id)
+            return await session.scalar(stmt)
+
+    async def save_retention_policy(self, project_id: int, values: dict) -> MemoryRetentionPolicy:
+        """Create or replace the project's policy; missing keys are stored as NULL."""
+
+        async with session_scope() as session:
+            stmt = select(MemoryRetentionPolicy).where(MemoryRetentionPolicy.project_id == project_id)
+            policy = await session.scalar(stmt)
+            if policy is None:
+                policy = MemoryRetentionPolicy(project_id=project_id)
+                session.add(policy)
+            for name in RETENTION_POLICY_FIELDS:
+                setattr(policy, name, values.get(name))
+            await session.flush()
+            return policy
+
+    async def list_project_ids(self) -> list[int]:
+        async with session_scope() as session:
+            return list(await session.scalars(select(Project.id).order_by(Project.id)))
+
+    async def count_memories(self, project_id: int, exclude_types: Sequence[str] = ()) -> int:
+        async with session_scope() as session:
+            stmt = select(func.count(MemoryRecord.id)).where(
+                MemoryRecord.project_id == project_id, *_exclude_types(exclude_types)
+            )
+            return int(await session.scalar(stmt) or 0)
+
+    async def memory_stamp(self, project_id: int) -> tuple[int, int]:
+        """Return ``(count, max id)`` of the project's memories.
+
+        Answered from the ``(project_id, created_at)`` index alone, so it is
+        cheap enough to poll for changes made by other workers.
+        """
+
+        async with session_scope() as session:
+            stmt = select(func.count(MemoryRecord.id), func.max(MemoryRecord.id)).where(
+                MemoryRecord.project_id == project_id
+            )
+            count, max_id = (await session.execute(stmt)).one()
+            return int(count or 0), int(max_id or 0)
+
+    async def list_oldest_memory_ids(
+        self,
+        project_id: int,
+        limit: Optional[int] = None,
+        before: Optional[datetime] = None,
+        exclude_types: Sequence[str] = (),
+    ) -> list[int]:
+        """Return memory ids oldest first, optionally only those created before ``before``."""
+
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryRecord.id)
+                .where(MemoryRecord.project_id == project_id, *_exclude_types(exclude_types))
+                .order_by(MemoryRecord.created_at, MemoryRecord.id)
+            )
+            if before is not None:
+                stmt = stmt.where(MemoryRecord.created_at < _as_naive_utc(before))
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            return list(await session.scalars(stmt))
+
+    async def list_summary_memories(
+        self,
+        project_id: int,
+        memory_type: str,
+        before: datetime,
+        level: Optional[int] = None,
+    ) -> list[MemoryRecord]:
+        """Return memories of ``memory_type`` created before ``before``, oldest first.
+
+        ``level`` additionally matches the ``level`` metadata key (summary roll-ups).
+        """
+
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryRecord)
+                .where(
+                    MemoryRecord.project_id == project_id,
+                    MemoryRecord.created_at < _as_naive_utc(before),
+                    func.json_extract(MemoryRecord.metadata_json, "$.type") == memory_type,
+                )
+                .order_by(MemoryRecord.created_at, MemoryRecord.id)
+            )
+            if level is not None:
+                stmt = stmt.where(func.json_extract(MemoryRecord.metadata_json, "$.level") == level)
+            return list(await session.scalars(stmt))
+
+    async def _link_tags(self, session: AsyncSession, memory_id: int, tags: Iterable[str]) -> list[str]:
+        existing = set(
+            await session.scalars(
+                select(Tag.label).join(MemoryTag, MemoryTag.tag_id == Tag.id).where(MemoryTag.memory_id == memory_id)
+            )
+        )
+        linked: list[str] = []
+        for label in tags:
+            normalized = label.strip()
+            if not normalized or normalized in existing:
+                continue
+            tag_stmt = select(Tag).where(Tag.label == normalized)
+            tag = await session.scalar(tag_stmt)
+            if not tag:
+                tag = Tag(label=normalized)
+                session.add(tag)
+                await session.flush()
+            session.add(MemoryTag(memory_id=memory_id, tag_id=tag.id))
+            existing.add(normalized)
+            linked.append(normalized)
+        return linked
+
     async def list_memories(
         self,
         project_id: int,
         limit: Optional[int] = None,
+        filters: Optional[MemoryFilter] = None,
     ) -> list[MemoryRecord]:
         async with session_scope() as session:
             stmt: Select = (
                 select(MemoryRecord)
-                .where(MemoryRecord.project_id == project_id)
+                .where(MemoryRecord.project_id == project_id, *(filters.clauses() if filters else []))
                 .order_by(MemoryRecord.created_at.desc())
             )
             if limit:
@@ -173,6 +857,240 @@ class ConversationService:
             result = await session.scalars(stmt)
             return list(result)
 
+    async def stream_memory_embeddings(
+        self,
+        project_id: int,
+        embedding_model: str,
+        include_untagged: bool = False,
+        chunk_size: int = 2048,
+        filters: Optional[MemoryFilter] = None,
+        with_attributes: bool = False,
+    ) -> AsyncIterator[list]:
+        """Yield one model's ``(id, embedding)`` rows in chunks of ``chunk_size``.
+
+        Rows are streamed from the cursor, so at most one chunk of blobs is in
+        memory at a time. ``with_attributes`` appends ``created_at``, ``type``
+        and ``source`` to each row; ``include_untagged`` also returns rows
+        stored before the embedding model was recorded.
+        """
+
+        stmt = self._embedded_memories(
+            project_id, embedding_model, include_untagged, MemoryRecord.id, MemoryRecord.embedding
+        )
+        if not with_attributes:
+            stmt = stmt.with_only_columns(MemoryRecord.id, MemoryRecord.embedding)
+        if filters is not None:
+            stmt = stmt.where(*filters.clauses())
+        async with session_scope() as session:
+            result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+            async for partition in result.partitions(chunk_size):
+                yield [tuple(row) for row in partition]
+
+    async def stream_memory_texts(
+        self,
+        project_id: int,
+        chunk_size: int = 2048,
+        filters: Optional[MemoryFilter] = None,
+    ) -> AsyncIterator[list[tuple[int, str, Optional[str]]]]:
+        """Yield ``(id, content, summary)`` for the project's memories in chunks."""
+
+        stmt: Select = (
+            select(MemoryRecord.id, MemoryRecord.content, MemoryRecord.summary)
+            .where(MemoryRecord.project_id == project_id, *(filters.clauses() if filters else []))
+            .order_by(MemoryRecord.id)
+        )
+        async with session_scope() as session:
+            result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+            async for partition in result.partitions(chunk_size):
+                yield [tuple(row) for row in partition]
+
+    async def list_memory_attributes(
+        self,
+        project_id: int,
+        embedding_model: str,
+        include_untagged: bool = False,
+    ) -> list[tuple[int, datetime, Optional[str], Optional[str]]]:
+        """Return ``(id, created_at, type, source)`` for one model's embedded memories.
+
+        Reads no embedding blobs; ``include_untagged`` is as for
+        :meth:`stream_memory_embeddings`.
+        """
+
+        stmt = self._embedded_memories(project_id, embedding_model, include_untagged, MemoryRecord.id)
+        async with session_scope() as session:
+            result = await session.execute(stmt)
+            return [(row.id, row.created_at, row.memory_type, row.source) for row in result]
+
+    async def get_memory_embeddings(self, memory_ids: Sequence[int]) -> list[tuple[int, bytes]]:
+        if not memory_ids:
+            return []
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryRecord.id, MemoryRecord.embedding)
+                .where(MemoryRecord.id.in_(list(memory_ids)), MemoryRecord.embedding.is_not(None))
+                .order_by(MemoryRecord.id)
+            )
+            result = await session.execute(stmt)
+            return [(row.id, row.embedding) for row in result]
+
+    @staticmethod
+    def _embedded_memories(project_id: int, embedding_model: str, include_untagged: bool, *columns) -> Select:
+        model_filter = MemoryRecord.embedding_model == embedding_model
+        if include_untagged:
+            model_filter = or_(model_filter, MemoryRecord.embedding_model.is_(None))
+        return (
+            select(
+                *columns,
+                MemoryRecord.created_at,
+                func.json_extract(MemoryRecord.metadata_json, "$.type").label("memory_type"),
+                func.json_extract(MemoryRecord.metadata_json, "$.source").label("source"),
+            )
+            .where(
+                MemoryRecord.project_id == project_id,
+                MemoryRecord.embedding.is_not(None),
+                model_filter,
+            )
+            .order_by(MemoryRecord.id)
+        )
+
+    async def list_memory_tag_labels(self, project_id: int) -> list[tuple[int, str]]:
+        """Return ``(memory_id, tag label)`` links for every memory in the project."""
+
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryTag.memory_id, Tag.label)
+                .join(Tag, Tag.id == MemoryTag.tag_id)
+                .join(MemoryRecord, MemoryRecord.id == MemoryTag.memory_id)
+                .where(MemoryRecord.project_id == project_id)
+            )
+            result = await session.execute(stmt)
+            return [(row.memory_id, row.label) for row in result]
+
+    async def list_memory_fingerprints(self, project_id: int) -> list[tuple[int, int]]:
+        """Return ``(id, fingerprint)`` for fingerprinted memories, oldest first."""
+
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryRecord.id, MemoryRecord.fingerprint)
+                .where(
+                    MemoryRecord.project_id == project_id,
+                    MemoryRecord.fingerprint.is_not(None),
+                    MemoryRecord.fingerprint != 0,
+                )
+                .order_by(MemoryRecord.id)
+            )
+            result = await session.execute(stmt)
+            return [(row.id, row.fingerprint) for row in result]
+
+    async def list_unfingerprinted_memories(
+        self, project_id: int, limit: int
+    ) -> list[tuple[int, str, Optional[str]]]:
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryRecord.id, MemoryRecord.content, MemoryRecord.summary)
+                .where(MemoryRecord.project_id == project_id, MemoryRecord.fingerprint.is_(None))
+                .order_by(MemoryRecord.id)
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return [(row.id, row.content, row.summary) for row in result]
+
+    async def update_memory_fingerprints(self, fingerprints: dict[int, Optional[int]]) -> None:
+        if not fingerprints:
+            return
+        async with session_scope() as session:
+            await session.execute(
+                update(MemoryRecord),
+                [{"id": memory_id, "fingerprint": value} for memory_id, value in fingerprints.items()],
+            )
+
+    async def list_embedding_page(self, after_id: int, limit: int) -> list[tuple[int, bytes]]:
+        """Return ``(id, embedding)`` for all projects in id order, for batch rewrites."""
+
+        async with session_scope() as session:
+            stmt: Select = (
+                select(MemoryRecord.id, MemoryRecord.embedding)
+                .where(MemoryRecord.id > after_id, MemoryRecord.embedding.is_not(None))
+                .order_by(MemoryRecord.id)
+                .limit(limit)
+            )
+            result = await session.execute(stmt)
+            return [(row.id, row.embedding) for row in result]
+
+    async def update_memory_embeddings(self, embeddings: dict[int, Optional[bytes]]) -> None:
+        if not embeddings:
+            return
+        async with session_scope() as session:
+            await session.execute(
+                update(MemoryRecord),
+                [{"id": memory_id, "embedding": blob} for memory_id, blob in embeddings.items()],
+            )
+
+    async def search_memory_keywords(
+        self,
+        project_id: int,
+        terms: Iterable[str],
+        limit: int,
+        filters: Optional[MemoryFilter] = None,
+        match_all: bool = False,
+    ) -> list[tuple[int, float]]:
+        """Rank the project's memories against ``terms`` with FTS5 BM25.
+
+        Memories must contain every term with ``match_all``, any term otherwise.
+        Terms under three characters cannot be ranked by the trigram index;
+        they are required with LIKE under ``match_all`` and ignored otherwise,
+        and memories matching only such terms come newest first with score 0.
+        Returns ``(id, score)`` pairs, best first; higher scores are better.
+        """
+
+        phrases, short = _fts_phrases(terms)
+        if not match_all:
+            short = []
+        if not phrases and not short:
+            return []
+        if phrases:
+            fts = literal_column("memories_fts")
+            rank = func.bm25(fts).label("rank")
+            stmt: Select = (
+                select(MemoryRecord.id, rank)
+                .select_from(MEMORY_FTS)
+                .join(MemoryRecord, MemoryRecord.id == MEMORY_FTS.c.rowid)
+                .where(fts.op("MATCH")((" AND " if match_all else " OR ").join(phrases)))
+            )
+        else:
+            rank = literal(0.0).label("rank")
+            stmt = select(MemoryRecord.id, rank)
+        stmt = (
+            stmt.where(
+                MemoryRecord.project_id == project_id,
+                *(filters.clauses() if filters else []),
+                *(
+                    or_(
+                        MemoryRecord.content.contains(term, autoescape=True),
+                        MemoryRecord.summary.contains(term, autoescape=True),
+                    )
+                    for term in short
+                ),
+            )
+            .order_by(rank, MemoryRecord.id.desc())
+            .limit(limit)
+        )
+        async with session_scope() as session:
+            result = await session.execute(stmt)
+            return [(row.id, -float(row.rank)) for row in result]
+
+    async def get_memories(self, memory_ids: Iterable[int]) -> list[MemoryRecord]:
+        """Return memories by id, preserving the order of ``memory_ids``."""
+
+        ids = list(memory_ids)
+        if not ids:
+            return []
+        async with session_scope() as session:
+            stmt = select(MemoryRecord).where(MemoryRecord.id.in_(ids))
+            result = await session.scalars(stmt)
+            by_id = {record.id: record for record in result}
+            return [by_id[memory_id] for memory_id in ids if memory_id in by_id]
+
     async def record_usage(
         self,
         project_id: int,
@@ -182,20 +1100,27 @@ class ConversationService:
         tokens_completion: int,
         total_cost: Optional[float] = None,
         metadata: Optional[dict] = None,
-    ) -> UsageRecord:
-        async with session_scope() as session:
-            record = UsageRecord(
-                project_id=project_id,
-                provider=provider,
-                model_name=model_name,
-                tokens_prompt=tokens_prompt,
-                tokens_completion=tokens_completion,
-                total_cost=total_cost,
-                usage_metadata=metadata,
-            )
-            session.add(record)
-            await session.flush()
-            return record
+    ) -> None:
+        """Queue a usage record; it is written by the write-behind queue.
+
+        Without ``total_cost`` the cost is computed from the model pricing table.
+        """
+
+        if total_cost is None:
+            total_cost = await self.usage_service.compute_cost(provider, model_name, tokens_prompt, tokens_completion)
+        await self.write_behind.insert(
+            UsageRecord,
+            {
+                "project_id": project_id,
+                "provider": provider,
+                "model_name": model_name,
+                "tokens_prompt": tokens_prompt,
+                "tokens_completion": tokens_completion,
+                "total_cost": total_cost,
+                "usage_metadata": metadata,
+                "created_at": datetime.utcnow(),
+            },
+        )
 
     async def list_conversation_context(self, conversation_id: int, limit: int = MAX_CONTEXT_MESSAGES) -> list[dict]:
         messages = await self.get_recent_messages(conversation_id, limit)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.config import get_settings
+from .conversation_service import ConversationService, conversation_service
+
+FINGERPRINT_BITS = 64
+_UNSIGNED_MASK = (1 << FINGERPRINT_BITS) - 1
+_SIGN_BIT = 1 << (FINGERPRINT_BITS - 1)
+
+# Word shingles carry word order; unigrams keep very short texts comparable.
+SHINGLE_SIZE = 2
+
+
+@lru_cache(maxsize=65536)
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash of ``text`` over word unigrams and bigrams.
+
+    Texts that differ by a few words map to fingerprints a few bits apart.
+    Returns ``None`` for text without any word characters.
+    """
+
+    tokens = re.findall(r"\w+", text.lower())
+    if not tokens:
+        return None
+    features = tokens + [" ".join(tokens[i : i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    hashes = np.fromiter((_feature_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+    bits = np.unpackbits(hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    packed = np.packbits(votes > 0, bitorder="little")
+    return int.from_bytes(packed.tobytes(), "little")
+
+
+def to_signed(fingerprint: int) -> int:
+    """Map an unsigned fingerprint onto SQLite's signed 64-bit INTEGER range."""
+
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint & _SIGN_BIT else fingerprint
+
+
+def to_unsigned(fingerprint: int) -> int:
+    return fingerprint & _UNSIGNED_MASK
+
+
+class SimHashLSH:
+    """Band index over SimHash fingerprints for Hamming-radius lookups.
+
+    The 64 bits are split into ``max_distance + 1`` bands. Two fingerprints
+    within ``max_distance`` bits differ in at most ``max_distance`` bands, so
+    they share at least one band exactly and meet in that band's bucket.
+    """
+
+    def __init__(self, max_distance: int) -> None:
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        bounds = [FINGERPRINT_BITS * band // bands for band in range(bands + 1)]
+        self._bands = [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+        self._buckets: List[Dict[int, List[int]]] = [{} for _ in self._bands]
+        self._fingerprints: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def add(self, memory_id: int, fingerprint: int) -> None:
+        self._fingerprints[memory_id] = fingerprint
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            buckets.setdefault(key, []).append(memory_id)
+
+    def remove(self, memory_id: int) -> None:
+        fingerprint = self._fingerprints.pop(memory_id, None)
+        if fingerprint is None:
+            return
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            bucket = buckets.get(key)
+            if bucket and memory_id in bucket:
+                bucket.remove(memory_id)
+                if not bucket:
+                    del buckets[key]
+
+    def nearest(self, fingerprint: int) -> Optional[int]:
+        """Return the closest indexed id within ``max_distance`` bits, oldest first on ties."""
+
+        best: Optional[Tuple[int, int]] = None
+        seen: set[int] = set()
+        for buckets, key in zip(self._buckets, self._keys(fingerprint)):
+            for memory_id in buckets.get(key, ()):
+                if memory_id in seen:
+                    continue
+                seen.add(memory_id)
+                distance = (self._fingerprints[memory_id] ^ fingerprint).bit_count()
+                if distance <= self.max_distance and (best is None or (distance, memory_id) < best):
+                    best = (distance, memory_id)
+        return best[1] if best else None
+
+    def _keys(self, fingerprint: int) -> Iterable[int]:
+        return ((fingerprint >> start) & mask for start, mask in self._bands)
+
+
+class DedupService:
+    """Detect near-duplicate memories per project using SimHash fingerprints."""
+
+    def __init__(self, convo_service: ConversationService | None = None) -> None:
+        self.settings = get_settings()
+        self.conversation_service = convo_service or conversation_service
+        self._indexes: Dict[int, SimHashLSH] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def lock(self, project_id: int) -> asyncio.Lock:
+        """Lock serializing check-then-insert for one project."""
+
+        return self._locks.setdefault(project_id, asyncio.Lock())
+
+    async def find_duplicate(self, project_id: int, fingerprint: int) -> Optional[int]:
+        index = await self._get_index(project_id)
+        return index.nearest(fingerprint)
+
+    def register(self, project_id: int, memory_id: int, fingerprint: int) -> None:
+        index = self._indexes.get(project_id)
+        if index is not None:
+            index.add(memory_id, fingerprint)
+
+    def invalidate(self, project_id: Optional[int] = None) -> None:
+        if project_id is None:
+            self._indexes.clear()
+            return
+        self._indexes.pop(project_id, None)
+
+    async def plan(self, project_id: int, batch_size: int = 500) -> Tuple[Dict[int, int], int, int]:
+        """Fingerprint the project and group its near-duplicates.
+
+        Memories missing a fingerprint are backfilled first. Returns
+        ``(duplicate id -> kept id, scanned, fingerprinted)``; the oldest
+        memory of each group is kept.
+        """
+
+        fingerprinted = 0
+        while True:
+            rows = await self.conversation_service.list_unfingerprinted_memories(project_id, batch_size)
+            if not rows:
+                break
+            updates: Dict[int, Optional[int]] = {}
+            for memory_id, content, summary in rows:
+                fingerprint = simhash(content or summary or "")
+                # 0 marks "no words", so the row is not picked up again.
+                updates[memory_id] = to_signed(fingerprint) if fingerprint is not None else 0
+            await self.conversation_service.update_memory_fingerprints(updates)
+            fingerprinted += len(updates)
+
+        index = SimHashLSH(self.settings.memory_dedup_max_distance)
+        merges: Dict[int, int] = {}
+        scanned = 0
+        for memory_id, stored in await self.conversation_service.list_memory_fingerprints(project_id):
+            scanned += 1
+            fingerprint = to_unsigned(stored)
+            keeper = index.nearest(fingerprint)
+            if keeper is None:
+                index.add(memory_id, fingerprint)
+            else:
+                merges[memory_id] = keeper
+        self.invalidate(project_id)
+        return merges, scanned, fingerprinted
+
+    async def _get_index(self, project_id: int) -> SimHashLSH:
+        index = self._indexes.get(project_id)
+        if index is not None:
+            return index
+        index = SimHashLSH(self.settings.memory_dedup_max_distance)
+        for memory_id, stored in await self.conversation_service.list_memory_fingerprints(project_id):
+            index.add(memory_id, to_unsigned(stored))
+        return self._indexes.setdefault(project_id, index)
+
+
+dedup_service = DedupService()
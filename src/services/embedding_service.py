@@ -1,62 +1,329 @@
 from __future__ import annotations
 
+import asyncio
+import io
 import math
 import pickle
 import hashlib
-from typing import Iterable, List, Sequence
+import struct
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Iterable, List, Literal, Sequence, Tuple
 
+import numpy as np
+
+from ..core.config import get_settings
 
 EMBEDDING_DIM = 256
 
+# Binary embedding blob layout (little-endian):
+#   bytes 0-1  magic b"HE"
+#   byte  2    format version
+#   byte  3    payload dtype (0 = float32, 1 = int8)
+#   bytes 4-7  float32 scale (1.0 for float32 payloads)
+#   bytes 8-   payload
+# The 8-byte header keeps float32 payloads aligned for zero-copy decoding.
+EMBEDDING_MAGIC = b"HE"
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_HEADER = struct.Struct("<2sBBf")
+_DTYPE_FLOAT32 = 0
+_DTYPE_INT8 = 1
 
-class EmbeddingService:
-    """Generate and convert lightweight embeddings for semantic memory and RAG."""
+EmbeddingQuantization = Literal["float32", "int8"]
+# "legacy" reproduces the original MD5/SHA1 bucketing so new vectors stay
+# comparable with stored ones; "fast" uses CRC32 and is not compatible.
+EmbeddingHashScheme = Literal["legacy", "fast"]
+
+# Model name recorded for vectors from the original hashing embedder; rows
+# stored before models were tracked are assumed to use it.
+LEGACY_HASHING_MODEL = "hashing"
+
+TOKEN_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.5
+TOKEN_CACHE_SIZE = 65536
+
+
+class _LegacyEmbeddingUnpickler(pickle.Unpickler):
+    """Unpickler for pre-binary blobs that refuses to resolve any global.
+
+    Legacy blobs are plain lists of floats, which never need ``find_class``,
+    so anything that does is rejected instead of executed.
+    """
+
+    def find_class(self, module: str, name: str):  # type: ignore[override]
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from an embedding blob")
+
+
+class EmbeddingBackend(ABC):
+    """Turn texts into fixed-size vectors for one embedding model."""
+
+    #: Identifier recorded on each ``MemoryRecord`` embedded by this backend.
+    name: str
+    dim: int
+    #: Whether concurrent calls should be coalesced into shared batches.
+    batched: bool = False
+
+    @abstractmethod
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(texts), dim)`` float32 matrix."""
+
+
+class HashingEmbeddingBackend(EmbeddingBackend):
+    """Feature-hashing embedder over lowercased tokens and character bigrams."""
 
-    def __init__(self, dim: int = EMBEDDING_DIM) -> None:
+    def __init__(self, dim: int = EMBEDDING_DIM, hash_scheme: EmbeddingHashScheme = "legacy") -> None:
         self.dim = dim
+        self.hash_scheme = hash_scheme
+        self.name = LEGACY_HASHING_MODEL if hash_scheme == "legacy" else f"hashing-{hash_scheme}"
+        if dim != EMBEDDING_DIM:
+            self.name = f"{self.name}-{dim}"
+        self._token_buckets = lru_cache(maxsize=TOKEN_CACHE_SIZE)(self._compute_token_buckets)
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        text_list = list(texts)
+        matrix = np.zeros((len(text_list), self.dim), dtype=np.float32)
+        cols: List[int] = []
+        weights: List[float] = []
+        row_lengths: List[int] = []
+        buckets = self._token_buckets
+        for text in text_list:
+            start = len(cols)
+            for token in (text or "").strip().lower().split():
+                token_cols, token_weights = buckets(token)
+                cols.extend(token_cols)
+                weights.extend(token_weights)
+            row_lengths.append(len(cols) - start)
+
+        if cols:
+            rows = np.repeat(np.arange(len(text_list)), row_lengths)
+            np.add.at(matrix, (rows, np.asarray(cols)), np.asarray(weights, dtype=np.float32))
+        return matrix
+
+    def _compute_token_buckets(self, token: str) -> Tuple[Tuple[int, ...], Tuple[float, ...]]:
+        """Return the buckets and weights one token contributes to a vector."""
+
+        cols = [self._bucket(token, bigram=False)]
+        for i in range(len(token) - 1):
+            cols.append(self._bucket(token[i : i + 2], bigram=True))
+        weights = (TOKEN_WEIGHT,) + (BIGRAM_WEIGHT,) * (len(cols) - 1)
+        return tuple(cols), weights
+
+    def _bucket(self, text: str, bigram: bool) -> int:
+        data = text.encode("utf-8")
+        if self.hash_scheme == "fast":
+            return zlib.crc32(data, 1 if bigram else 0) % self.dim
+        digest = hashlib.sha1(data).digest() if bigram else hashlib.md5(data).digest()
+        return int.from_bytes(digest, "big") % self.dim
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Local CPU sentence-transformer model, optionally through ONNX Runtime.
+
+    Requires the optional ``sentence-transformers`` package (plus
+    ``optimum[onnxruntime]`` for ``use_onnx``). The model is loaded on first use.
+    """
+
+    batched = True
+
+    def __init__(self, model_name: str, use_onnx: bool = True) -> None:
+        self.name = model_name
+        self.use_onnx = use_onnx
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def dim(self) -> int:  # type: ignore[override]
+        return int(self._load().get_sentence_embedding_dimension())
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                except ImportError as exc:  # pragma: no cover - optional dependency
+                    raise RuntimeError(
+                        "sentence-transformers is not installed; "
+                        "install it to use embedding_backend=sentence_transformers"
+                    ) from exc
+                kwargs = {"device": "cpu"}
+                if self.use_onnx:
+                    kwargs["backend"] = "onnx"
+                self._model = SentenceTransformer(self.name, **kwargs)
+            return self._model
+
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        model = self._load()
+        with self._lock:
+            vectors = model.encode(
+                list(texts),
+                batch_size=max(len(texts), 1),
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class BatchingEmbedder:
+    """Coalesce concurrent embed calls into shared forward passes.
+
+    Requests queue up for at most ``max_wait_ms`` (or until ``max_batch_size``
+    texts are waiting) and are then run through the backend together on a
+    worker thread, so parallel chat requests share one model invocation.
+    """
+
+    def __init__(self, backend: EmbeddingBackend, max_batch_size: int = 32, max_wait_ms: float = 5.0) -> None:
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: asyncio.Queue[Tuple[List[str], asyncio.Future]] | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.backend.dim), dtype=np.float32)
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        future: asyncio.Future = loop.create_future()
+        await self._queue.put((list(texts), future))
+        return await future
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            size = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                matrix = await asyncio.to_thread(self.backend.embed_batch, texts)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                count = len(request_texts)
+                if not future.done():
+                    future.set_result(matrix[offset : offset + count])
+                offset += count
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    settings = get_settings()
+    if settings.embedding_backend == "sentence_transformers":
+        return SentenceTransformerBackend(settings.embedding_model, use_onnx=settings.embedding_onnx)
+    return HashingEmbeddingBackend(hash_scheme=settings.embedding_hash_scheme)
+
+
+class EmbeddingService:
+    """Generate and convert embeddings for semantic memory and RAG.
+
+    Vector generation is delegated to an :class:`EmbeddingBackend`; the
+    feature-hashing backend is the default.
+    """
+
+    def __init__(
+        self,
+        backend: EmbeddingBackend | None = None,
+        quantization: EmbeddingQuantization = "float32",
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ) -> None:
+        self.backend = backend or HashingEmbeddingBackend()
+        self.quantization = quantization
+        self._batcher = BatchingEmbedder(self.backend, max_batch_size, max_wait_ms) if self.backend.batched else None
+
+    @property
+    def dim(self) -> int:
+        return self.backend.dim
+
+    @property
+    def model_name(self) -> str:
+        return self.backend.name
 
     def embed(self, texts: Iterable[str]) -> List[List[float]]:
-        vectors: List[List[float]] = []
-        for text in texts:
-            vectors.append(self._embed_text(text))
-        return vectors
-
-    def _embed_text(self, text: str) -> List[float]:
-        vec = [0.0] * self.dim
-        normalized = (text or "").strip().lower()
-        if not normalized:
-            return vec
-
-        tokens = normalized.split()
-        for token in tokens:
-            h = int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
-            idx = h % self.dim
-            vec[idx] += 1.0
-
-            if len(token) > 1:
-                for i in range(len(token) - 1):
-                    bigram = token[i : i + 2]
-                    hb = int(hashlib.sha1(bigram.encode("utf-8")).hexdigest(), 16)
-                    idx_bi = hb % self.dim
-                    vec[idx_bi] += 0.5
-
-        return vec
+        return self.embed_batch(list(texts)).tolist()
 
-    @staticmethod
-    def to_bytes(vector: Sequence[float]) -> bytes:
-        return pickle.dumps(list(vector), protocol=pickle.HIGHEST_PROTOCOL)
+    def embed_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed ``texts`` into a ``(len(texts), dim)`` float32 matrix in one pass."""
+
+        return self.backend.embed_batch(list(texts))
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """Async variant of :meth:`embed_batch` that never blocks on model inference.
+
+        Model backends go through the micro-batching queue; the hashing backend
+        is cheap enough to run inline.
+        """
+
+        if self._batcher is not None:
+            return await self._batcher.embed(list(texts))
+        return self.embed_batch(texts)
+
+    def to_bytes(
+        self,
+        vector: Sequence[float] | np.ndarray,
+        quantization: EmbeddingQuantization | None = None,
+    ) -> bytes:
+        values = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if (quantization or self.quantization) == "int8":
+            peak = float(np.max(np.abs(values))) if values.size else 0.0
+            scale = peak / 127.0 if peak > 0.0 else 1.0
+            payload = np.round(values / scale).astype(np.int8)
+            header = EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_FORMAT_VERSION, _DTYPE_INT8, scale)
+            return header + payload.tobytes()
+        header = EMBEDDING_HEADER.pack(EMBEDDING_MAGIC, EMBEDDING_FORMAT_VERSION, _DTYPE_FLOAT32, 1.0)
+        return header + values.astype("<f4", copy=False).tobytes()
+
+    def decode(self, blob: bytes) -> np.ndarray:
+        """Decode an embedding blob into a float32 array.
+
+        float32 payloads are returned as a read-only view over ``blob``; int8
+        payloads are rescaled. Legacy pickled blobs are still readable.
+        """
+
+        if not self.is_legacy(blob):
+            _, version, dtype, scale = EMBEDDING_HEADER.unpack_from(blob)
+            if version != EMBEDDING_FORMAT_VERSION:
+                raise ValueError(f"Unsupported embedding format version: {version}")
+            if dtype == _DTYPE_FLOAT32:
+                return np.frombuffer(blob, dtype="<f4", offset=EMBEDDING_HEADER.size)
+            if dtype == _DTYPE_INT8:
+                payload = np.frombuffer(blob, dtype=np.int8, offset=EMBEDDING_HEADER.size)
+                return payload.astype(np.float32) * np.float32(scale)
+            raise ValueError(f"Unsupported embedding dtype code: {dtype}")
+
+        obj = _LegacyEmbeddingUnpickler(io.BytesIO(blob)).load()
+        return np.asarray([float(x) for x in obj], dtype=np.float32)
+
+    def from_bytes(self, blob: bytes) -> List[float]:
+        return self.decode(blob).tolist()
 
     @staticmethod
-    def from_bytes(blob: bytes) -> List[float]:
-        obj = pickle.loads(blob)
-        if isinstance(obj, list):
-            return obj
-        if isinstance(obj, tuple):
-            return list(obj)
-        try:
-            return [float(x) for x in obj]
-        except Exception:
-            return []
+    def is_legacy(blob: bytes) -> bool:
+        return blob[: len(EMBEDDING_MAGIC)] != EMBEDDING_MAGIC
 
     @staticmethod
     def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
@@ -70,4 +337,9 @@ class EmbeddingService:
         return float(dot / (norm_a * norm_b))
 
 
-embedding_service = EmbeddingService()
+embedding_service = EmbeddingService(
+    backend=get_embedding_backend(),
+    quantization=get_settings().embedding_quantization,
+    max_batch_size=get_settings().embedding_batch_size,
+    max_wait_ms=get_settings().embedding_batch_wait_ms,
+)
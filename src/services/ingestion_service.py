@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import codecs
+import itertools
+import logging
+import tempfile
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from fastapi import UploadFile
+
+from ..core.config import get_settings
+from .chunking_service import iter_chunks
+from .memory_service import MemoryService, memory_service
+from .ocr_service import ocr_service
+
+logger = logging.getLogger(__name__)
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TEXT_TYPE = "text/plain"
+SUPPORTED_TYPES = (DOCX_TYPE, PDF_TYPE, TEXT_TYPE)
+
+# Upload bytes copied per read, and text read per block from plain files.
+SPOOL_CHUNK_BYTES = 1 << 20
+TEXT_BLOCK_BYTES = 1 << 16
+# Finished jobs kept for status queries.
+MAX_FINISHED_JOBS = 100
+
+
+@dataclass
+class IngestionJob:
+    id: str
+    project_id: int
+    filename: str
+    status: str = "pending"  # pending | running | completed | failed
+    pages: int = 0
+    chunks: int = 0
+    memory_ids: List[int] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["memory_ids"] = list(dict.fromkeys(self.memory_ids))
+        data["created_at"] = self.created_at.isoformat()
+        data["finished_at"] = self.finished_at.isoformat() if self.finished_at else None
+        return data
+
+
+def iter_document_text(path: Path, content_type: str, on_page: Callable[[], None]) -> Iterator[str]:
+    """Yield a document's text page by page (or block by block), calling ``on_page`` per unit."""
+
+    if content_type == PDF_TYPE:
+        from pypdf import PdfReader
+
+        for page in PdfReader(path).pages:
+            text = page.extract_text() or ""
+            on_page()
+            yield f"{text}\n\n"
+    elif content_type == DOCX_TYPE:
+        from docx import Document
+
+        paragraphs = (paragraph.text for paragraph in Document(str(path)).paragraphs)
+        while block := list(itertools.islice(paragraphs, 200)):
+            on_page()
+            yield "\n\n".join(block) + "\n\n"
+    else:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with path.open("rb") as handle:
+            while raw := handle.read(TEXT_BLOCK_BYTES):
+                on_page()
+                yield decoder.decode(raw)
+        yield decoder.decode(b"", final=True)
+
+
+class IngestionService:
+    """Stream uploaded documents into chunked, embedded memories.
+
+    Text is extracted and chunked lazily on a worker thread; each batch of
+    ``ingest_batch_size`` chunks is then embedded off the event loop and
+    stored in one transaction while the next batch is being extracted.
+    """
+
+    def __init__(self, memories: MemoryService | None = None) -> None:
+        self.settings = get_settings()
+        self.memory_service = memories or memory_service
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def spool(self, upload: UploadFile) -> Path:
+        """Copy an upload to a temporary file without holding it in memory."""
+
+        upload_dir = self.settings.data_dir / "uploads"
+        upload_dir.mkdir(parents=True, exist_ok=True)
+        suffix = Path(upload.filename or "").suffix
+        with tempfile.NamedTemporaryFile(delete=False, dir=upload_dir, suffix=suffix) as handle:
+            while data := await upload.read(SPOOL_CHUNK_BYTES):
+                await asyncio.to_thread(handle.write, data)
+            return Path(handle.name)
+
+    def create_job(self, project_id: int, filename: str) -> IngestionJob:
+        job = IngestionJob(id=uuid.uuid4().hex, project_id=project_id, filename=filename)
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def start(
+        self,
+        job: IngestionJob,
+        path: Path,
+        content_type: str,
+        tags: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Run :meth:`run` in the background; progress is read from ``job``."""
+
+        task = asyncio.create_task(self.run(job, path, content_type, tags))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(
+        self,
+        job: IngestionJob,
+        path: Path,
+        content_type: str,
+        tags: Optional[Sequence[str]] = None,
+    ) -> IngestionJob:
+        """Ingest the spooled file at ``path`` and delete it afterwards."""
+
+        job.status = "running"
+        try:
+            await self._ingest(job, path, content_type, list(tags or ()))
+            if not job.memory_ids:
+                raise ValueError("No text content could be extracted from the document")
+            job.status = "completed"
+        except Exception as exc:
+            logger.exception("Ingestion of %s failed", job.filename)
+            job.status = "failed"
+            job.error = str(exc)
+        finally:
+            job.finished_at = datetime.utcnow()
+            path.unlink(missing_ok=True)
+        return job
+
+    async def _ingest(self, job: IngestionJob, path: Path, content_type: str, tags: List[str]) -> None:
+        def count_page() -> None:
+            job.pages += 1
+
+        chunks = iter_chunks(iter_document_text(path, content_type, count_page))
+        batch_size = self.settings.ingest_batch_size
+        next_batch = asyncio.create_task(asyncio.to_thread(_take, chunks, batch_size))
+        try:
+            while batch := await next_batch:
+                # Extract and chunk the following batch while this one is
+                # embedded and stored.
+                next_batch = asyncio.create_task(asyncio.to_thread(_take, chunks, batch_size))
+                await self._store(job, batch, tags)
+        finally:
+            # Let an in-flight extraction finish before the file is removed.
+            await asyncio.gather(next_batch, return_exceptions=True)
+
+        if not job.memory_ids and content_type in (PDF_TYPE, DOCX_TYPE):
+            # Scanned documents have no text layer; fall back to OCR.
+            if content_type == PDF_TYPE:
+                result = await ocr_service.extract_text_from_pdf(str(path))
+            else:
+                result = await ocr_service.extract_text_from_document(str(path), True)
+            fallback = iter_chunks([result.get("text", "")])
+            while batch := _take(fallback, batch_size):
+                await self._store(job, batch, tags)
+
+    async def _store(self, job: IngestionJob, batch: List[str], tags: List[str]) -> None:
+        ids = await self.memory_service.store_document_chunks(
+            job.project_id, batch, job.chunks, job.filename, tags
+        )
+        job.chunks += len(batch)
+        job.memory_ids.extend(ids)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[: max(len(finished) - MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+
+def _take(chunks: Iterator[str], count: int) -> List[str]:
+    return list(itertools.islice(chunks, count))
+
+
+ingestion_service = IngestionService()
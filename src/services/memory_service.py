@@ -1,13 +1,61 @@
 from __future__ import annotations
 
 import asyncio
+import heapq
+import itertools
+import logging
 import re
+from contextlib import suppress
 from dataclasses import dataclass
-from typing import Iterable, List, Optional
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence
 
-from ..core.models import MemoryRecord
-from .conversation_service import ConversationService, conversation_service
-from .embedding_service import embedding_service
+import numpy as np
+from sqlalchemy.exc import OperationalError
+
+from ..core.cache import TTLCache
+from ..core.config import get_settings
+from ..core.database import get_data_version, set_data_version
+from ..core.models import MemoryRecord, ProviderType
+from .chunking_service import iter_chunks
+from .conversation_service import (
+    RETENTION_POLICY_FIELDS,
+    ConversationService,
+    MemoryDraft,
+    MemoryFilter,
+    conversation_service,
+)
+from .dedup_service import DedupService, SimHashLSH, dedup_service, simhash, to_signed
+from .embedding_service import EMBEDDING_FORMAT_VERSION, embedding_service
+from .vector_index_service import MemoryAttributes, VectorIndexService, vector_index_service
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal-rank fusion constant and how many candidates each ranking
+# contributes per requested result.
+RRF_K = 60
+HYBRID_CANDIDATE_FACTOR = 4
+# Extra candidates fetched when age decay may reorder them.
+DECAY_CANDIDATE_FACTOR = 3
+# Words left out of keyword queries: they match nearly every memory.
+STOPWORDS = frozenset(
+    """
+    a about above after again all am an and any are as at be because been before being below between both
+    but by can could did do does doing down during each few for from further had has have having he her
+    here hers him his how i if in into is it its itself just like me more most my no nor not now of off on
+    once only or other our ours out over own same she should so some such than that the their theirs them
+    then there these they this those through to too under until up very was we were what when where which
+    while who whom why will with would you your yours
+    """.split()
+)
+
+
+@dataclass
+class MemoryInput:
+    content: str
+    summary: Optional[str] = None
+    tags: Iterable[str] = ()
+    metadata: Optional[dict] = None
 
 
 @dataclass
@@ -17,14 +65,39 @@ class MemoryMatch:
     metadata: Optional[dict]
 
 
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Effective retention rules of a project; 0 disables a rule."""
+
+    max_memories: int = 0
+    archive_after_days: float = 0.0
+    decay_half_life_days: float = 0.0
+    rollup_after_days: float = 0.0
+    rollup_group_size: int = 20
+    rollup_provider: Optional[ProviderType] = None
+    rollup_model: Optional[str] = None
+
+
 class MemoryService:
     """Manage long-term memory storage and semantic retrieval."""
 
     def __init__(
         self,
         convo_service: ConversationService | None = None,
+        vector_index: VectorIndexService | None = None,
+        dedup: DedupService | None = None,
     ) -> None:
+        self.settings = get_settings()
         self.conversation_service = convo_service or conversation_service
+        self.vector_index = vector_index or vector_index_service
+        self.dedup = dedup or dedup_service
+        self._results: TTLCache[tuple[MemoryMatch, ...]] = TTLCache(
+            self.settings.memory_cache_size, self.settings.memory_cache_ttl_seconds
+        )
+        self._query_vectors: TTLCache[np.ndarray] = TTLCache(
+            self.settings.memory_cache_size, self.settings.memory_cache_ttl_seconds
+        )
+        self._policies: Dict[int, RetentionPolicy] = {}
 
     async def add_memory(
         self,
@@ -34,24 +107,42 @@ class MemoryService:
         tags: Optional[Iterable[str]] = None,
         metadata: Optional[dict] = None,
     ) -> MemoryRecord:
-        text_for_embedding = (summary or content or "").strip()
-        embedding_bytes: Optional[bytes] = None
-        if text_for_embedding:
-            try:
-                vectors = embedding_service.embed([text_for_embedding])
-                if vectors:
-                    embedding_bytes = embedding_service.to_bytes(vectors[0])
-            except Exception:
-                embedding_bytes = None
-
-        return await self.conversation_service.store_memory(
-            project_id=project_id,
-            content=content,
-            summary=summary,
-            embedding=embedding_bytes,
-            tags=tags,
-            metadata=metadata,
-        )
+        vector = (await self._embed_for_storage([(summary or content or "").strip()]))[0]
+        memory = MemoryInput(content=content, summary=summary, tags=tags or (), metadata=metadata)
+        ids = await self._store_batch(project_id, [memory], [vector])
+        return (await self.conversation_service.get_memories(ids))[0]
+
+    async def add_memories(self, project_id: int, memories: Sequence[MemoryInput]) -> List[int]:
+        """Store many memories and return one id per input.
+
+        Embedding runs on a worker thread, ``ingest_batch_size`` memories at a
+        time, overlapping with the bulk insert of the previous batch, so large
+        imports do not stall other requests. Like :meth:`add_memory`, a
+        near-duplicate input resolves to the id of the memory it was merged into.
+        """
+
+        size = self.settings.ingest_batch_size
+        batches = [memories[start : start + size] for start in range(0, len(memories), size)]
+        ids: List[int] = []
+        next_vectors = asyncio.create_task(self._embed_memories(batches[0])) if batches else None
+        try:
+            for position, batch in enumerate(batches):
+                vectors = await next_vectors
+                if position + 1 < len(batches):
+                    next_vectors = asyncio.create_task(self._embed_memories(batches[position + 1]))
+                ids.extend(await self._store_batch(project_id, batch, vectors))
+        finally:
+            # After a failed store, stop embedding the next batch and consume
+            # its outcome so the task is neither leaked nor left unobserved.
+            if next_vectors is not None:
+                next_vectors.cancel()
+                with suppress(asyncio.CancelledError, Exception):
+                    await next_vectors
+        return ids
+
+    async def _embed_memories(self, memories: Sequence[MemoryInput]) -> List[Optional[np.ndarray]]:
+        texts = [(memory.summary or memory.content or "").strip() for memory in memories]
+        return await self._embed_for_storage(texts, offload=True)
 
     async def add_document_memories(
         self,
@@ -60,21 +151,205 @@ class MemoryService:
         source: Optional[str] = None,
         tags: Optional[Iterable[str]] = None,
     ) -> List[MemoryRecord]:
-        chunks = self._chunk_text(text)
-        records: List[MemoryRecord] = []
-        for index, chunk in enumerate(chunks):
-            chunk_metadata = {"type": "document", "chunk_index": index}
+        tags = list(tags or ())
+        ids: List[int] = []
+        chunks = iter_chunks([text])
+        while batch := list(itertools.islice(chunks, self.settings.ingest_batch_size)):
+            ids.extend(await self.store_document_chunks(project_id, batch, len(ids), source, tags))
+        return await self.conversation_service.get_memories(ids)
+
+    async def store_document_chunks(
+        self,
+        project_id: int,
+        chunks: List[str],
+        first_index: int,
+        source: Optional[str],
+        tags: Sequence[str],
+    ) -> List[int]:
+        """Embed one batch of document chunks off the event loop and store it."""
+
+        vectors = await self._embed_for_storage(chunks, offload=True)
+        memories = []
+        for offset, chunk in enumerate(chunks):
+            chunk_metadata = {"type": "document", "chunk_index": first_index + offset}
             if source:
                 chunk_metadata["source"] = source
-            record = await self.add_memory(
-                project_id=project_id,
-                content=chunk,
-                summary=None,
-                tags=tags,
-                metadata=chunk_metadata,
+            memories.append(MemoryInput(content=chunk, tags=tags, metadata=chunk_metadata))
+        return await self._store_batch(project_id, memories, vectors)
+
+    async def _store_batch(
+        self,
+        project_id: int,
+        memories: Sequence[MemoryInput],
+        vectors: Sequence[Optional[np.ndarray]],
+    ) -> List[int]:
+        """Insert memories in one transaction, folding near-duplicates per ``memory_dedup``.
+
+        Returns the id each input ended up as: its new row, or the existing
+        (or earlier in-batch) memory it duplicates.
+        """
+
+        dedup = self.settings.memory_dedup != "off"
+        merge = self.settings.memory_dedup == "merge"
+        ids: List[int] = [0] * len(memories)
+        twins: dict[int, int] = {}
+        positions: List[int] = []
+        drafts: List[MemoryDraft] = []
+        fingerprints: List[Optional[int]] = []
+        async with self.dedup.lock(project_id):
+            in_batch = SimHashLSH(self.settings.memory_dedup_max_distance)
+            for position, (memory, vector) in enumerate(zip(memories, vectors)):
+                tags = list(dict.fromkeys(label.strip() for label in memory.tags if label.strip()))
+                fingerprint = simhash(memory.content or memory.summary or "")
+                if dedup and fingerprint is not None:
+                    duplicate_id = await self._merge_duplicate(project_id, fingerprint, tags if merge else [])
+                    if duplicate_id is not None:
+                        ids[position] = duplicate_id
+                        continue
+                    twin = in_batch.nearest(fingerprint)
+                    if twin is not None:
+                        if merge:
+                            drafts[twin].tags = list(dict.fromkeys([*drafts[twin].tags, *tags]))
+                        twins[position] = twin
+                        continue
+                    in_batch.add(len(drafts), fingerprint)
+                positions.append(position)
+                fingerprints.append(fingerprint)
+                drafts.append(
+                    MemoryDraft(
+                        content=memory.content,
+                        summary=memory.summary,
+                        embedding=embedding_service.to_bytes(vector) if vector is not None else None,
+                        embedding_model=embedding_service.model_name,
+                        embedding_dim=embedding_service.dim,
+                        fingerprint=to_signed(fingerprint) if fingerprint is not None else 0,
+                        tags=tags,
+                        metadata=memory.metadata,
+                    )
+                )
+            stored = await self.conversation_service.store_memories(project_id, drafts)
+            for (memory_id, _), position, fingerprint in zip(stored, positions, fingerprints):
+                ids[position] = memory_id
+                if fingerprint is not None:
+                    self.dedup.register(project_id, memory_id, fingerprint)
+        for position, twin in twins.items():
+            ids[position] = stored[twin][0]
+
+        indexed = [
+            (memory_id, vectors[position], draft, created_at)
+            for (memory_id, created_at), position, draft in zip(stored, positions, drafts)
+            if vectors[position] is not None
+        ]
+        if indexed:
+            self.vector_index.add(
+                project_id,
+                [memory_id for memory_id, *_ in indexed],
+                np.stack([vector for _, vector, _, _ in indexed]),
+                [
+                    MemoryAttributes(
+                        tags=tuple(draft.tags),
+                        memory_type=(draft.metadata or {}).get("type"),
+                        source=(draft.metadata or {}).get("source"),
+                        created_at=created_at,
+                    )
+                    for _, _, draft, created_at in indexed
+                ],
+            )
+        if len(indexed) < len(drafts) or len(drafts) < len(memories):
+            # Rows without vectors and merged tags change keyword results.
+            self.vector_index.touch(
+                project_id,
+                [memory_id for (memory_id, _), position in zip(stored, positions) if vectors[position] is None],
             )
-            records.append(record)
-        return records
+        return ids
+
+    async def _merge_duplicate(self, project_id: int, fingerprint: int, tags: List[str]) -> Optional[int]:
+        duplicate_id = await self.dedup.find_duplicate(project_id, fingerprint)
+        if duplicate_id is None:
+            return None
+        if not await self.conversation_service.get_memories([duplicate_id]):
+            # Deleted behind the fingerprint index's back; reload it.
+            self.dedup.invalidate(project_id)
+            return None
+        if tags:
+            added = await self.conversation_service.add_memory_tags(duplicate_id, tags)
+            if added:
+                self.vector_index.add_tags(project_id, duplicate_id, added)
+        return duplicate_id
+
+    async def deduplicate(self, project_id: int) -> dict:
+        """Merge existing near-duplicate memories of a project into the oldest copy."""
+
+        async with self.dedup.lock(project_id):
+            merges, scanned, fingerprinted = await self.dedup.plan(project_id)
+            await self.conversation_service.merge_memories(merges)
+        if merges:
+            self.vector_index.remove(project_id, list(merges))
+        return {"scanned": scanned, "fingerprinted": fingerprinted, "removed": len(merges)}
+
+    async def archive_memories(
+        self,
+        project_id: int,
+        memory_ids: Sequence[int],
+        reason: str,
+        rolled_up_into: Optional[int] = None,
+    ) -> int:
+        """Move memories to the archive table, out of the search indexes."""
+
+        if not memory_ids:
+            return 0
+        async with self.dedup.lock(project_id):
+            moved = await self.conversation_service.archive_memories(memory_ids, reason, rolled_up_into)
+            self.dedup.invalidate(project_id)
+        self.vector_index.remove(project_id, list(memory_ids))
+        self.vector_index.compact(project_id)
+        return moved
+
+    async def get_retention_policy(self, project_id: int) -> RetentionPolicy:
+        """The project's retention policy, with unset fields taken from settings."""
+
+        policy = self._policies.get(project_id)
+        if policy is not None:
+            return policy
+        defaults = {
+            "max_memories": self.settings.memory_retention_max_count,
+            "archive_after_days": self.settings.memory_retention_archive_after_days,
+            "decay_half_life_days": self.settings.memory_decay_half_life_days,
+            "rollup_after_days": self.settings.memory_rollup_after_days,
+            "rollup_group_size": self.settings.memory_rollup_group_size,
+        }
+        stored = await self.conversation_service.get_retention_policy(project_id)
+        if stored is not None:
+            for name in RETENTION_POLICY_FIELDS:
+                value = getattr(stored, name)
+                if value is not None:
+                    defaults[name] = value
+        policy = RetentionPolicy(**defaults)
+        self._policies[project_id] = policy
+        return policy
+
+    async def set_retention_policy(self, project_id: int, overrides: dict) -> RetentionPolicy:
+        """Store per-project overrides; fields left out fall back to settings."""
+
+        await self.conversation_service.save_retention_policy(project_id, overrides)
+        self._policies.pop(project_id, None)
+        return await self.get_retention_policy(project_id)
+
+    @staticmethod
+    async def _embed_for_storage(texts: List[str], offload: bool = False) -> List[Optional[np.ndarray]]:
+        """Embed ``texts`` in one batch; empty texts and failures yield ``None``.
+
+        ``offload`` runs the whole batch on a worker thread, for bulk ingestion.
+        """
+
+        try:
+            if offload:
+                matrix = await asyncio.to_thread(embedding_service.embed_batch, texts)
+            else:
+                matrix = await embedding_service.aembed(texts)
+        except Exception:
+            return [None] * len(texts)
+        return [matrix[i] if text.strip() else None for i, text in enumerate(texts)]
 
     async def search_memories(
         self,
@@ -82,48 +357,229 @@ class MemoryService:
         query: str,
         top_k: int = 5,
         min_score: float = 0.35,
+        filters: Optional[MemoryFilter] = None,
     ) -> List[MemoryMatch]:
-        if not query.strip():
+        """Return the best memories for ``query``.
+
+        ``filters`` restricts the candidates before ranking, so ``top_k`` hits
+        are returned even when the filter is selective.
+
+        With hybrid search enabled, vector hits (cosine >= ``min_score``) and
+        BM25 keyword hits are fused by reciprocal rank, and ``score`` is the
+        fused score scaled so that ranking first in both lists gives 1.0.
+        Keyword hits must contain every non-stopword of the query, so a memory
+        the vectors rejected only comes back on a full keyword match.
+        Otherwise, or when no memory matches the keywords, ``score`` is the
+        cosine similarity.
+
+        Results are cached per project index generation, so repeated queries
+        (retries, regenerations, automation prompts) skip retrieval until a
+        memory is written.
+
+        When the project's retention policy sets a decay half-life, scores are
+        weighted by ``0.5 ** (age / half_life)`` after ``min_score`` is applied
+        and the hits are re-ranked.
+        """
+
+        query = " ".join(query.split())
+        if not query:
             return []
 
-        records = await self.conversation_service.list_memories(project_id=project_id)
-        scored: List[MemoryMatch] = []
-        use_embeddings = False
-        query_vector = None
+        # Read the generation first: a write racing with this search moves the
+        # index on, so a possibly stale result is stored under a dead key.
+        generation = await self.vector_index.generation(project_id)
+        half_life = (await self.get_retention_policy(project_id)).decay_half_life_days
+        cache_key = (
+            project_id,
+            query,
+            top_k,
+            min_score,
+            filters,
+            half_life,
+            self.settings.memory_hybrid_search,
+            generation,
+        )
+        cached = self._results.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
+        if half_life:
+            matches = await self._search_uncached(
+                project_id, query, top_k * DECAY_CANDIDATE_FACTOR, min_score, filters
+            )
+            matches = self._decay(matches, half_life)[:top_k]
+        else:
+            matches = await self._search_uncached(project_id, query, top_k, min_score, filters)
+        self._results.set(cache_key, tuple(matches))
+        return matches
+
+    def cache_stats(self) -> dict:
+        return {
+            "results": self._results.stats(),
+            "query_embeddings": self._query_vectors.stats(),
+        }
+
+    async def _search_uncached(
+        self,
+        project_id: int,
+        query: str,
+        top_k: int,
+        min_score: float,
+        filters: Optional[MemoryFilter],
+    ) -> List[MemoryMatch]:
+        query_vector = await self._embed_query(query)
+
+        hybrid = self.settings.memory_hybrid_search or query_vector is None
+        candidate_k = top_k * HYBRID_CANDIDATE_FACTOR if hybrid else top_k
+
+        vector_hits: List[tuple[int, float]] = []
+        if query_vector is not None:
+            vector_hits = await self.vector_index.search(
+                project_id,
+                query_vector,
+                top_k=candidate_k,
+                min_score=min_score,
+                filters=filters,
+            )
+        if not hybrid:
+            return await self._hydrate(vector_hits)
+
+        keyword_hits = await self._keyword_search(project_id, query, candidate_k, filters)
+        if keyword_hits is None:
+            if query_vector is None:
+                return await self._scan_plain(project_id, query, top_k, min_score, filters)
+            return await self._hydrate(vector_hits[:top_k])
+        if not keyword_hits and query_vector is not None:
+            # Nothing to fuse: keep the cosine scores min_score was applied to.
+            return await self._hydrate(vector_hits[:top_k])
+        return await self._hydrate(self._fuse([vector_hits, keyword_hits], top_k))
+
+    @staticmethod
+    def _decay(matches: List[MemoryMatch], half_life_days: float) -> List[MemoryMatch]:
+        now = datetime.utcnow()
+        for match in matches:
+            age_days = max((now - match.record.created_at).total_seconds(), 0.0) / 86400.0
+            match.score *= 0.5 ** (age_days / half_life_days)
+        return sorted(matches, key=lambda match: match.score, reverse=True)
+
+    async def _embed_query(self, query: str) -> Optional[np.ndarray]:
+        cache_key = (embedding_service.model_name, query)
+        vector = self._query_vectors.get(cache_key)
+        if vector is not None:
+            return vector
         try:
-            vectors = embedding_service.embed([query])
-            if vectors:
-                query_vector = vectors[0]
-                use_embeddings = True
+            vector = (await embedding_service.aembed([query]))[0]
         except Exception:
-            use_embeddings = False
+            return None
+        self._query_vectors.set(cache_key, vector)
+        return vector
 
-        if use_embeddings and query_vector is not None:
-            for record in records:
-                if not record.embedding:
-                    continue
-                try:
-                    vector = embedding_service.from_bytes(record.embedding)
-                except Exception:
-                    continue
-                score = embedding_service.cosine_similarity(query_vector, vector)
-                if score < min_score:
-                    continue
-                metadata = self._deserialize_metadata(record)
-                scored.append(MemoryMatch(record=record, score=score, metadata=metadata))
-        else:
-            for record in records:
-                text = (record.summary or record.content or "").strip()
+    async def _keyword_search(
+        self,
+        project_id: int,
+        query: str,
+        limit: int,
+        filters: Optional[MemoryFilter] = None,
+    ) -> Optional[List[tuple[int, float]]]:
+        """BM25 hits containing every non-stopword of ``query``, or ``None`` when
+        the FTS index is unavailable."""
+
+        terms = [term for term in dict.fromkeys(re.findall(r"\w+", query.lower())) if term not in STOPWORDS]
+        if not terms:
+            return []
+        try:
+            return await self.conversation_service.search_memory_keywords(
+                project_id, terms, limit, filters, match_all=True
+            )
+        except OperationalError as exc:
+            logger.debug("Keyword memory search unavailable: %s", exc)
+            return None
+
+    @staticmethod
+    def _fuse(rankings: Iterable[List[tuple[int, float]]], top_k: int) -> List[tuple[int, float]]:
+        """Reciprocal-rank fusion of several ``(id, score)`` rankings."""
+
+        rankings = list(rankings)
+        fused: dict[int, float] = {}
+        for ranking in rankings:
+            for rank, (memory_id, _) in enumerate(ranking, start=1):
+                fused[memory_id] = fused.get(memory_id, 0.0) + 1.0 / (RRF_K + rank)
+        best = len(rankings) / (RRF_K + 1)
+        ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(memory_id, score / best) for memory_id, score in ordered]
+
+    async def _hydrate(self, hits: List[tuple[int, float]]) -> List[MemoryMatch]:
+        scores = dict(hits)
+        records = await self.conversation_service.get_memories(memory_id for memory_id, _ in hits)
+        return [
+            MemoryMatch(
+                record=record,
+                score=scores[record.id],
+                metadata=self._deserialize_metadata(record),
+            )
+            for record in records
+        ]
+
+    async def _scan_plain(
+        self,
+        project_id: int,
+        query: str,
+        top_k: int,
+        min_score: float,
+        filters: Optional[MemoryFilter] = None,
+    ) -> List[MemoryMatch]:
+        """Token-overlap ranking over streamed text columns; newest first on ties."""
+
+        heap: List[tuple[float, int]] = []
+        async for chunk in self.conversation_service.stream_memory_texts(
+            project_id, chunk_size=self.settings.memory_scan_chunk_size, filters=filters
+        ):
+            for memory_id, content, summary in chunk:
+                text = (summary or content or "").strip()
                 if not text:
                     continue
-                score = self._score_plain(query, text)
-                if score < min_score:
+                item = (self._score_plain(query, text), memory_id)
+                if item[0] < min_score:
+                    continue
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return await self._hydrate([(memory_id, score) for score, memory_id in sorted(heap, reverse=True)])
+
+    async def migrate_legacy_embeddings(self, batch_size: int = 500) -> int:
+        """Rewrite pickled embedding blobs in the binary format, once per database.
+
+        Completion is recorded in SQLite's ``user_version`` so later startups
+        skip the scan. Blobs that cannot be decoded are cleared.
+        """
+
+        if await get_data_version() >= EMBEDDING_FORMAT_VERSION:
+            return 0
+
+        migrated = 0
+        last_id = 0
+        while True:
+            rows = await self.conversation_service.list_embedding_page(last_id, batch_size)
+            if not rows:
+                break
+            rewritten: dict[int, Optional[bytes]] = {}
+            for memory_id, blob in rows:
+                if not embedding_service.is_legacy(blob):
                     continue
-                metadata = self._deserialize_metadata(record)
-                scored.append(MemoryMatch(record=record, score=score, metadata=metadata))
+                try:
+                    rewritten[memory_id] = embedding_service.to_bytes(embedding_service.decode(blob))
+                except Exception:
+                    rewritten[memory_id] = None
+            await self.conversation_service.update_memory_embeddings(rewritten)
+            migrated += len(rewritten)
+            last_id = rows[-1][0]
 
-        scored.sort(key=lambda m: m.score, reverse=True)
-        return scored[:top_k]
+        await set_data_version(EMBEDDING_FORMAT_VERSION)
+        if migrated:
+            self.vector_index.invalidate()
+            logger.info("Migrated %s legacy embedding blobs to the binary format", migrated)
+        return migrated
 
     def render_context(self, matches: Iterable[MemoryMatch]) -> Optional[str]:
         matches_list = list(matches)
@@ -171,23 +627,5 @@ class MemoryService:
         union = len(query_tokens | text_tokens)
         return intersection / union
 
-    @staticmethod
-    def _chunk_text(text: str, max_chars: int = 1000, overlap: int = 200) -> List[str]:
-        cleaned = text.replace("\r\n", "\n").replace("\r", "\n")
-        if not cleaned:
-            return []
-        chunks: List[str] = []
-        start = 0
-        length = len(cleaned)
-        while start < length:
-            end = min(start + max_chars, length)
-            segment = cleaned[start:end].strip()
-            if segment:
-                chunks.append(segment)
-            if end >= length:
-                break
-            start = max(end - overlap, 0)
-        return chunks
-
 
 memory_service = MemoryService()
@@ -5,14 +5,17 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Select, select, update
+from sqlalchemy import Select, func, select, update
 from sqlalchemy.exc import IntegrityError
 
 from ..core.database import session_scope
 from ..core.keystore import get_keystore
 from ..core.models import ProviderKey, ProviderType
+from .write_behind_service import WriteBehindService, write_behind_service
 
 FAILURE_THRESHOLD = 3
+# SQLite's current time in the format SQLAlchemy stores DateTime values in.
+SQLITE_NOW_FORMAT = "%Y-%m-%d %H:%M:%f000"
 
 
 @dataclass
@@ -41,8 +44,9 @@ class ProviderKeyDTO:
 class ProviderManager:
     """Manage provider API keys with encryption, rotation, and failover."""
 
-    def __init__(self) -> None:
+    def __init__(self, write_behind: WriteBehindService | None = None) -> None:
         self.keystore = get_keystore()
+        self.write_behind = write_behind or write_behind_service
 
     async def add_key(self, provider: ProviderType, label: str, api_key: str) -> ProviderKeyDTO:
         encrypted = self.keystore.encrypt(api_key)
@@ -65,11 +69,13 @@ class ProviderManager:
             return [ProviderKeyDTO.from_model(key) for key in result]
 
     async def activate_key(self, key_id: int) -> None:
+        await self.write_behind.flush()
         async with session_scope() as session:
             stmt = update(ProviderKey).where(ProviderKey.id == key_id).values(is_active=True, failure_count=0)
             await session.execute(stmt)
 
     async def deactivate_key(self, key_id: int) -> None:
+        await self.write_behind.flush()
         async with session_scope() as session:
             stmt = update(ProviderKey).where(ProviderKey.id == key_id).values(is_active=False)
             await session.execute(stmt)
@@ -81,13 +87,32 @@ class ProviderManager:
                 return None
             return self.keystore.decrypt(key.encrypted_key)
 
-    async def get_next_key(self, provider: ProviderType) -> Optional[tuple[ProviderKey, str]]:
-        async with session_scope() as session:
+    async def get_next_key(self, provider: ProviderType, touch: bool = True) -> Optional[tuple[ProviderKey, str]]:
+        """Pick the healthiest, least recently used active key of ``provider``.
+
+        ``touch`` picks and stamps ``last_used_at`` in one statement, so
+        concurrent selections, in this worker or another, serialize on the
+        write and each moves on to the next key; without it the key is only
+        read.
+        """
+
+        stmt = (
+            select(ProviderKey)
+            .where(ProviderKey.provider == provider, ProviderKey.is_active.is_(True))
+            .order_by(ProviderKey.failure_count, ProviderKey.last_used_at.is_(None).desc(), ProviderKey.last_used_at)
+            .limit(1)
+        )
+        if touch:
             stmt = (
-                select(ProviderKey)
-                .where(ProviderKey.provider == provider, ProviderKey.is_active.is_(True))
-                .order_by(ProviderKey.failure_count, ProviderKey.last_used_at.is_(None).desc(), ProviderKey.last_used_at)
+                update(ProviderKey)
+                .where(ProviderKey.id == stmt.with_only_columns(ProviderKey.id).scalar_subquery())
+                # Stamped by SQLite under the write lock, so stamps follow the
+                # order the selections commit in (millisecond precision).
+                .values(last_used_at=func.strftime(SQLITE_NOW_FORMAT, "now"))
+                .returning(ProviderKey)
+                .execution_options(synchronize_session=False)
             )
+        async with session_scope() as session:
             key = await session.scalar(stmt)
             if not key:
                 return None
@@ -95,20 +120,20 @@ class ProviderManager:
             if decrypted is None:
                 await session.delete(key)
                 return None
-            key.last_used_at = datetime.utcnow()
-            await session.flush()
             return key, decrypted
 
     async def mark_success(self, key_id: int) -> None:
-        async with session_scope() as session:
-            stmt = (
-                update(ProviderKey)
-                .where(ProviderKey.id == key_id)
-                .values(failure_count=0, is_active=True, last_used_at=datetime.utcnow())
-            )
-            await session.execute(stmt)
+        """Queue the reset of ``key_id``'s failure state on the write-behind queue."""
+
+        await self.write_behind.update(
+            ProviderKey,
+            key_id,
+            {"failure_count": 0, "is_active": True},
+        )
 
     async def mark_failure(self, key_id: int) -> None:
+        # A queued success of this key must land before the failure counts.
+        await self.write_behind.flush()
         async with session_scope() as session:
             key = await session.get(ProviderKey, key_id)
             if not key:
@@ -125,6 +150,7 @@ class ProviderManager:
         last_exception: Optional[Exception] = None
 
         while True:
+            # Stamped at selection so concurrent calls spread over the keys.
             next_key = await self.get_next_key(provider)
             if not next_key:
                 if last_exception:
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from ..core.models import MemoryRecord, ProviderType
+from .memory_service import MemoryService, RetentionPolicy, memory_service
+from .summarization_service import SummarizationService, summarization_service
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_SUMMARY_TYPE = "conversation_summary"
+ROLLUP_TYPE = "summary_rollup"
+# Roll-ups are the long-lived tier: age and count limits archive other
+# memories first, and roll-ups only once nothing else is left.
+PROTECTED_TYPES = (ROLLUP_TYPE,)
+
+
+class RetentionService:
+    """Apply per-project retention policies to the memory store.
+
+    A compaction pass folds old conversation summaries into higher-level
+    roll-up summaries (tier by tier), then moves memories past the age limit
+    and the oldest memories beyond the count limit to the archive table.
+    Archived memories leave the vector index and the full-text index, so the
+    hot set a query scores stays bounded as a project ages.
+    """
+
+    def __init__(
+        self,
+        memories: MemoryService | None = None,
+        summarizer: SummarizationService | None = None,
+    ) -> None:
+        self.memory_service = memories or memory_service
+        self.conversation_service = self.memory_service.conversation_service
+        self.summarization_service = summarizer or summarization_service
+
+    async def compact_all(self) -> Dict[int, dict]:
+        """Compact every project; failures are logged and do not stop the pass."""
+
+        results: Dict[int, dict] = {}
+        for project_id in await self.conversation_service.list_project_ids():
+            try:
+                results[project_id] = await self.compact(project_id)
+            except Exception as exc:  # pragma: no cover - runtime errors
+                logger.error("Memory compaction failed for project %s: %s", project_id, exc)
+        return results
+
+    async def compact(self, project_id: int, now: Optional[datetime] = None) -> dict:
+        now = now or datetime.utcnow()
+        policy = await self.memory_service.get_retention_policy(project_id)
+        rolled_up, rollups = await self._roll_up(project_id, policy, now)
+
+        archived_age = 0
+        if policy.archive_after_days:
+            expired = await self.conversation_service.list_oldest_memory_ids(
+                project_id,
+                before=now - timedelta(days=policy.archive_after_days),
+                exclude_types=PROTECTED_TYPES,
+            )
+            archived_age = await self.memory_service.archive_memories(project_id, expired, "age")
+
+        archived_count = 0
+        if policy.max_memories:
+            for exclude_types in (PROTECTED_TYPES, ()):
+                excess = await self.conversation_service.count_memories(project_id) - policy.max_memories
+                if excess <= 0:
+                    break
+                oldest = await self.conversation_service.list_oldest_memory_ids(
+                    project_id, limit=excess, exclude_types=exclude_types
+                )
+                archived_count += await self.memory_service.archive_memories(project_id, oldest, "count")
+
+        result = {
+            "rolled_up": rolled_up,
+            "rollups_created": rollups,
+            "archived_age": archived_age,
+            "archived_count": archived_count,
+        }
+        if any(result.values()):
+            logger.info("Compacted memories of project %s: %s", project_id, result)
+        return result
+
+    async def _roll_up(self, project_id: int, policy: RetentionPolicy, now: datetime) -> Tuple[int, int]:
+        """Fold full groups of old summaries into roll-ups, one tier at a time."""
+
+        if not policy.rollup_after_days:
+            return 0, 0
+        rolled_up = 0
+        created = 0
+        level = 0
+        while True:
+            # Each tier waits one more period than the tier below it.
+            cutoff = now - timedelta(days=policy.rollup_after_days * (level + 1))
+            if level == 0:
+                candidates = await self.conversation_service.list_summary_memories(
+                    project_id, CONVERSATION_SUMMARY_TYPE, cutoff
+                )
+            else:
+                candidates = await self.conversation_service.list_summary_memories(
+                    project_id, ROLLUP_TYPE, cutoff, level=level
+                )
+            if len(candidates) < policy.rollup_group_size:
+                return rolled_up, created
+            size = policy.rollup_group_size
+            for start in range(0, len(candidates) - size + 1, size):
+                group = candidates[start : start + size]
+                rollup_id = await self._create_rollup(project_id, policy, group, level + 1)
+                if rollup_id is None:
+                    # No provider available; retry on the next pass.
+                    return rolled_up, created
+                rolled_up += await self.memory_service.archive_memories(
+                    project_id, [record.id for record in group], "rollup", rolled_up_into=rollup_id
+                )
+                created += 1
+            level += 1
+
+    async def _create_rollup(
+        self,
+        project_id: int,
+        policy: RetentionPolicy,
+        group: List[MemoryRecord],
+        level: int,
+    ) -> Optional[int]:
+        metadata = [self.memory_service._deserialize_metadata(record) or {} for record in group]
+        conversation_id = next(
+            (item["conversation_id"] for item in reversed(metadata) if item.get("conversation_id")), None
+        )
+        target = await self._rollup_model(policy, conversation_id)
+        if target is None:
+            logger.info("Skipping summary roll-up for project %s: no provider configured", project_id)
+            return None
+        provider, model_name = target
+
+        text = await self.summarization_service.generate_rollup(
+            provider=provider,
+            model_name=model_name,
+            project_name=f"project_{project_id}",
+            summaries=[record.summary or record.content for record in group],
+        )
+        if not text:
+            return None
+        record = await self.memory_service.add_memory(
+            project_id=project_id,
+            content=text,
+            summary=text,
+            tags=["summary", "rollup"],
+            metadata={
+                "type": ROLLUP_TYPE,
+                "level": level,
+                "conversation_id": conversation_id,
+                "covers_from": group[0].created_at.isoformat(),
+                "covers_to": group[-1].created_at.isoformat(),
+                "source_count": len(group),
+            },
+        )
+        return record.id
+
+    async def _rollup_model(
+        self, policy: RetentionPolicy, conversation_id: Optional[int]
+    ) -> Optional[Tuple[ProviderType, str]]:
+        """The policy's provider, else the one of the newest summarized conversation."""
+
+        if policy.rollup_provider is not None and policy.rollup_model:
+            return policy.rollup_provider, policy.rollup_model
+        if conversation_id is None:
+            return None
+        conversation = await self.conversation_service.get_conversation(int(conversation_id))
+        if conversation is None:
+            return None
+        return conversation.provider, conversation.model_name
+
+
+retention_service = RetentionService()
@@ -19,6 +19,13 @@ SUMMARY_SYSTEM_PROMPT = (
     "Keep critical data points and avoid fluff."
 )
 
+ROLLUP_SYSTEM_PROMPT = (
+    "You consolidate older summaries of an AI agent project into one "
+    "higher-level summary. Return concise markdown that keeps lasting "
+    "decisions, facts, and unresolved items, merges repeated points, and "
+    "drops details that were superseded."
+)
+
 
 def _format_transcript(messages: Iterable[dict[str, str]]) -> str:
     lines: List[str] = []
@@ -48,17 +55,48 @@ class SummarizationService:
         if not transcript:
             return None
 
+        return await self._complete(
+            provider,
+            model_name,
+            SUMMARY_SYSTEM_PROMPT,
+            (
+                f"Project: {project_name}\n"
+                "Summarize the following conversation transcript:\n\n"
+                f"{transcript}"
+            ),
+        )
+
+    async def generate_rollup(
+        self,
+        provider: ProviderType,
+        model_name: str,
+        project_name: str,
+        summaries: Iterable[str],
+    ) -> Optional[str]:
+        """Fold several summaries (oldest first) into one higher-level summary."""
+
+        sections = [summary.strip() for summary in summaries if summary and summary.strip()]
+        if not sections:
+            return None
+        joined = "\n\n---\n\n".join(sections)
+        return await self._complete(
+            provider,
+            model_name,
+            ROLLUP_SYSTEM_PROMPT,
+            f"Project: {project_name}\nConsolidate these summaries, oldest first:\n\n{joined}",
+        )
+
+    async def _complete(
+        self,
+        provider: ProviderType,
+        model_name: str,
+        system_prompt: str,
+        user_content: str,
+    ) -> Optional[str]:
         provider_instance = get_provider(provider, model_name)
         payload = [
-            {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
-            {
-                "role": "user",
-                "content": (
-                    f"Project: {project_name}\n"
-                    "Summarize the following conversation transcript:\n\n"
-                    f"{transcript}"
-                ),
-            },
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
         ]
 
         async def _invoke(api_key: str, key_id: int):
@@ -19,13 +19,15 @@ from ..tools.builtins import (
     FileSystemTool,
     WebScraperTool,
 )
+from .write_behind_service import WriteBehindService, write_behind_service
 
 
 class ToolService:
     """Discover, register, and execute tools with logging."""
 
-    def __init__(self) -> None:
+    def __init__(self, write_behind: WriteBehindService | None = None) -> None:
         self.settings = get_settings()
+        self.write_behind = write_behind or write_behind_service
         self._registry: Dict[str, Tool] = {}
         self._register_builtins()
 
@@ -94,17 +96,17 @@ class ToolService:
         status: str,
         start: datetime,
     ) -> None:
-        async with session_scope() as session:
-            log = ToolExecutionLog(
-                project_id=project_id,
-                tool_name=tool_name,
-                arguments_json=json.dumps(arguments),
-                output_json=output_json,
-                status=status,
-                created_at=start,
-            )
-            session.add(log)
-            await session.flush()
+        await self.write_behind.insert(
+            ToolExecutionLog,
+            {
+                "project_id": project_id,
+                "tool_name": tool_name,
+                "arguments_json": json.dumps(arguments),
+                "output_json": output_json,
+                "status": status,
+                "created_at": start,
+            },
+        )
 
     async def get_logs(self, project_id: int, limit: Optional[int] = None) -> List[ToolExecutionLog]:
         async with session_scope() as session:
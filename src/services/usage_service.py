@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Literal, Optional, Tuple
+
+from sqlalchemy import Select, delete, func, literal, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..core.cache import TTLCache
+from ..core.database import session_scope
+from ..core.models import ModelPricing, ProviderType, UsageRecord, UsageRollup, UsageRollupState
+
+logger = logging.getLogger(__name__)
+
+# Bucket starts are rendered in the format SQLAlchemy stores DateTime values
+# in, so they compare correctly with bound datetimes.
+ROLLUP_BUCKETS = {
+    "hour": "%Y-%m-%d %H:00:00.000000",
+    "day": "%Y-%m-%d 00:00:00.000000",
+}
+Granularity = Literal["hour", "day"]
+GroupBy = Literal["none", "project", "provider", "model"]
+
+# Any model of a provider without a price of its own.
+WILDCARD_MODEL = "*"
+# Seconds a worker may keep using prices another worker has changed.
+PRICING_CACHE_TTL = 60.0
+STATE_ID = 1
+
+PriceTable = Dict[Tuple[ProviderType, str], Tuple[float, float]]
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class UsageService:
+    """Price model calls and keep hourly/daily usage rollups for cost reports.
+
+    The cost of a usage record is computed when it is recorded, from the
+    ``model_pricing`` table. :meth:`refresh_rollups` folds the records added
+    since the last run into ``usage_rollups``; it runs on a schedule and
+    before every report, so reports read one row per bucket and
+    (project, provider, model) instead of scanning the calls.
+    """
+
+    def __init__(self) -> None:
+        # The whole price table under one key: it is small and read per call.
+        self._prices: TTLCache[PriceTable] = TTLCache(max_size=1, ttl=PRICING_CACHE_TTL)
+        self._refresh_lock = asyncio.Lock()
+
+    async def list_pricing(self) -> List[ModelPricing]:
+        async with session_scope() as session:
+            result = await session.scalars(
+                select(ModelPricing).order_by(ModelPricing.provider, ModelPricing.model_name)
+            )
+            return list(result)
+
+    async def set_pricing(
+        self,
+        provider: ProviderType,
+        model_name: str,
+        prompt_per_million: float,
+        completion_per_million: float,
+    ) -> ModelPricing:
+        """Create or replace the price of ``model_name``; applies to calls recorded from now on."""
+
+        async with session_scope() as session:
+            stmt = sqlite_insert(ModelPricing).values(
+                provider=provider,
+                model_name=model_name,
+                prompt_per_million=prompt_per_million,
+                completion_per_million=completion_per_million,
+                updated_at=datetime.utcnow(),
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ModelPricing.provider, ModelPricing.model_name],
+                set_={
+                    "prompt_per_million": stmt.excluded.prompt_per_million,
+                    "completion_per_million": stmt.excluded.completion_per_million,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            ).returning(ModelPricing)
+            pricing = (await session.scalars(stmt)).one()
+        self._prices.clear()
+        return pricing
+
+    async def delete_pricing(self, provider: ProviderType, model_name: str) -> bool:
+        async with session_scope() as session:
+            result = await session.execute(
+                delete(ModelPricing).where(
+                    ModelPricing.provider == provider,
+                    ModelPricing.model_name == model_name,
+                )
+            )
+        self._prices.clear()
+        return bool(result.rowcount)
+
+    async def compute_cost(
+        self,
+        provider: ProviderType,
+        model_name: str,
+        tokens_prompt: int,
+        tokens_completion: int,
+    ) -> Optional[float]:
+        """Cost of a call, or ``None`` when neither the model nor its provider has a price."""
+
+        prices = await self._price_table()
+        price = prices.get((provider, model_name)) or prices.get((provider, WILDCARD_MODEL))
+        if price is None:
+            return None
+        prompt_price, completion_price = price
+        return (tokens_prompt * prompt_price + tokens_completion * completion_price) / 1_000_000
+
+    async def _price_table(self) -> PriceTable:
+        prices = self._prices.get("all")
+        if prices is None:
+            async with session_scope() as session:
+                result = await session.scalars(select(ModelPricing))
+                prices = {
+                    (row.provider, row.model_name): (row.prompt_per_million, row.completion_per_million)
+                    for row in result
+                }
+            self._prices.set("all", prices)
+        return prices
+
+    async def refresh_rollups(self) -> int:
+        """Fold usage records added since the last run into the rollups; returns their count."""
+
+        async with session_scope() as session:
+            last_id = await session.scalar(
+                select(UsageRollupState.last_usage_id).where(UsageRollupState.id == STATE_ID)
+            )
+            newest = await session.scalar(select(func.max(UsageRecord.id)))
+        if newest is None or newest == last_id:
+            return 0
+
+        async with self._refresh_lock:
+            async with session_scope() as session:
+                # Writing the state row first takes SQLite's write lock, so the
+                # watermark read with it is current even with other workers.
+                last_id = await session.scalar(
+                    update(UsageRollupState)
+                    .where(UsageRollupState.id == STATE_ID)
+                    .values(updated_at=datetime.utcnow())
+                    .returning(UsageRollupState.last_usage_id)
+                )
+                if last_id is None:
+                    session.add(UsageRollupState(id=STATE_ID, last_usage_id=0, updated_at=datetime.utcnow()))
+                    last_id = 0
+                upper = await session.scalar(select(func.max(UsageRecord.id)))
+                if upper is None or upper <= last_id:
+                    return 0
+                folded = await session.scalar(
+                    select(func.count()).where(UsageRecord.id > last_id, UsageRecord.id <= upper)
+                )
+                for granularity, bucket_format in ROLLUP_BUCKETS.items():
+                    await session.execute(self._rollup_statement(granularity, bucket_format, last_id, upper))
+                await session.execute(
+                    update(UsageRollupState)
+                    .where(UsageRollupState.id == STATE_ID)
+                    .values(last_usage_id=upper)
+                )
+        logger.debug("Folded %s usage records into the rollups", folded)
+        return folded or 0
+
+    @staticmethod
+    def _rollup_statement(granularity: str, bucket_format: str, after_id: int, upto_id: int):
+        bucket = func.strftime(bucket_format, UsageRecord.created_at)
+        source = (
+            select(
+                UsageRecord.project_id,
+                literal(granularity),
+                bucket,
+                UsageRecord.provider,
+                UsageRecord.model_name,
+                func.count(),
+                func.coalesce(func.sum(UsageRecord.tokens_prompt), 0),
+                func.coalesce(func.sum(UsageRecord.tokens_completion), 0),
+                func.total(UsageRecord.total_cost),
+                func.count() - func.count(UsageRecord.total_cost),
+            )
+            .where(UsageRecord.id > after_id, UsageRecord.id <= upto_id)
+            .group_by(UsageRecord.project_id, bucket, UsageRecord.provider, UsageRecord.model_name)
+        )
+        stmt = sqlite_insert(UsageRollup).from_select(
+            [
+                UsageRollup.project_id,
+                UsageRollup.granularity,
+                UsageRollup.bucket_start,
+                UsageRollup.provider,
+                UsageRollup.model_name,
+                UsageRollup.calls,
+                UsageRollup.tokens_prompt,
+                UsageRollup.tokens_completion,
+                UsageRollup.total_cost,
+                UsageRollup.unpriced_calls,
+            ],
+            source,
+        )
+        added = stmt.excluded
+        return stmt.on_conflict_do_update(
+            index_elements=[
+                UsageRollup.project_id,
+                UsageRollup.granularity,
+                UsageRollup.bucket_start,
+                UsageRollup.provider,
+                UsageRollup.model_name,
+            ],
+            set_={
+                "calls": UsageRollup.calls + added.calls,
+                "tokens_prompt": UsageRollup.tokens_prompt + added.tokens_prompt,
+                "tokens_completion": UsageRollup.tokens_completion + added.tokens_completion,
+                "total_cost": UsageRollup.total_cost + added.total_cost,
+                "unpriced_calls": UsageRollup.unpriced_calls + added.unpriced_calls,
+            },
+        )
+
+    async def cost_report(
+        self,
+        granularity: Granularity = "day",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        project_id: Optional[int] = None,
+        group_by: GroupBy = "model",
+    ) -> list:
+        """Usage and cost per bucket starting in ``[start, end)``, oldest first.
+
+        Rows carry ``bucket_start``, the ``group_by`` columns (``project_id``;
+        ``provider``; or ``provider`` and ``model_name``), ``calls``,
+        ``tokens_prompt``, ``tokens_completion``, ``total_cost`` and
+        ``unpriced_calls``. Buckets are UTC.
+        """
+
+        if granularity not in ROLLUP_BUCKETS:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        keys = {
+            "none": [],
+            "project": [UsageRollup.project_id],
+            "provider": [UsageRollup.provider],
+            "model": [UsageRollup.provider, UsageRollup.model_name],
+        }[group_by]
+        await self.refresh_rollups()
+        stmt: Select = (
+            select(
+                UsageRollup.bucket_start,
+                *keys,
+                func.sum(UsageRollup.calls).label("calls"),
+                func.sum(UsageRollup.tokens_prompt).label("tokens_prompt"),
+                func.sum(UsageRollup.tokens_completion).label("tokens_completion"),
+                func.sum(UsageRollup.total_cost).label("total_cost"),
+                func.sum(UsageRollup.unpriced_calls).label("unpriced_calls"),
+            )
+            .where(UsageRollup.granularity == granularity)
+            .group_by(UsageRollup.bucket_start, *keys)
+            .order_by(UsageRollup.bucket_start, *keys)
+        )
+        if project_id is not None:
+            stmt = stmt.where(UsageRollup.project_id == project_id)
+        if start is not None:
+            stmt = stmt.where(UsageRollup.bucket_start >= _as_naive_utc(start))
+        if end is not None:
+            stmt = stmt.where(UsageRollup.bucket_start < _as_naive_utc(end))
+        async with session_scope() as session:
+            result = await session.execute(stmt)
+            return list(result)
+
+
+usage_service = UsageService()
@@ -0,0 +1,933 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import get_settings
+from .conversation_service import ConversationService, MemoryFilter, conversation_service
+from .embedding_service import EMBEDDING_DIM, LEGACY_HASHING_MODEL, EmbeddingService, embedding_service
+from .vector_store_service import VectorFile
+
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the (rows x centroids) score block materialized at once.
+ASSIGN_BLOCK_CELLS = 1 << 24
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Embeddings fetched per query when a vector file catches up with the database.
+EMBEDDING_FETCH_BATCH = 500
+
+# Process-wide source of index generations, so a rebuilt index never reuses
+# the generation of the one it replaced.
+_generations = itertools.count(1)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return matrix / norms
+
+
+def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return positions of the ``k`` highest scores, best first."""
+
+    if k < scores.shape[0]:
+        candidates = np.argpartition(scores, -k)[-k:]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+def _assign(block: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Label each row of ``block`` with its nearest centroid."""
+
+    labels = np.empty(block.shape[0], dtype=np.int64)
+    step = max(1, ASSIGN_BLOCK_CELLS // max(centroids.shape[0], 1))
+    for start in range(0, block.shape[0], step):
+        chunk = block[start : start + step]
+        labels[start : start + chunk.shape[0]] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+class IVFIndex:
+    """Inverted-file coarse quantizer over the rows of a :class:`VectorIndex`.
+
+    Rows are bucketed by their nearest k-means centroid. A query scores the
+    centroids, probes the ``nprobe`` closest lists and only computes exact
+    similarities for the rows in those lists. ``nprobe`` is the recall/latency
+    knob: probing every list degrades to exact search.
+    """
+
+    def __init__(self, centroids: np.ndarray, rows: np.ndarray, assignments: np.ndarray) -> None:
+        self.centroids = centroids.astype(np.float32, copy=False)
+        self.trained_rows = int(rows.shape[0])
+        order = np.argsort(assignments, kind="stable")
+        self._rows = rows[order].astype(np.int64, copy=False)
+        self._offsets = np.searchsorted(assignments[order], np.arange(self.nlist + 1))
+        self._extra_rows: List[np.ndarray] = []
+        self._extra_lists: List[np.ndarray] = []
+        self._extra_count = 0
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def drift(self) -> float:
+        """Fraction of rows added since the quantizer was trained."""
+
+        return self._extra_count / max(self.trained_rows, 1)
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        nlist: int,
+        iterations: int = 10,
+        samples_per_list: int = 64,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Run spherical k-means on a sample of ``matrix`` and bucket every row."""
+
+        count = matrix.shape[0]
+        nlist = max(1, min(nlist, count))
+        rng = np.random.default_rng(seed)
+        sample_size = min(count, nlist * samples_per_list)
+        sample = matrix[np.sort(rng.choice(count, size=sample_size, replace=False))]
+
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = _assign(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            sorted_labels = labels[order]
+            starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+            sums = sample[rng.choice(sample_size, size=nlist)]
+            # Empty clusters keep a random re-seed so every list stays useful.
+            sums[sorted_labels[starts]] = np.add.reduceat(sample[order], starts, axis=0)
+            centroids = _normalize_rows(sums)
+
+        return cls(centroids, np.arange(count, dtype=np.int64), _assign(matrix, centroids))
+
+    def assign(self, block: np.ndarray) -> np.ndarray:
+        return _assign(block, self.centroids)
+
+    def add_rows(self, rows: np.ndarray, block: np.ndarray) -> None:
+        if rows.shape[0] == 0:
+            return
+        self._extra_rows.append(rows.astype(np.int64, copy=False))
+        self._extra_lists.append(self.assign(block))
+        self._extra_count += int(rows.shape[0])
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        probe = _top_rows(self.centroids @ query, max(1, min(nprobe, self.nlist)))
+        parts = [self._rows[self._offsets[lst] : self._offsets[lst + 1]] for lst in probe]
+        if self._extra_count:
+            if len(self._extra_rows) > 1:
+                self._extra_rows = [np.concatenate(self._extra_rows)]
+                self._extra_lists = [np.concatenate(self._extra_lists)]
+            parts.append(self._extra_rows[0][np.isin(self._extra_lists[0], probe)])
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def save(self, path: Path, ids: np.ndarray, model_name: str) -> None:
+        """Persist centroids and list membership keyed by memory id."""
+
+        rows = [self._rows] + self._extra_rows
+        lists = [
+            np.repeat(np.arange(self.nlist), np.diff(self._offsets)),
+        ] + self._extra_lists
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp.npz")
+        np.savez(
+            tmp_path,
+            model=np.asarray(model_name),
+            centroids=self.centroids,
+            ids=ids[np.concatenate(rows)],
+            assignments=np.concatenate(lists),
+        )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path, index: "VectorIndex", model_name: str) -> Optional["IVFIndex"]:
+        """Load a persisted quantizer and map it onto the rows of ``index``.
+
+        Rows the file does not know about are assigned as drift; ids that no
+        longer exist in the index are dropped.
+        """
+
+        with np.load(path) as data:
+            saved_model = str(data["model"]) if "model" in data else None
+            centroids = data["centroids"]
+            saved_ids = data["ids"]
+            saved_lists = data["assignments"]
+        if saved_model != model_name or centroids.ndim != 2 or centroids.shape[1] != index.dim:
+            return None
+
+        ids = index.ids
+        sorter = np.argsort(ids)
+        positions = np.searchsorted(ids, saved_ids, sorter=sorter)
+        positions = np.clip(positions, 0, max(len(ids) - 1, 0))
+        rows = sorter[positions] if len(ids) else positions
+        known = (ids[rows] == saved_ids) if len(ids) else np.zeros(len(saved_ids), dtype=bool)
+
+        ivf = cls(centroids, rows[known], saved_lists[known])
+        covered = np.zeros(len(ids), dtype=bool)
+        covered[rows[known]] = True
+        missing = np.flatnonzero(~covered)
+        ivf.add_rows(missing, index.rows(missing))
+        return ivf
+
+
+@dataclass(frozen=True)
+class MemoryAttributes:
+    """Filterable attributes of one indexed memory."""
+
+    tags: Tuple[str, ...] = ()
+    memory_type: Optional[str] = None
+    source: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+def _epoch_us(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+class VectorIndex:
+    """Exact cosine-similarity index over the embeddings of one project.
+
+    Vectors are L2-normalized on insert and kept row-wise in a contiguous
+    float32 matrix, so a query is a single matrix-vector product followed by
+    an ``argpartition`` for the top-k rows.
+
+    Each row also carries filterable attributes: a posting list of rows per
+    tag, dictionary-coded ``type``/``source`` columns and a ``created_at``
+    column. A :class:`MemoryFilter` is turned into a row bitmap from these
+    before any similarity is computed.
+
+    With a :class:`VectorFile` the matrix is the file's memory map and new
+    rows are appended to it; removed rows are tombstoned in both. Rows
+    another process appended in between are skipped as dead, and once the
+    file is compacted or reset elsewhere the index marks itself ``stale``
+    to be rebuilt.
+    """
+
+    def __init__(
+        self,
+        dim: int = EMBEDDING_DIM,
+        capacity: int = 1024,
+        store: Optional[VectorFile] = None,
+    ) -> None:
+        self.dim = dim
+        self.store = store
+        capacity = max(capacity, len(store) if store is not None else 0, 1)
+        if store is not None:
+            self._matrix = store.vectors
+        else:
+            self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._dead = 0
+        self._created = np.zeros(capacity, dtype=np.int64)
+        self._types = np.zeros(capacity, dtype=np.int32)
+        self._sources = np.zeros(capacity, dtype=np.int32)
+        self._type_codes: Dict[str, int] = {}
+        self._source_codes: Dict[str, int] = {}
+        self._tag_postings: Dict[str, List[int]] = {}
+        self._size = 0
+        self.generation = next(_generations)
+        self.ann: Optional[IVFIndex] = None
+        # Set once another process compacted or reset the store: row numbers
+        # moved, so the index has to be loaded again.
+        self.stale = False
+        self._store_epoch = store.epoch if store is not None else 0
+
+    @classmethod
+    def from_store(cls, store: VectorFile, attributes: Dict[int, MemoryAttributes]) -> "VectorIndex":
+        """Index the rows already in ``store``.
+
+        ``attributes`` describes the memories that currently exist; rows for
+        any other memory (deleted while the index was not loaded, or whose id
+        now belongs to a newer memory) are tombstoned.
+        """
+
+        index = cls(dim=store.dim, store=store)
+        size = len(store)
+        index._ids[:size] = store.ids
+        live = ~store.deleted
+        seen: set[int] = set()
+        for row in np.flatnonzero(live):
+            memory_id = int(store.ids[row])
+            attrs = attributes.get(memory_id)
+            # Two workers can both append a memory missing from the file.
+            if attrs is None or _epoch_us(attrs.created_at) != store.created[row] or memory_id in seen:
+                live[row] = False
+            seen.add(memory_id)
+        stale = np.flatnonzero(~live & ~store.deleted)
+        if stale.shape[0] and not store.mark_deleted(stale, index._store_epoch):
+            index.stale = True
+        index._alive[:size] = live
+        index._dead = size - int(live.sum())
+        index._size = size
+        for row in np.flatnonzero(live):
+            index._set_attributes(int(row), attributes[int(index._ids[row])])
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self._size]
+
+    @property
+    def dead(self) -> int:
+        """Number of tombstoned rows still occupying the matrix."""
+
+        return self._dead
+
+    @property
+    def live_ids(self) -> np.ndarray:
+        return self._ids[: self._size][self._alive[: self._size]]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self._matrix[: self._size]
+
+    def rows(self, positions: np.ndarray) -> np.ndarray:
+        return self._matrix[positions]
+
+    def add(
+        self,
+        ids: Sequence[int],
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+        attributes: Optional[Sequence[MemoryAttributes]] = None,
+    ) -> None:
+        block = np.asarray(vectors, dtype=np.float32)
+        if block.size == 0:
+            return
+        block = block.reshape(-1, self.dim)
+        id_block = np.asarray(ids, dtype=np.int64).reshape(-1)
+        if id_block.shape[0] != block.shape[0]:
+            raise ValueError("ids and vectors must have the same length")
+
+        count = block.shape[0]
+        start = self._size
+        normalized = _normalize_rows(block)
+        if self.store is not None:
+            created = [_epoch_us(attrs.created_at) for attrs in attributes] if attributes is not None else 0
+            start = self.store.append(id_block, np.asarray(created, dtype=np.int64), normalized)
+            self._matrix = self.store.vectors
+            if self.stale or self.store.epoch != self._store_epoch:
+                self.stale = True
+                self.touch()
+                return
+            self._reserve(start + count)
+            if start > self._size:
+                # Rows other processes appended first; they are indexed when
+                # the index is next loaded.
+                self._ids[self._size : start] = self.store.ids[self._size : start]
+                self._dead += start - self._size
+        else:
+            self._reserve(start + count)
+            self._matrix[start : start + count] = normalized
+        self._ids[start : start + count] = id_block
+        self._alive[start : start + count] = True
+        if attributes is not None:
+            for offset, attrs in enumerate(attributes):
+                self._set_attributes(start + offset, attrs)
+        self._size = start + count
+        self.touch()
+        if self.ann is not None:
+            self.ann.add_rows(np.arange(start, start + count, dtype=np.int64), normalized)
+
+    def touch(self) -> None:
+        """Mark the index contents as changed by moving to a new generation."""
+
+        self.generation = next(_generations)
+
+    def remove(self, ids: Sequence[int]) -> int:
+        """Tombstone the rows of ``ids``; returns how many rows were removed."""
+
+        rows = np.flatnonzero(np.isin(self.ids, np.asarray(ids, dtype=np.int64)) & self._alive[: self._size])
+        if rows.shape[0] == 0:
+            return 0
+        self._alive[rows] = False
+        self._dead += rows.shape[0]
+        if self.store is not None and not self.store.mark_deleted(rows, self._store_epoch):
+            self.stale = True
+        self.touch()
+        return rows.shape[0]
+
+    def add_tags(self, memory_id: int, tags: Iterable[str]) -> None:
+        rows = np.flatnonzero(self.ids == memory_id)
+        if rows.shape[0] == 0:
+            return
+        for tag in tags:
+            postings = self._tag_postings.setdefault(tag, [])
+            postings.extend(int(row) for row in rows if row not in postings)
+        self.touch()
+
+    def mask(self, filters: Optional[MemoryFilter]) -> Optional[np.ndarray]:
+        """Return a boolean row bitmap for ``filters`` (``None`` means all rows)."""
+
+        size = self._size
+        if filters is None or filters.is_empty:
+            return self._alive[:size].copy() if self._dead else None
+        mask = self._alive[:size].copy()
+        if filters.tags_any:
+            any_mask = np.zeros(size, dtype=bool)
+            for tag in filters.tags_any:
+                any_mask[self._tag_rows(tag)] = True
+            mask &= any_mask
+        for tag in filters.tags_all:
+            tag_mask = np.zeros(size, dtype=bool)
+            tag_mask[self._tag_rows(tag)] = True
+            mask &= tag_mask
+        if filters.memory_type:
+            code = self._type_codes.get(filters.memory_type)
+            mask &= self._types[:size] == code if code is not None else False
+        if filters.source:
+            code = self._source_codes.get(filters.source)
+            mask &= self._sources[:size] == code if code is not None else False
+        if filters.created_after:
+            mask &= self._created[:size] >= _epoch_us(filters.created_after)
+        if filters.created_before:
+            mask &= self._created[:size] < _epoch_us(filters.created_before)
+        return mask
+
+    def search(
+        self,
+        query: Sequence[float] | np.ndarray,
+        top_k: int,
+        min_score: float = 0.0,
+        nprobe: Optional[int] = None,
+        filters: Optional[MemoryFilter] = None,
+    ) -> List[Tuple[int, float]]:
+        if self._size == 0 or top_k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        if q.shape[0] != self.dim:
+            return []
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0:
+            return []
+        q = q / norm
+
+        mask = self.mask(filters)
+        rows: Optional[np.ndarray] = None
+        if self.ann is not None and nprobe is not None and nprobe < self.ann.nlist:
+            rows = self.ann.candidates(q, nprobe)
+            if mask is not None:
+                rows = rows[mask[rows]]
+                # A selective filter can leave the probed lists short of hits;
+                # fall back to scanning every row and masking the rest out.
+                if rows.shape[0] < top_k:
+                    rows = None
+        if rows is not None:
+            scores = self._matrix[rows] @ q
+        else:
+            # Score the mapped rows in place; gathering the rows that pass
+            # ``mask`` first would copy most of the matrix on every query.
+            scores = self._matrix[: self._size] @ q
+            if mask is not None:
+                scores[~mask] = -np.inf
+        if scores.shape[0] == 0:
+            return []
+
+        order = _top_rows(scores, min(top_k, scores.shape[0]))
+        positions = rows[order] if rows is not None else order
+        return [
+            (int(self._ids[position]), float(score))
+            for position, score in zip(positions, scores[order])
+            if score >= min_score and score != -np.inf
+        ]
+
+    def _tag_rows(self, tag: str) -> np.ndarray:
+        return np.asarray(self._tag_postings.get(tag, ()), dtype=np.int64)
+
+    def _set_attributes(self, row: int, attrs: MemoryAttributes) -> None:
+        for tag in dict.fromkeys(attrs.tags):
+            self._tag_postings.setdefault(tag, []).append(row)
+        if attrs.memory_type:
+            self._types[row] = self._type_codes.setdefault(attrs.memory_type, len(self._type_codes) + 1)
+        if attrs.source:
+            self._sources[row] = self._source_codes.setdefault(attrs.source, len(self._source_codes) + 1)
+        self._created[row] = _epoch_us(attrs.created_at)
+
+    def _reserve(self, needed: int) -> None:
+        capacity = self._ids.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        if self.store is None:
+            matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+            matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+        self._ids = self._grow(self._ids, new_capacity)
+        self._alive = self._grow(self._alive, new_capacity)
+        self._created = self._grow(self._created, new_capacity)
+        self._types = self._grow(self._types, new_capacity)
+        self._sources = self._grow(self._sources, new_capacity)
+
+    def _grow(self, column: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.zeros(capacity, dtype=column.dtype)
+        grown[: self._size] = column[: self._size]
+        return grown
+
+
+class VectorIndexService:
+    """Hold one lazily built :class:`VectorIndex` per project.
+
+    Projects at or above ``memory_ann_min_vectors`` get an :class:`IVFIndex`
+    trained in the background and persisted under ``data_dir``; smaller
+    projects, and large ones until training finishes, use exact search.
+
+    With ``memory_vector_store="mmap"`` vectors live in a per-project
+    :class:`VectorFile`; loading an index then only reads ids and attributes
+    from the database and fetches embeddings for rows the file is missing.
+    With ``"stream"`` no index is kept: each search streams ``(id, embedding)``
+    chunks from the database and keeps a bounded top-k heap.
+
+    Other workers write to the same database, so at most every
+    ``memory_index_probe_seconds`` a project's memory count and highest id
+    are compared with what this process's own writes account for; when they
+    moved, a loaded index is caught up from the database (ids first, then
+    embeddings only for new rows) and gets a new generation.
+    """
+
+    def __init__(
+        self,
+        convo_service: ConversationService | None = None,
+        embedder: EmbeddingService | None = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.conversation_service = convo_service or conversation_service
+        self.embedding_service = embedder or embedding_service
+        self._indexes: Dict[int, VectorIndex] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._pending: Dict[int, List[Tuple[List[int], np.ndarray, Optional[List[MemoryAttributes]]]]] = {}
+        self._pending_removals: Dict[int, List[int]] = {}
+        self._training: Dict[int, asyncio.Task] = {}
+        # Generations of projects searched by streaming, which have no index.
+        self._stream_generations: Dict[int, int] = {}
+        # (memory count, max memory id) the database should report for each
+        # project if only this process wrote to it since the last probe.
+        self._stamps: Dict[int, Tuple[int, int]] = {}
+        self._probed_at: Dict[int, float] = {}
+
+    @property
+    def streaming(self) -> bool:
+        return self.settings.memory_vector_store == "stream"
+
+    async def search(
+        self,
+        project_id: int,
+        query: Sequence[float],
+        top_k: int,
+        min_score: float = 0.0,
+        filters: Optional[MemoryFilter] = None,
+    ) -> List[Tuple[int, float]]:
+        if self.streaming:
+            return await self.scan(project_id, query, top_k=top_k, min_score=min_score, filters=filters)
+        index = await self.get_index(project_id)
+        nprobe = self.settings.memory_ann_nprobe if index.ann is not None else None
+        return index.search(query, top_k=top_k, min_score=min_score, nprobe=nprobe, filters=filters)
+
+    async def get_index(self, project_id: int) -> VectorIndex:
+        index = self._indexes.get(project_id)
+        if index is not None and not index.stale and not self._probe_due(project_id):
+            return index
+
+        lock = self._locks.setdefault(project_id, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(project_id)
+            if index is not None and not index.stale:
+                if self._probe_due(project_id) and await self._probe(project_id):
+                    await self._sync(project_id, index)
+                return index
+            if self.settings.memory_index_probe_seconds > 0:
+                # Taken before the build reads, so later writes show up as moves.
+                await self._probe(project_id)
+            self._pending[project_id] = []
+            self._pending_removals[project_id] = []
+            try:
+                index = await self._build(project_id)
+                self._apply_pending(project_id, index)
+            finally:
+                self._pending.pop(project_id, None)
+                self._pending_removals.pop(project_id, None)
+            self._indexes[project_id] = index
+            self._attach_ann(project_id, index)
+            return index
+
+    def _apply_pending(self, project_id: int, index: VectorIndex) -> None:
+        # Rows committed while the index was reading the database may or may
+        # not be part of its snapshot; only append the ones it missed.
+        for ids, vectors, attributes in self._pending.get(project_id, []):
+            missing = ~np.isin(np.asarray(ids, dtype=np.int64), index.ids)
+            if missing.any():
+                index.add(
+                    np.asarray(ids)[missing],
+                    vectors[missing],
+                    [attrs for attrs, keep in zip(attributes, missing) if keep] if attributes else None,
+                )
+        removed = self._pending_removals.get(project_id)
+        if removed:
+            index.remove(removed)
+
+    def _probe_due(self, project_id: int) -> bool:
+        interval = self.settings.memory_index_probe_seconds
+        return interval > 0 and time.monotonic() - self._probed_at.get(project_id, -math.inf) >= interval
+
+    async def _probe(self, project_id: int) -> bool:
+        """Re-read the project's memory stamp; True if writes other than ours moved it."""
+
+        self._probed_at[project_id] = time.monotonic()
+        expected = self._stamps.get(project_id)
+        count, max_id = await self.conversation_service.memory_stamp(project_id)
+        self._stamps[project_id] = (count, max_id)
+        # Our own deletes may lower max(id), so only a higher one counts.
+        return expected is not None and (count != expected[0] or max_id > expected[1])
+
+    def _expect(self, project_id: int, inserted: Sequence[int] = (), removed: int = 0) -> None:
+        """Account for this process's own memory writes in the project's stamp."""
+
+        stamp = self._stamps.get(project_id)
+        if stamp is not None:
+            self._stamps[project_id] = (stamp[0] + len(inserted) - removed, max([stamp[1], *inserted]))
+
+    async def _sync(self, project_id: int, index: VectorIndex) -> None:
+        """Catch ``index`` up with memories other workers added or removed."""
+
+        self._pending[project_id] = []
+        self._pending_removals[project_id] = []
+        try:
+            attributes = await self._attributes(project_id)
+            known = np.fromiter(attributes, dtype=np.int64, count=len(attributes))
+            live = index.live_ids
+            gone = live[~np.isin(live, known)]
+            if gone.shape[0]:
+                index.remove(gone.tolist())
+            await self._add_missing(index, attributes)
+            self._apply_pending(project_id, index)
+        finally:
+            self._pending.pop(project_id, None)
+            self._pending_removals.pop(project_id, None)
+        # Rows without vectors (or new tags) change keyword results as well.
+        index.touch()
+        if index.ann is None or index.ann.drift > self.settings.memory_ann_rebuild_ratio:
+            self._maybe_train(project_id, index)
+        self.compact(project_id)
+
+    def add(
+        self,
+        project_id: int,
+        ids: Sequence[int],
+        vectors: Sequence[Sequence[float]] | np.ndarray,
+        attributes: Optional[Sequence[MemoryAttributes]] = None,
+    ) -> None:
+        """Append freshly stored embeddings to the project index if it is loaded."""
+
+        self._stream_generations.pop(project_id, None)
+        self._expect(project_id, inserted=ids)
+        block = np.asarray(vectors, dtype=np.float32).reshape(-1, self.embedding_service.dim)
+        attrs = list(attributes) if attributes is not None else None
+        if project_id in self._pending:
+            self._pending[project_id].append((list(ids), block, attrs))
+            return
+        index = self._indexes.get(project_id)
+        if index is None:
+            return
+        index.add(ids, block, attrs)
+        if index.ann is None:
+            self._maybe_train(project_id, index)
+        elif index.ann.drift > self.settings.memory_ann_rebuild_ratio:
+            self._maybe_train(project_id, index)
+
+    def remove(self, project_id: int, ids: Sequence[int]) -> None:
+        """Drop deleted memories from the project index if it is loaded."""
+
+        self._stream_generations.pop(project_id, None)
+        self._expect(project_id, removed=len(ids))
+        if project_id in self._pending_removals:
+            self._pending_removals[project_id].extend(ids)
+            return
+        index = self._indexes.get(project_id)
+        if index is not None:
+            index.remove(ids)
+
+    def compact(self, project_id: int) -> int:
+        """Drop the project index once removed rows exceed ``memory_ann_rebuild_ratio`` of it.
+
+        The next search rebuilds it without the tombstoned rows (rewriting the
+        vector file in ``mmap`` mode), so searches stop scoring rows that can
+        no longer match. Returns the number of rows dropped.
+        """
+
+        index = self._indexes.get(project_id)
+        if index is None or project_id in self._pending or not self._bloated(index):
+            return 0
+        del self._indexes[project_id]
+        return index.dead
+
+    def _bloated(self, index: VectorIndex) -> bool:
+        return index.dead > len(index) * self.settings.memory_ann_rebuild_ratio
+
+    async def generation(self, project_id: int) -> int:
+        """Current generation of the project index; it changes on every write."""
+
+        if self.streaming:
+            if self._probe_due(project_id) and await self._probe(project_id):
+                self._stream_generations.pop(project_id, None)
+            return self._stream_generations.setdefault(project_id, next(_generations))
+        return (await self.get_index(project_id)).generation
+
+    def add_tags(self, project_id: int, memory_id: int, tags: Sequence[str]) -> None:
+        """Record tags attached to an already indexed memory."""
+
+        self._stream_generations.pop(project_id, None)
+        index = self._indexes.get(project_id)
+        if index is not None:
+            index.add_tags(memory_id, tags)
+
+    def touch(self, project_id: int, inserted: Sequence[int] = ()) -> None:
+        """Record a memory write that did not add a vector (e.g. a failed embedding).
+
+        ``inserted`` are the ids of new memories stored without a vector.
+        """
+
+        self._stream_generations.pop(project_id, None)
+        self._expect(project_id, inserted=inserted)
+        index = self._indexes.get(project_id)
+        if index is not None:
+            index.touch()
+
+    def invalidate(self, project_id: Optional[int] = None) -> None:
+        if project_id is None:
+            self._indexes.clear()
+            self._stream_generations.clear()
+            return
+        self._indexes.pop(project_id, None)
+        self._stream_generations.pop(project_id, None)
+
+    async def scan(
+        self,
+        project_id: int,
+        query: Sequence[float],
+        top_k: int,
+        min_score: float = 0.0,
+        filters: Optional[MemoryFilter] = None,
+    ) -> List[Tuple[int, float]]:
+        """Exact search without an index, in O(top_k + chunk) memory."""
+
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(q))
+        if top_k <= 0 or q.shape[0] != self.embedding_service.dim or norm == 0.0:
+            return []
+        q = q / norm
+
+        model_name = self.embedding_service.model_name
+        heap: List[Tuple[float, int]] = []
+        async for chunk in self.conversation_service.stream_memory_embeddings(
+            project_id,
+            embedding_model=model_name,
+            include_untagged=model_name == LEGACY_HASHING_MODEL,
+            chunk_size=self.settings.memory_scan_chunk_size,
+            filters=filters,
+        ):
+            ids, vectors = self._decode_chunk(chunk)
+            if not ids:
+                continue
+            scores = _normalize_rows(np.stack(vectors)) @ q
+            for position in _top_rows(scores, min(top_k, len(ids))):
+                item = (float(scores[position]), ids[position])
+                if item[0] < min_score:
+                    break
+                if len(heap) < top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return [(memory_id, score) for score, memory_id in sorted(heap, reverse=True)]
+
+    def _ann_path(self, project_id: int) -> Path:
+        return self.settings.data_dir / "vector_index" / f"project_{project_id}.ivf.npz"
+
+    def _attach_ann(self, project_id: int, index: VectorIndex) -> None:
+        if len(index) < self.settings.memory_ann_min_vectors:
+            return
+        path = self._ann_path(project_id)
+        if path.exists():
+            try:
+                index.ann = IVFIndex.load(path, index, self.embedding_service.model_name)
+            except Exception as exc:  # pragma: no cover - corrupt file
+                logger.warning("Discarding unreadable ANN index %s: %s", path, exc)
+                index.ann = None
+        if index.ann is None or index.ann.drift > self.settings.memory_ann_rebuild_ratio:
+            self._maybe_train(project_id, index)
+
+    def _maybe_train(self, project_id: int, index: VectorIndex) -> None:
+        if len(index) < self.settings.memory_ann_min_vectors:
+            return
+        task = self._training.get(project_id)
+        if task is not None and not task.done():
+            return
+        self._training[project_id] = asyncio.create_task(self._train(project_id, index))
+
+    async def _train(self, project_id: int, index: VectorIndex) -> None:
+        trained_size = len(index)
+        matrix = index.matrix
+        nlist = self.settings.memory_ann_nlist or int(4 * math.sqrt(trained_size))
+        try:
+            ann = await asyncio.to_thread(IVFIndex.train, matrix, nlist)
+        except Exception as exc:  # pragma: no cover - numerical failure
+            logger.error("Failed to train ANN index for project %s: %s", project_id, exc)
+            return
+
+        if self._indexes.get(project_id) is not index:
+            return
+        # Rows appended while training ran are folded in as drift.
+        if len(index) > trained_size:
+            tail = np.arange(trained_size, len(index), dtype=np.int64)
+            ann.add_rows(tail, index.rows(tail))
+        index.ann = ann
+        try:
+            await asyncio.to_thread(
+                ann.save,
+                self._ann_path(project_id),
+                index.ids.copy(),
+                self.embedding_service.model_name,
+            )
+        except Exception as exc:  # pragma: no cover - disk errors
+            logger.warning("Failed to persist ANN index for project %s: %s", project_id, exc)
+        logger.info(
+            "Trained ANN index for project %s: %s vectors in %s lists",
+            project_id,
+            trained_size,
+            ann.nlist,
+        )
+
+    def _store_base(self, project_id: int) -> Path:
+        return self.settings.data_dir / "vectors" / f"project_{project_id}"
+
+    async def _build(self, project_id: int) -> VectorIndex:
+        if self.settings.memory_vector_store == "mmap":
+            return await self._build_mapped(project_id)
+
+        model_name = self.embedding_service.model_name
+        tags = await self._tags_by_memory(project_id)
+        index = VectorIndex(dim=self.embedding_service.dim)
+        # Decode chunk by chunk so only one chunk of blobs is alive next to
+        # the index matrix.
+        async for chunk in self.conversation_service.stream_memory_embeddings(
+            project_id,
+            embedding_model=model_name,
+            include_untagged=model_name == LEGACY_HASHING_MODEL,
+            chunk_size=self.settings.memory_scan_chunk_size,
+            with_attributes=True,
+        ):
+            ids, vectors = self._decode_chunk(chunk)
+            if not ids:
+                continue
+            by_id = {row[0]: row for row in chunk}
+            attributes = [
+                MemoryAttributes(
+                    tags=tuple(tags.get(memory_id, ())),
+                    memory_type=by_id[memory_id][3],
+                    source=by_id[memory_id][4],
+                    created_at=by_id[memory_id][2],
+                )
+                for memory_id in ids
+            ]
+            index.add(ids, np.stack(vectors), attributes)
+        return index
+
+    async def _build_mapped(self, project_id: int) -> VectorIndex:
+        model_name = self.embedding_service.model_name
+        dim = self.embedding_service.dim
+        store = await asyncio.to_thread(VectorFile.open, self._store_base(project_id), dim, model_name)
+        attributes = await self._attributes(project_id)
+        index = VectorIndex.from_store(store, attributes)
+        if self._bloated(index):
+            try:
+                await asyncio.to_thread(store.compact)
+                index = VectorIndex.from_store(store, attributes)
+            except OSError as exc:  # pragma: no cover - e.g. file still mapped on Windows
+                logger.warning("Failed to compact vector file for project %s: %s", project_id, exc)
+                store = await asyncio.to_thread(VectorFile.open, self._store_base(project_id), dim, model_name)
+                index = VectorIndex.from_store(store, attributes)
+        await self._add_missing(index, attributes)
+        return index
+
+    async def _attributes(self, project_id: int) -> Dict[int, MemoryAttributes]:
+        """Attributes of the project's memories embedded with the current model, by id."""
+
+        model_name = self.embedding_service.model_name
+        rows = await self.conversation_service.list_memory_attributes(
+            project_id,
+            embedding_model=model_name,
+            include_untagged=model_name == LEGACY_HASHING_MODEL,
+        )
+        tags = await self._tags_by_memory(project_id)
+        return {
+            memory_id: MemoryAttributes(
+                tags=tuple(tags.get(memory_id, ())),
+                memory_type=memory_type,
+                source=source,
+                created_at=created_at,
+            )
+            for memory_id, created_at, memory_type, source in rows
+        }
+
+    async def _add_missing(self, index: VectorIndex, attributes: Dict[int, MemoryAttributes]) -> None:
+        """Fetch and add the embeddings of memories in ``attributes`` the index lacks."""
+
+        known = np.fromiter(attributes, dtype=np.int64, count=len(attributes))
+        missing = known[~np.isin(known, index.live_ids)].tolist()
+        for start in range(0, len(missing), EMBEDDING_FETCH_BATCH):
+            ids, vectors = self._decode_chunk(
+                await self.conversation_service.get_memory_embeddings(missing[start : start + EMBEDDING_FETCH_BATCH])
+            )
+            if ids:
+                index.add(ids, np.stack(vectors), [attributes[memory_id] for memory_id in ids])
+
+    async def _tags_by_memory(self, project_id: int) -> Dict[int, List[str]]:
+        tags: Dict[int, List[str]] = {}
+        for memory_id, label in await self.conversation_service.list_memory_tag_labels(project_id):
+            tags.setdefault(memory_id, []).append(label)
+        return tags
+
+    def _decode_chunk(self, rows: Sequence[Sequence]) -> Tuple[List[int], List[np.ndarray]]:
+        """Decode ``(id, blob, ...)`` rows, skipping unreadable or mis-sized blobs."""
+
+        dim = self.embedding_service.dim
+        ids: List[int] = []
+        vectors: List[np.ndarray] = []
+        for row in rows:
+            try:
+                vector = self.embedding_service.decode(row[1])
+            except Exception:
+                continue
+            if vector.shape[0] == dim:
+                ids.append(row[0])
+                vectors.append(vector)
+        return ids, vectors
+
+
+vector_index_service = VectorIndexService()
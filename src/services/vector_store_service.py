@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Vector file layout: a 64-byte header (magic, version, dim, model name) and
+# then fixed-stride little-endian float32 rows. Row ids live in a parallel
+# ``.ids`` file and deletions in a ``.del`` bitmap (1 bit per row). Each id
+# record carries the memory's created_at in microseconds, so a row whose id
+# was reused by a newer memory (or by a recreated database) is detectable.
+VECTOR_FILE_MAGIC = b"HVEC"
+VECTOR_FILE_VERSION = 1
+VECTOR_FILE_HEADER = struct.Struct("<4sB3xI52s")
+ID_RECORD = np.dtype([("id", "<i8"), ("created", "<i8")])
+
+VECTOR_SUFFIX = ".vec"
+IDS_SUFFIX = ".ids"
+TOMBSTONE_SUFFIX = ".del"
+LOCK_SUFFIX = ".lock"
+
+
+class VectorFile:
+    """Append-only, memory-mapped store of one project's normalized vectors.
+
+    Rows are written to the ``.vec`` file before their ids are appended to
+    the ``.ids`` file, so after a crash the ``.ids`` file holds the number of
+    complete rows. Searches read the rows through ``np.memmap``, which
+    leaves them in the OS page cache instead of the Python heap; only the ids
+    and the tombstone bitmap are held in memory.
+
+    Both the in-memory columns and the ``.vec`` file grow by doubling, so an
+    append only copies the columns and remaps the file when it runs out of
+    room. The file's spare rows are zero-filled and lie past the last id,
+    where they are ignored like an interrupted append.
+
+    Several processes (uvicorn workers) may share a store. Every write holds
+    an exclusive lock on the ``.lock`` file and first picks up the rows and
+    tombstones other processes wrote. Files are only grown in place;
+    compaction and resets replace them, so mappings held elsewhere stay
+    readable, and the processes holding them reload and bump :attr:`epoch`
+    on their next write, since row numbers changed.
+    """
+
+    def __init__(self, base: Path, dim: int, model_name: str) -> None:
+        self.base = base
+        self.dim = dim
+        self.model_name = model_name
+        self.epoch = 0
+        self._count = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._created = np.zeros(0, dtype=np.int64)
+        self._deleted = np.zeros(0, dtype=bool)
+        self._mapped: np.ndarray = np.zeros((0, dim), dtype=np.float32)
+        # Which .ids / .del files the columns were read from.
+        self._ids_identity: Optional[Tuple[int, ...]] = None
+        self._tombstone_identity: Optional[Tuple[int, ...]] = None
+
+    @property
+    def vector_path(self) -> Path:
+        return self.base.with_suffix(VECTOR_SUFFIX)
+
+    @property
+    def ids_path(self) -> Path:
+        return self.base.with_suffix(IDS_SUFFIX)
+
+    @property
+    def tombstone_path(self) -> Path:
+        return self.base.with_suffix(TOMBSTONE_SUFFIX)
+
+    @property
+    def lock_path(self) -> Path:
+        return self.base.with_suffix(LOCK_SUFFIX)
+
+    @property
+    def stride(self) -> int:
+        return self.dim * 4
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self._count]
+
+    @property
+    def created(self) -> np.ndarray:
+        return self._created[: self._count]
+
+    @property
+    def deleted(self) -> np.ndarray:
+        return self._deleted[: self._count]
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._mapped[: self._count]
+
+    def __len__(self) -> int:
+        return self._count
+
+    @classmethod
+    def open(cls, base: Path, dim: int, model_name: str) -> "VectorFile":
+        """Open the store at ``base``, starting it over if it is missing or was
+        written for another model or dimension."""
+
+        store = cls(base, dim, model_name)
+        base.parent.mkdir(parents=True, exist_ok=True)
+        with store.locked():
+            if not store._load():
+                store._reset()
+        return store
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold the store's exclusive inter-process lock."""
+
+        with self.lock_path.open("a+b") as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            else:  # pragma: no cover - Windows
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+                else:  # pragma: no cover - Windows
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def reset(self) -> None:
+        with self.locked():
+            self._reset()
+
+    def append(self, ids: np.ndarray, created: np.ndarray, rows: np.ndarray) -> int:
+        """Append a block of rows; returns the row number it starts at.
+
+        Rows other processes appended since this store last looked come
+        first, so the start can lie past the rows this process knows of.
+        """
+
+        block = np.ascontiguousarray(rows, dtype="<f4").reshape(-1, self.dim)
+        records = np.zeros(block.shape[0], dtype=ID_RECORD)
+        records["id"] = ids
+        records["created"] = created
+        with self.locked():
+            self._sync()
+            start, end = self._count, self._count + block.shape[0]
+            self._reserve(end)
+            with self.vector_path.open("r+b") as handle:
+                handle.seek(VECTOR_FILE_HEADER.size + start * self.stride)
+                handle.write(block.tobytes())
+            with self.ids_path.open("ab") as handle:
+                handle.write(records.tobytes())
+            if end > self._ids.shape[0]:
+                self._grow_columns(end)
+            self._ids[start:end] = records["id"]
+            self._created[start:end] = records["created"]
+            self._count = end
+            if end > self._mapped.shape[0]:
+                self._remap()
+        return start
+
+    def mark_deleted(self, rows: Iterable[int], epoch: Optional[int] = None) -> bool:
+        """Tombstone ``rows``.
+
+        With ``epoch``, returns ``False`` without writing if the store was
+        compacted or reset since then, as the row numbers no longer apply.
+        """
+
+        positions = np.fromiter(rows, dtype=np.int64)
+        if positions.size == 0:
+            return True
+        with self.locked():
+            self._sync()
+            if epoch is not None and epoch != self.epoch:
+                return False
+            self.deleted[positions] = True
+            tmp_path = self.tombstone_path.with_suffix(TOMBSTONE_SUFFIX + ".tmp")
+            tmp_path.write_bytes(np.packbits(self.deleted, bitorder="little").tobytes())
+            tmp_path.replace(self.tombstone_path)
+            self._tombstone_identity = _identity(self.tombstone_path, with_mtime=True)
+        return True
+
+    def compact(self) -> Tuple[int, int]:
+        """Rewrite the store without deleted rows; returns ``(kept, removed)``.
+
+        Other processes reload the store on their next write; on Windows the
+        files cannot be replaced while another process has them mapped.
+        """
+
+        with self.locked():
+            self._sync()
+            return self._compact()
+
+    def _compact(self) -> Tuple[int, int]:
+        alive = np.flatnonzero(~self.deleted)
+        removed = len(self) - alive.shape[0]
+        if removed == 0:
+            return len(self), 0
+
+        vector_tmp = self.vector_path.with_suffix(VECTOR_SUFFIX + ".tmp")
+        ids_tmp = self.ids_path.with_suffix(IDS_SUFFIX + ".tmp")
+        with self.vector_path.open("rb") as source:
+            header = source.read(VECTOR_FILE_HEADER.size)
+        with vector_tmp.open("wb") as handle:
+            handle.write(header)
+            for start in range(0, alive.shape[0], 4096):
+                handle.write(np.ascontiguousarray(self.vectors[alive[start : start + 4096]]).tobytes())
+        records = np.zeros(alive.shape[0], dtype=ID_RECORD)
+        records["id"] = self.ids[alive]
+        records["created"] = self.created[alive]
+        ids_tmp.write_bytes(records.tobytes())
+
+        # Release the mapping (Windows cannot replace a mapped file), drop the
+        # bitmap first and swap vectors before ids: an interrupted compaction
+        # then leaves fewer vector rows than ids, which _load treats as corrupt
+        # rather than misaligning tombstones or ids.
+        self._mapped = np.zeros((0, self.dim), dtype=np.float32)
+        self.tombstone_path.unlink(missing_ok=True)
+        os.replace(vector_tmp, self.vector_path)
+        os.replace(ids_tmp, self.ids_path)
+        self._set_columns(
+            records["id"].astype(np.int64),
+            records["created"].astype(np.int64),
+            np.zeros(alive.shape[0], dtype=bool),
+        )
+        self.epoch += 1
+        self._remap()
+        return alive.shape[0], removed
+
+    def _reset(self) -> None:
+        header = VECTOR_FILE_HEADER.pack(
+            VECTOR_FILE_MAGIC, VECTOR_FILE_VERSION, self.dim, self.model_name.encode("utf-8")[:52]
+        )
+        self._mapped = np.zeros((0, self.dim), dtype=np.float32)
+        self.tombstone_path.unlink(missing_ok=True)
+        for path, data in ((self.vector_path, header), (self.ids_path, b"")):
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        self._set_columns(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool))
+        self.epoch += 1
+        self._remap()
+
+    def _load(self) -> bool:
+        if not self.vector_path.exists() or not self.ids_path.exists():
+            return False
+        with self.vector_path.open("rb") as handle:
+            raw = handle.read(VECTOR_FILE_HEADER.size)
+        if len(raw) < VECTOR_FILE_HEADER.size:
+            return False
+        magic, version, dim, model = VECTOR_FILE_HEADER.unpack(raw)
+        if (
+            magic != VECTOR_FILE_MAGIC
+            or version != VECTOR_FILE_VERSION
+            or dim != self.dim
+            or model.rstrip(b"\0") != self.model_name.encode("utf-8")[:52]
+        ):
+            return False
+
+        # Rows past the last id (spare capacity, or an append interrupted
+        # before its ids) are left alone: other processes may map them.
+        vector_rows = (self.vector_path.stat().st_size - VECTOR_FILE_HEADER.size) // self.stride
+        id_rows = self._trim_ids()
+        if vector_rows < id_rows:
+            logger.warning("Vector file %s is shorter than its id map; rebuilding", self.vector_path)
+            return False
+
+        records = np.fromfile(self.ids_path, dtype=ID_RECORD, count=id_rows)
+        self._set_columns(
+            records["id"].astype(np.int64),
+            records["created"].astype(np.int64),
+            np.zeros(id_rows, dtype=bool),
+        )
+        self._tombstone_identity = None
+        self._read_tombstones()
+        self._remap()
+        return True
+
+    def _sync(self) -> None:
+        """Catch up with writes of other processes; call with the lock held."""
+
+        identity = _identity(self.ids_path)
+        if identity != self._ids_identity or self.ids_path.stat().st_size < self._count * ID_RECORD.itemsize:
+            # Compacted or reset elsewhere: every row number may have moved.
+            self._mapped = np.zeros((0, self.dim), dtype=np.float32)
+            if not self._load():
+                self._reset()
+            self.epoch += 1
+            return
+        id_rows = self._trim_ids()
+        if id_rows > self._count:
+            with self.ids_path.open("rb") as handle:
+                handle.seek(self._count * ID_RECORD.itemsize)
+                records = np.frombuffer(handle.read((id_rows - self._count) * ID_RECORD.itemsize), dtype=ID_RECORD)
+            start, end = self._count, id_rows
+            if end > self._ids.shape[0]:
+                self._grow_columns(end)
+            self._ids[start:end] = records["id"]
+            self._created[start:end] = records["created"]
+            self._count = end
+            if end > self._mapped.shape[0]:
+                self._remap()
+        self._read_tombstones()
+
+    def _trim_ids(self) -> int:
+        """Drop a torn trailing id record; returns the number of complete rows."""
+
+        size = self.ids_path.stat().st_size
+        if size % ID_RECORD.itemsize:
+            with self.ids_path.open("r+b") as handle:
+                handle.truncate(size - size % ID_RECORD.itemsize)
+        self._ids_identity = _identity(self.ids_path)
+        return size // ID_RECORD.itemsize
+
+    def _read_tombstones(self) -> None:
+        identity = _identity(self.tombstone_path, with_mtime=True)
+        if identity is None or identity == self._tombstone_identity:
+            return
+        bits = np.unpackbits(np.fromfile(self.tombstone_path, dtype=np.uint8), bitorder="little")
+        count = min(bits.shape[0], self._count)
+        # Tombstones are only ever added, so merging keeps this process's own.
+        self._deleted[:count] |= bits[:count].astype(bool)
+        self._tombstone_identity = identity
+
+    def _set_columns(self, ids: np.ndarray, created: np.ndarray, deleted: np.ndarray) -> None:
+        self._ids, self._created, self._deleted = ids, created, deleted
+        self._count = ids.shape[0]
+        self._ids_identity = _identity(self.ids_path)
+        self._tombstone_identity = _identity(self.tombstone_path, with_mtime=True)
+
+    def _reserve(self, needed: int) -> None:
+        """Double the ``.vec`` file until ``needed`` rows fit; it never shrinks."""
+
+        rows = (self.vector_path.stat().st_size - VECTOR_FILE_HEADER.size) // self.stride
+        if needed <= rows:
+            return
+        with self.vector_path.open("r+b") as handle:
+            handle.truncate(VECTOR_FILE_HEADER.size + max(needed, rows * 2) * self.stride)
+
+    def _grow_columns(self, needed: int) -> None:
+        capacity = max(needed, self._ids.shape[0] * 2)
+        self._ids = self._grow(self._ids, capacity)
+        self._created = self._grow(self._created, capacity)
+        self._deleted = self._grow(self._deleted, capacity)
+
+    def _grow(self, column: np.ndarray, capacity: int) -> np.ndarray:
+        grown = np.zeros(capacity, dtype=column.dtype)
+        grown[: self._count] = column[: self._count]
+        return grown
+
+    def _remap(self) -> None:
+        """Map every row the ``.vec`` file has room for, spare capacity included."""
+
+        rows = (self.vector_path.stat().st_size - VECTOR_FILE_HEADER.size) // self.stride
+        if rows <= 0:
+            self._mapped = np.zeros((0, self.dim), dtype=np.float32)
+            return
+        self._mapped = np.memmap(
+            self.vector_path,
+            dtype="<f4",
+            mode="r",
+            offset=VECTOR_FILE_HEADER.size,
+            shape=(rows, self.dim),
+        )
+
+
+def _identity(path: Path, with_mtime: bool = False) -> Optional[Tuple[int, ...]]:
+    """Tell files apart across ``os.replace``; ``None`` if ``path`` is missing."""
+
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    if with_mtime:
+        return stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size
+    return stat.st_dev, stat.st_ino
+
+
+def vector_file_bases(directory: Path, project_ids: Optional[Iterable[int]] = None) -> List[Path]:
+    """Return the base paths of the vector stores under ``directory``."""
+
+    if project_ids is not None:
+        return [directory / f"project_{project_id}" for project_id in project_ids]
+    return sorted(path.with_suffix("") for path in directory.glob(f"project_*{VECTOR_SUFFIX}"))
+
+
+def read_header(base: Path) -> Optional[Tuple[int, str]]:
+    """Return ``(dim, model name)`` from a vector file header, if it is valid."""
+
+    try:
+        with base.with_suffix(VECTOR_SUFFIX).open("rb") as handle:
+            raw = handle.read(VECTOR_FILE_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(raw) < VECTOR_FILE_HEADER.size:
+        return None
+    magic, version, dim, model = VECTOR_FILE_HEADER.unpack(raw)
+    if magic != VECTOR_FILE_MAGIC or version != VECTOR_FILE_VERSION:
+        return None
+    return dim, model.rstrip(b"\0").decode("utf-8", errors="replace")
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import DataError, IntegrityError
+
+from ..core.config import get_settings
+from ..core.database import Base, session_scope
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindService:
+    """Take append-only rows and bookkeeping updates off the request path.
+
+    Rows queued with :meth:`insert` and row updates queued with :meth:`update`
+    are written by a background task in a single transaction every
+    ``flush_interval_ms``, or as soon as ``max_batch`` rows are waiting.
+    Queued updates of the same row are merged, later values winning. Until
+    :meth:`start` runs (scripts, tools) and after :meth:`stop`, writes go
+    straight to the database.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ) -> None:
+        settings = get_settings()
+        self.enabled = settings.write_behind_enabled
+        self.flush_interval = (flush_interval_ms or settings.write_behind_flush_ms) / 1000.0
+        self.max_batch = max_batch or settings.write_behind_max_batch
+        self.max_queue = max_queue or settings.write_behind_max_queue
+        self._rows: List[Tuple[Type[Base], Dict[str, Any]]] = []
+        self._updates: Dict[Tuple[Type[Base], int], Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._peak_depth = 0
+        self._flushes = 0
+        self._flushed_rows = 0
+        self._flushed_updates = 0
+        self._failures = 0
+        self._dropped = 0
+        self._last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def depth(self) -> int:
+        return len(self._rows) + len(self._updates)
+
+    def start(self) -> None:
+        if not self.enabled or self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        logger.info("Write-behind queue started")
+
+    async def stop(self) -> None:
+        """Stop the background task and drain the queue.
+
+        The task is asked to finish rather than cancelled: a cancelled flush
+        would already have taken its batch off the queue without writing it.
+        """
+
+        task = self._task
+        if task is not None:
+            self._stopping = True
+            if self._wakeup is not None:
+                self._wakeup.set()
+            await task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as exc:  # pragma: no cover - runtime errors
+            logger.error("Write-behind drain failed, %s writes lost: %s", self.depth, exc)
+
+    async def insert(self, model: Type[Base], values: Dict[str, Any]) -> None:
+        """Queue a new ``model`` row; ``values`` are keyed by attribute name."""
+
+        if not self.running:
+            async with session_scope() as session:
+                await session.execute(insert(model), [values])
+            return
+        self._rows.append((model, values))
+        self._queued()
+
+    async def update(self, model: Type[Base], row_id: int, values: Dict[str, Any]) -> None:
+        """Queue ``values`` for the ``model`` row with primary key ``row_id``."""
+
+        if not self.running:
+            async with session_scope() as session:
+                await session.execute(update(model).where(model.id == row_id).values(**values))
+            return
+        self._updates.setdefault((model, row_id), {}).update(values)
+        self._queued()
+
+    async def flush(self) -> int:
+        """Write everything queued so far in one transaction; returns the write count.
+
+        Writes the database rejects (integrity or data errors) are retried one
+        by one and dropped on their own; on any other failure the batch goes
+        back to the front of the queue and the error propagates.
+        """
+
+        async with self._lock:
+            rows, self._rows = self._rows, []
+            updates, self._updates = self._updates, {}
+            if not rows and not updates:
+                return 0
+            start = time.perf_counter()
+            try:
+                async with session_scope() as session:
+                    # Consecutive rows of one model go out as one executemany.
+                    for model, group in groupby(rows, key=lambda row: row[0]):
+                        await session.execute(insert(model), [values for _, values in group])
+                    for (model, row_id), values in updates.items():
+                        await session.execute(update(model).where(model.id == row_id).values(**values))
+            except (IntegrityError, DataError):
+                # A bad write must not block the queue: isolate and drop it.
+                await self._flush_one_by_one(rows, updates)
+            except Exception:
+                self._requeue(rows, updates)
+                raise
+            self._flushes += 1
+            self._flushed_rows += len(rows)
+            self._flushed_updates += len(updates)
+            self._last_flush_ms = (time.perf_counter() - start) * 1000
+            return len(rows) + len(updates)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued_rows": len(self._rows),
+            "queued_updates": len(self._updates),
+            "peak_depth": self._peak_depth,
+            "flushes": self._flushes,
+            "flushed_rows": self._flushed_rows,
+            "flushed_updates": self._flushed_updates,
+            "failures": self._failures,
+            "dropped": self._dropped,
+            "last_flush_ms": round(self._last_flush_ms, 3),
+        }
+
+    def _queued(self) -> None:
+        depth = self.depth
+        self._peak_depth = max(self._peak_depth, depth)
+        if depth >= self.max_batch and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _flush_one_by_one(
+        self,
+        rows: List[Tuple[Type[Base], Dict[str, Any]]],
+        updates: Dict[Tuple[Type[Base], int], Dict[str, Any]],
+    ) -> None:
+        pending_rows = list(rows)
+        pending_updates = dict(updates)
+        try:
+            while pending_rows:
+                model, values = pending_rows[0]
+                await self._write_one(insert(model), [values])
+                pending_rows.pop(0)
+            while pending_updates:
+                (model, row_id), values = next(iter(pending_updates.items()))
+                await self._write_one(update(model).where(model.id == row_id).values(**values))
+                del pending_updates[(model, row_id)]
+        except Exception:
+            self._requeue(pending_rows, pending_updates)
+            raise
+
+    async def _write_one(self, statement, params: Optional[list] = None) -> None:
+        try:
+            async with session_scope() as session:
+                await session.execute(statement, params)
+        except (IntegrityError, DataError) as exc:
+            self._dropped += 1
+            logger.warning("Write-behind dropped a rejected write: %s", exc)
+
+    def _requeue(
+        self,
+        rows: List[Tuple[Type[Base], Dict[str, Any]]],
+        updates: Dict[Tuple[Type[Base], int], Dict[str, Any]],
+    ) -> None:
+        self._failures += 1
+        self._rows[:0] = rows
+        for key, values in updates.items():
+            # Updates queued during the failed flush are newer and win.
+            self._updates[key] = {**values, **self._updates.get(key, {})}
+        overflow = len(self._rows) - self.max_queue
+        if overflow > 0:
+            del self._rows[:overflow]
+            self._dropped += overflow
+            logger.warning("Write-behind queue full, dropped %s oldest rows", overflow)
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as exc:  # pragma: no cover - runtime errors
+                logger.error("Write-behind flush failed, %s writes kept for retry: %s", self.depth, exc)
+
+
+write_behind_service = WriteBehindService()
@@ -0,0 +1,146 @@
+"""Benchmark the database work of a chat turn.
+
+Compares the per-call sequence ``HyperAIAgent.process_chat`` used to run (one
+transaction per service call) against the unit-of-work path it runs now, with
+and without the write-behind queue for usage and key bookkeeping, and reports
+commits per turn, p50/p95 turn latency and throughput under concurrent
+conversations. The provider is a stub that answers instantly and memory search
+is disabled, so only database time is measured. Run from the repository root:
+
+    python tools/bench_chat_turn.py --conversations 16 --turns 30
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+if "DATABASE_PATH" not in os.environ:
+    os.environ["DATABASE_PATH"] = str(Path(tempfile.mkdtemp()) / "bench.db")
+# Summaries would call a real provider; keep them out of the measurement.
+os.environ["SUMMARY_TRIGGER_MESSAGES"] = str(10**9)
+
+from sqlalchemy import event  # noqa: E402
+
+from src.core import agent as agent_module  # noqa: E402
+from src.core.agent import ChatRequest, HyperAIAgent  # noqa: E402
+from src.core.database import get_engine  # noqa: E402
+from src.core.init_db import init_db  # noqa: E402
+from src.core.models import ProviderType  # noqa: E402
+from src.services.conversation_service import conversation_service  # noqa: E402
+from src.services.provider_manager import provider_manager  # noqa: E402
+from src.services.write_behind_service import write_behind_service  # noqa: E402
+
+REPLY = {"text": "ok " * 80, "usage": {"prompt_tokens": 120, "completion_tokens": 80}, "tool_calls": []}
+
+
+class StubProvider:
+    async def generate(self, **kwargs):
+        return REPLY
+
+
+class NoMemories:
+    async def search_memories(self, **kwargs):
+        return []
+
+    def render_context(self, matches):
+        return ""
+
+
+async def reference_turn(project_name: str, conversation_id: int, message: str, context: int) -> None:
+    """The per-call sequence of the chat turn before the unit of work, kept for comparison."""
+
+    project = await conversation_service.ensure_project(project_name)
+    conversation = await conversation_service.get_conversation(conversation_id)
+    await conversation_service.list_conversation_context(conversation.id, context)
+    await conversation_service.add_message(conversation.id, "user", message)
+    key, secret = await provider_manager.get_next_key(ProviderType.OPENAI)
+    await StubProvider().generate(api_key=secret)
+    await provider_manager.mark_success(key.id)
+    await conversation_service.add_message(conversation.id, "assistant", REPLY["text"], token_usage=80)
+    await conversation_service.record_usage(project.id, ProviderType.OPENAI, conversation.model_name, 120, 80)
+    await conversation_service.count_messages(conversation.id)
+
+
+async def run(label: str, turn, conversations: list[int], turns: int, commits: list[int]) -> None:
+    latencies: list[float] = []
+
+    async def chat(conversation_id: int) -> None:
+        for index in range(turns):
+            start = time.perf_counter()
+            await turn(conversation_id, f"question {index} " * 20)
+            latencies.append(time.perf_counter() - start)
+
+    before = commits[0]
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(conversation_id) for conversation_id in conversations))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label:<15} {(commits[0] - before) / len(latencies):5.1f} commits/turn  "
+        f"p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.2f} ms  "
+        f"{len(latencies) / elapsed:8.1f} turns/s"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    await init_db()
+    commits = [0]
+
+    def _count(connection) -> None:
+        commits[0] += 1
+
+    event.listen(get_engine().sync_engine, "commit", _count)
+
+    agent_module.get_provider = lambda provider, model_name=None: StubProvider()
+    agent = HyperAIAgent(config={"max_context_messages": args.context}, memory_svc=NoMemories())
+    await provider_manager.add_key(ProviderType.OPENAI, "bench", "sk-bench")
+    project = await conversation_service.ensure_project("bench")
+
+    async def conversations() -> list[int]:
+        return [
+            (await conversation_service.create_conversation(project.id, ProviderType.OPENAI, "gpt-4o-mini")).id
+            for _ in range(args.conversations)
+        ]
+
+    async def per_call(conversation_id: int, message: str) -> None:
+        await reference_turn(project.name, conversation_id, message, args.context)
+
+    async def unit_of_work(conversation_id: int, message: str) -> None:
+        await agent.process_chat(
+            ChatRequest(
+                project_name=project.name,
+                message=message,
+                provider=ProviderType.OPENAI,
+                conversation_id=conversation_id,
+            )
+        )
+
+    print(f"{args.conversations} concurrent conversations x {args.turns} turns\n")
+    await run("per call", per_call, await conversations(), args.turns, commits)
+    await run("unit of work", unit_of_work, await conversations(), args.turns, commits)
+    write_behind_service.start()
+    await run("+ write-behind", unit_of_work, await conversations(), args.turns, commits)
+    await write_behind_service.stop()
+    print(f"\nwrite-behind: {write_behind_service.stats()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=16, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=30, help="chat turns per conversation")
+    parser.add_argument("--context", type=int, default=20, help="recent messages loaded per turn")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
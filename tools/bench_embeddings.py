@@ -0,0 +1,93 @@
+"""Benchmark hashing embedder throughput on synthetic document chunks.
+
+Compares the original per-text MD5/SHA1 embedder against the batched path in
+both hash schemes and reports chunks/second. Run from the repository root:
+
+    python tools/bench_embeddings.py --chunks 2000
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.services.embedding_service import EMBEDDING_DIM, HashingEmbeddingBackend  # noqa: E402
+
+
+def reference_embed(text: str, dim: int = EMBEDDING_DIM) -> list[float]:
+    """The per-text embedder as it was before batching, kept for comparison."""
+
+    vec = [0.0] * dim
+    normalized = (text or "").strip().lower()
+    if not normalized:
+        return vec
+    for token in normalized.split():
+        h = int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
+        vec[h % dim] += 1.0
+        if len(token) > 1:
+            for i in range(len(token) - 1):
+                bigram = token[i : i + 2]
+                hb = int(hashlib.sha1(bigram.encode("utf-8")).hexdigest(), 16)
+                vec[hb % dim] += 0.5
+    return vec
+
+
+def make_chunks(count: int, words_per_chunk: int, vocabulary: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choices(alphabet, k=rng.randint(2, 10))) for _ in range(vocabulary)]
+    # Zipf-like reuse so common words repeat, as they do in real documents.
+    weights = [1.0 / (rank + 1) for rank in range(vocabulary)]
+    return [" ".join(rng.choices(words, weights=weights, k=words_per_chunk)) for _ in range(count)]
+
+
+def measure(label: str, fn, chunks: list[str]) -> float:
+    start = time.perf_counter()
+    fn(chunks)
+    elapsed = time.perf_counter() - start
+    rate = len(chunks) / elapsed
+    print(f"{label:<34} {elapsed * 1000:9.1f} ms  {rate:10.0f} chunks/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=160, help="words per chunk (~1000 characters)")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.words, args.vocabulary, args.seed)
+
+    def batched(backend: HashingEmbeddingBackend):
+        def run(items: list[str]) -> None:
+            for start in range(0, len(items), args.batch):
+                backend.embed_batch(items[start : start + args.batch])
+
+        return run
+
+    baseline = measure("reference (per text, md5/sha1)", lambda items: [reference_embed(t) for t in items], chunks)
+    legacy = HashingEmbeddingBackend(hash_scheme="legacy")
+    measure("batched legacy (cold cache)", batched(legacy), chunks)
+    legacy_rate = measure("batched legacy (warm cache)", batched(legacy), chunks)
+    fast = HashingEmbeddingBackend(hash_scheme="fast")
+    measure("batched fast (cold cache)", batched(fast), chunks)
+    fast_rate = measure("batched fast (warm cache)", batched(fast), chunks)
+
+    expected = np.asarray([reference_embed(t) for t in chunks[:50]], dtype=np.float32)
+    assert np.allclose(legacy.embed_batch(chunks[:50]), expected), "legacy scheme drifted from reference"
+
+    print(f"\nspeedup legacy: {legacy_rate / baseline:.1f}x, fast: {fast_rate / baseline:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark chat-turn database time under the SQLite connection profiles.
+
+Runs the same concurrent load once with SQLite's defaults (rollback journal,
+synchronous=FULL, small page cache, no mmap) and once with the tuned profile
+from settings (WAL, synchronous=NORMAL, ...). Each simulated chat turn does
+what ``HyperAIAgent.process_chat`` does against the database: store the user
+message, load the recent context, store the reply, record usage and count
+messages. Every profile runs in a fresh subprocess on a fresh database file
+because settings and the engine are process-wide. Run from the repository root:
+
+    python tools/bench_sqlite.py --conversations 16 --turns 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+PROFILES = {
+    "sqlite defaults": {
+        "SQLITE_JOURNAL_MODE": "delete",
+        "SQLITE_SYNCHRONOUS": "full",
+        "SQLITE_CACHE_SIZE_KIB": "2000",
+        "SQLITE_MMAP_SIZE_MB": "0",
+        "SQLITE_TEMP_STORE_MEMORY": "false",
+    },
+    "tuned (settings)": {},
+}
+
+
+async def run_load(conversations: int, turns: int, context: int) -> dict:
+    from src.core.init_db import init_db
+    from src.core.models import ProviderType
+    from src.services.conversation_service import ConversationService
+
+    await init_db()
+    service = ConversationService()
+    project = await service.ensure_project("bench")
+    convos = [
+        await service.create_conversation(project.id, ProviderType.OPENAI, "gpt-4o-mini")
+        for _ in range(conversations)
+    ]
+    latencies: list[float] = []
+
+    async def chat(conversation_id: int) -> None:
+        for turn in range(turns):
+            start = time.perf_counter()
+            await service.add_message(conversation_id, "user", f"question {turn} " * 20)
+            await service.get_recent_messages(conversation_id, context)
+            await service.add_message(conversation_id, "assistant", f"answer {turn} " * 60, token_usage=180)
+            await service.record_usage(project.id, ProviderType.OPENAI, "gpt-4o-mini", 120, 60)
+            await service.count_messages(conversation_id)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(chat(convo.id) for convo in convos))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "turns_per_s": len(latencies) / elapsed,
+    }
+
+
+def run_profile(label: str, overrides: dict, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, **overrides, DATABASE_PATH=str(Path(tmp) / "bench.db"))
+        command = [
+            sys.executable,
+            __file__,
+            "--worker",
+            "--conversations",
+            str(args.conversations),
+            "--turns",
+            str(args.turns),
+            "--context",
+            str(args.context),
+        ]
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    print(
+        f"{label:<18} p50 {result['p50'] * 1000:7.2f} ms  p95 {result['p95'] * 1000:7.2f} ms  "
+        f"{result['turns_per_s']:8.1f} turns/s"
+    )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=16, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=50, help="chat turns per conversation")
+    parser.add_argument("--context", type=int, default=20, help="recent messages loaded per turn")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_load(args.conversations, args.turns, args.context))))
+        return
+
+    print(f"{args.conversations} concurrent conversations x {args.turns} turns\n")
+    results = {label: run_profile(label, overrides, args) for label, overrides in PROFILES.items()}
+    baseline, tuned = results.values()
+    print(f"\nturn throughput: {tuned['turns_per_s'] / baseline['turns_per_s']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Reclaim space held by deleted rows in the per-project vector files.
+
+Deleted memories are only tombstoned in ``data_dir/vectors``; this rewrites
+each file without them. Run it while the backend is stopped, from the
+repository root:
+
+    python tools/compact_vectors.py            # every project
+    python tools/compact_vectors.py --project 3 --project 7
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.core.config import get_settings  # noqa: E402
+from src.services.vector_store_service import VectorFile, read_header, vector_file_bases  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--project", type=int, action="append", help="project id (repeatable)")
+    parser.add_argument("--data-dir", type=Path, default=None, help="defaults to the configured data_dir")
+    args = parser.parse_args()
+
+    directory = (args.data_dir or get_settings().data_dir) / "vectors"
+    total_removed = 0
+    for base in vector_file_bases(directory, args.project):
+        header = read_header(base)
+        if header is None:
+            print(f"{base.name}: missing or unreadable, skipped")
+            continue
+        dim, model_name = header
+        store = VectorFile.open(base, dim, model_name)
+        kept, removed = store.compact()
+        total_removed += removed
+        print(f"{base.name}: kept {kept} rows, removed {removed}")
+    print(f"removed {total_removed} rows in total")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())